@@ -0,0 +1,263 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from config import DATA_DIR
+
+ACTUALS_DB_PATH = os.path.join(DATA_DIR, "actuals.db")
+TRAILING_MONTHS = 12
+
+# A month can be typed in by hand and also covered by an imported bank
+# export; the ledger's figures win, so the same month is never counted twice
+MANUAL, LEDGER = "manual", "ledger"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS monthly (
+    company TEXT NOT NULL,
+    source TEXT NOT NULL,
+    month INTEGER NOT NULL,
+    revenue REAL NOT NULL,
+    expenses REAL NOT NULL,
+    cash_balance REAL,
+    PRIMARY KEY (company, source, month)
+);
+CREATE INDEX IF NOT EXISTS monthly_month ON monthly (company, month);
+CREATE TABLE IF NOT EXISTS category_monthly (
+    company TEXT NOT NULL,
+    source TEXT NOT NULL,
+    month INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (company, source, month, category)
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    company TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    revenue REAL NOT NULL,
+    expenses REAL NOT NULL,
+    months INTEGER NOT NULL,
+    PRIMARY KEY (company, kind, period)
+);
+CREATE TABLE IF NOT EXISTS companies (
+    company TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL DEFAULT 0,
+    ledger_rows INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_local = threading.local()
+
+# ========== CONNECTION ==========
+def _connect(path=None):
+    """Per-thread connection; Streamlit runs each session's script on its own thread"""
+    path = path or ACTUALS_DB_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        connections[path] = conn
+    return conn
+
+def _company(company_name):
+    return str(company_name or "").strip() or "Your Business"
+
+# Months are stored as year * 12 + month - 1, so quarters and trailing windows are integer arithmetic
+def month_number(value):
+    """Month index of a 'YYYY-MM' string, date, Timestamp or datetime64"""
+    return int(np.datetime64(str(value)[:7], "M").astype(int)) + 1970 * 12
+
+def month_label(number):
+    return f"{number // 12:04d}-{number % 12 + 1:02d}"
+
+# ========== ROLLUPS ==========
+def _refresh(conn, company, months):
+    """Bring the rollups in line with the effective figures of the given months
+
+    Each month's change is applied as a delta to its month row, its quarter
+    and the TRAILING_MONTHS trailing windows containing it, so the cost is
+    independent of how much history is stored.
+    """
+    for month in sorted(set(months)):
+        current = conn.execute(
+            "SELECT revenue, expenses FROM monthly WHERE company = ? AND month = ? "
+            "ORDER BY source = ? DESC LIMIT 1", (company, month, LEDGER)).fetchone()
+        stored = conn.execute(
+            "SELECT revenue, expenses, months FROM rollups WHERE company = ? AND kind = 'month' AND period = ?",
+            (company, month)).fetchone()
+        revenue, expenses = current or (0.0, 0.0)
+        old_revenue, old_expenses, old_months = stored or (0.0, 0.0, 0)
+        delta = (revenue - old_revenue, expenses - old_expenses, (current is not None) - old_months)
+        if delta == (0.0, 0.0, 0):
+            continue
+        updates = ([("month", month)] + [("quarter", month // 3)]
+                   + [("ttm", end) for end in range(month, month + TRAILING_MONTHS)])
+        conn.executemany(
+            "INSERT INTO rollups (company, kind, period, revenue, expenses, months) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (company, kind, period) DO UPDATE SET revenue = revenue + excluded.revenue, "
+            "expenses = expenses + excluded.expenses, months = months + excluded.months",
+            [(company, kind, period, *delta) for kind, period in updates])
+    conn.execute("DELETE FROM rollups WHERE company = ? AND months = 0", (company,))
+
+def _touch(conn, company, ledger_rows=None, add_rows=0):
+    conn.execute("INSERT INTO companies (company) VALUES (?) ON CONFLICT (company) DO NOTHING", (company,))
+    conn.execute("UPDATE companies SET revision = revision + 1, ledger_rows = COALESCE(?, ledger_rows) + ? "
+                 "WHERE company = ?", (ledger_rows, add_rows, company))
+
+def _totals_rows(totals):
+    """Per-month (revenue, expenses) and per-month-and-category spend from monthly totals by category"""
+    months = [month_number(m) for m in totals.index.get_level_values("month")]
+    per_month, per_category = {}, {}
+    for month, category, revenue, expenses in zip(months, totals.index.get_level_values("category"),
+                                                  totals["revenue"], totals["expenses"]):
+        inflow, outflow = per_month.get(month, (0.0, 0.0))
+        per_month[month] = (inflow + float(revenue), outflow + float(expenses))
+        if expenses > 0:
+            per_category[month, str(category)] = per_category.get((month, str(category)), 0.0) + float(expenses)
+    return per_month, per_category
+
+# ========== WRITES ==========
+def record_month(company_name, month, revenue, expenses, expense_breakdown=None, cash_balance=None,
+                 source=MANUAL, db_path=None):
+    """Store one month's figures, replacing that month's earlier figures from the same source"""
+    company, number = _company(company_name), month_number(month)
+    conn = _connect(db_path)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO monthly VALUES (?, ?, ?, ?, ?, ?)",
+                     (company, source, number, float(revenue), float(expenses),
+                      None if cash_balance is None else float(cash_balance)))
+        if expense_breakdown is not None:
+            conn.execute("DELETE FROM category_monthly WHERE company = ? AND source = ? AND month = ?",
+                         (company, source, number))
+            conn.executemany("INSERT INTO category_monthly VALUES (?, ?, ?, ?, ?)",
+                             [(company, source, number, category, float(amount))
+                              for category, amount in expense_breakdown.items() if amount])
+        _refresh(conn, company, [number])
+        _touch(conn, company)
+
+def add_monthly_totals(company_name, totals, rows=0, source=LEDGER, db_path=None):
+    """Add a batch of newly imported transactions, given as monthly totals by category
+
+    Only the months the batch touches are updated.
+    """
+    company = _company(company_name)
+    per_month, per_category = _totals_rows(totals)
+    conn = _connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO monthly (company, source, month, revenue, expenses) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (company, source, month) DO UPDATE SET revenue = revenue + excluded.revenue, "
+            "expenses = expenses + excluded.expenses",
+            [(company, source, month, *values) for month, values in per_month.items()])
+        conn.executemany(
+            "INSERT INTO category_monthly VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (company, source, month, category) DO UPDATE SET amount = amount + excluded.amount",
+            [(company, source, month, category, amount) for (month, category), amount in per_category.items()])
+        _refresh(conn, company, per_month)
+        _touch(conn, company, add_rows=rows)
+
+def replace_source(company_name, totals, rows=0, source=LEDGER, db_path=None):
+    """Replace everything recorded from one source, e.g. after recategorizing the ledger
+
+    Rollups only change where a month's revenue or expenses actually did.
+    """
+    company = _company(company_name)
+    per_month, per_category = _totals_rows(totals)
+    conn = _connect(db_path)
+    with conn:
+        old_months = [m for (m,) in conn.execute("SELECT month FROM monthly WHERE company = ? AND source = ?",
+                                                 (company, source))]
+        conn.execute("DELETE FROM monthly WHERE company = ? AND source = ?", (company, source))
+        conn.execute("DELETE FROM category_monthly WHERE company = ? AND source = ?", (company, source))
+        conn.executemany("INSERT INTO monthly (company, source, month, revenue, expenses) VALUES (?, ?, ?, ?, ?)",
+                         [(company, source, month, *values) for month, values in per_month.items()])
+        conn.executemany("INSERT INTO category_monthly VALUES (?, ?, ?, ?, ?)",
+                         [(company, source, month, category, amount)
+                          for (month, category), amount in per_category.items()])
+        _refresh(conn, company, [*old_months, *per_month])
+        _touch(conn, company, ledger_rows=rows if source == LEDGER else None)
+
+# ========== QUERIES ==========
+def actuals_revision(company_name, db_path=None):
+    """(revision, ledger_rows): revision changes on every write, ledger_rows counts imported transactions"""
+    row = _connect(db_path).execute("SELECT revision, ledger_rows FROM companies WHERE company = ?",
+                                    (_company(company_name),)).fetchone()
+    return tuple(row) if row else (0, 0)
+
+def monthly_actuals(company_name, months=None, db_path=None):
+    """Monthly figures, oldest first, with trailing-12 sums and year-over-year changes
+
+    Read straight from the rollups: one indexed range scan, however many
+    years are stored. ttm_months is how many months the trailing window
+    actually covers; yoy_* are NaN where the month a year earlier is missing.
+    """
+    company = _company(company_name)
+    limit = -1 if months is None else months + 12
+    rows = _connect(db_path).execute("""
+        SELECT m.period, m.revenue, m.expenses, t.revenue, t.expenses, t.months,
+               (SELECT cash_balance FROM monthly c
+                WHERE c.company = m.company AND c.month = m.period AND c.cash_balance IS NOT NULL
+                ORDER BY c.source = ? DESC LIMIT 1)
+        FROM rollups m JOIN rollups t ON t.company = m.company AND t.kind = 'ttm' AND t.period = m.period
+        WHERE m.company = ? AND m.kind = 'month'
+        ORDER BY m.period DESC LIMIT ?
+    """, (LEDGER, company, limit)).fetchall()[::-1]
+    data = np.array(rows, dtype=float).reshape(-1, 7)
+    period = data[:, 0].astype(int)
+    revenue, expenses = data[:, 1], data[:, 2]
+    profit = revenue - expenses
+    # Position of the same month a year earlier, if it is stored
+    prior = np.searchsorted(period, period - 12)
+    has_prior = (prior < len(period)) & (period[np.minimum(prior, len(period) - 1)] == period - 12)
+    prior = np.where(has_prior, prior, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        yoy_revenue = np.where(has_prior & (revenue[prior] != 0), revenue / revenue[prior] - 1, np.nan)
+    yoy_profit = np.where(has_prior, profit - profit[prior], np.nan)
+    keep = slice(None) if months is None else slice(-months, None) if months else slice(0)
+    result = {
+        "months": [month_label(p) for p in period],
+        "revenue": revenue,
+        "expenses": expenses,
+        "profit": profit,
+        "cash_balance": data[:, 6],
+        "ttm_revenue": data[:, 3],
+        "ttm_expenses": data[:, 4],
+        "ttm_profit": data[:, 3] - data[:, 4],
+        "ttm_months": data[:, 5].astype(int),
+        "yoy_revenue": yoy_revenue,
+        "yoy_profit": yoy_profit,
+    }
+    return {key: values[keep] for key, values in result.items()}
+
+def quarterly_actuals(company_name, db_path=None):
+    """Quarterly revenue, expenses and profit, oldest first; months counts the months recorded"""
+    rows = _connect(db_path).execute(
+        "SELECT period, revenue, expenses, months FROM rollups WHERE company = ? AND kind = 'quarter' "
+        "ORDER BY period", (_company(company_name),)).fetchall()
+    data = np.array(rows, dtype=float).reshape(-1, 4)
+    return {
+        "quarters": [f"{int(p) // 4}-Q{int(p) % 4 + 1}" for p in data[:, 0]],
+        "revenue": data[:, 1],
+        "expenses": data[:, 2],
+        "profit": data[:, 1] - data[:, 2],
+        "months": data[:, 3].astype(int),
+    }
+
+def category_actuals(company_name, month, db_path=None):
+    """Spend per category in one month, from the ledger when it covers that month"""
+    company = _company(company_name)
+    rows = _connect(db_path).execute("""
+        SELECT category, amount FROM category_monthly
+        WHERE company = ? AND month = ? AND source = (
+            SELECT source FROM monthly WHERE company = ? AND month = ? ORDER BY source = ? DESC LIMIT 1)
+        ORDER BY amount DESC
+    """, (company, month_number(month), company, month_number(month), LEDGER)).fetchall()
+    return dict(rows)
@@ -1,15 +1,29 @@
 import streamlit as st
-import requests
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
-import io
-from datetime import datetime, timedelta
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-import base64
+import time
+import uuid
+from datetime import datetime
+from ledger import (categorizer, ingest_transactions, load_rules, merchant_categories, save_rules, transaction_count,
+                    unmatched_merchants)
+from core import (cash_forecast, cash_simulation, daily_cash_calendar, ledger_financials, ledger_merchant_totals,
+                  company_report, runway_sensitivity, sync_ledger_actuals)
+from actuals import TRAILING_MONTHS, actuals_revision, monthly_actuals, quarterly_actuals, record_month
+from charts import (plot_cash_flow_forecast, plot_expense_breakdown, plot_profit_trend,
+                    plot_cash_fan_chart, plot_runway_analysis, plot_cash_calendar, SAFETY_MONTHS,
+                    SENSITIVITY_METRICS, SENSITIVITY_MONTHS)
+from cash_calendar import FREQUENCIES, default_events
+from forecast import safety_frontier
+from cache import cache_stats
+from artifacts import XLSX_MIME, report_key, cached_report, report_cache_stats
+from report_jobs import CANCELLED, DONE, FAILED, JobQueueFull, get_report_queue
+from llm_client import get_client, backend_configured
+from assistant import ask_cfo_assistant, assistant_context, response_cache_stats
+from metrics import DEFAULT_EXPENSE_SPLIT, DEFAULT_FINANCIAL_DATA, format_runway
+from dashboards import GRAPH_DEFAULTS, get_store, shared_dashboard, shared_figure, start_warmup
+from session_memory import SESSION_MEMORY_BYTES, enforce_session_budget
+from chat_store import append_message, count_messages, recent_messages, search_messages
+from tracing import TRACE_DIR, TRACE_SAMPLE_RATE, span, start_rerun, finish_rerun, span_percentiles
 
 # ========== PAGE CONFIG ==========
 st.set_page_config(
@@ -102,250 +116,44 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# ========== PROFESSIONAL SPREADSHEET GENERATOR ==========
-def create_financial_spreadsheet(financial_data, transactions=None):
-    """Create a professional Excel spreadsheet with financial data"""
-    
-    wb = openpyxl.Workbook()
-    ws1 = wb.active
-    ws1.title = "Financial Dashboard"
-    
-    # Title
-    ws1.merge_cells('A1:F1')
-    title_cell = ws1['A1']
-    title_cell.value = "UXXCA FINANCIAL DASHBOARD"
-    title_cell.font = Font(size=20, bold=True, color="FFFFFF")
-    title_cell.fill = PatternFill(start_color="4F46E5", end_color="4F46E5", fill_type="solid")
-    title_cell.alignment = Alignment(horizontal='center')
-    
-    # Company Info
-    ws1['A3'] = "Company Name:"
-    ws1['B3'] = financial_data.get('company_name', 'Your Business')
-    ws1['A4'] = "Report Period:"
-    ws1['B4'] = datetime.now().strftime("%B %Y")
-    
-    # Key Metrics
-    metrics = [
-        ["Monthly Revenue", f"${financial_data['revenue']:,.2f}"],
-        ["Monthly Expenses", f"${financial_data['expenses']:,.2f}"],
-        ["Monthly Profit", f"${financial_data['revenue'] - financial_data['expenses']:,.2f}"],
-        ["Profit Margin", f"{(financial_data['revenue'] - financial_data['expenses']) / financial_data['revenue'] * 100:.1f}%"],
-        ["Cash Balance", f"${financial_data['cash_balance']:,.2f}"],
-        ["Runway", f"{financial_data['cash_balance'] / financial_data['expenses']:.1f} months"],
-    ]
-    
-    # Write metrics
-    for i, (label, value) in enumerate(metrics, start=6):
-        ws1[f'A{i}'] = label
-        ws1[f'B{i}'] = value
-    
-    # Adjust column widths
-    for column in ws1.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws1.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save to bytes
-    excel_bytes = io.BytesIO()
-    wb.save(excel_bytes)
-    excel_bytes.seek(0)
-    
-    return excel_bytes
-
-def get_download_link(excel_bytes, filename="financial_report.xlsx"):
-    """Generate download link for Excel file"""
-    b64 = base64.b64encode(excel_bytes.read()).decode()
-    href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}" style="background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%); color: white; padding: 12px 24px; border-radius: 10px; text-decoration: none; font-weight: bold; display: inline-block; margin: 10px 0;">📥 Download Financial Report</a>'
-    return href
-
-# ========== GRAPH FUNCTIONS ==========
-def plot_cash_flow_forecast(revenue, expenses, cash_balance, months=12):
-    """Plot cash flow forecast"""
-    months_list = list(range(1, months + 1))
-    forecast = []
-    current_cash = cash_balance
-    
-    for month in months_list:
-        current_cash += (revenue - expenses)
-        forecast.append(current_cash)
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Scatter(
-        x=months_list,
-        y=forecast,
-        mode='lines+markers',
-        name='Cash Forecast',
-        line=dict(color='#60a5fa', width=3),
-        marker=dict(size=8),
-        fill='tozeroy',
-        fillcolor='rgba(96, 165, 250, 0.1)'
-    ))
-    
-    fig.update_layout(
-        title="💰 12-Month Cash Flow Forecast",
-        xaxis_title="Months",
-        yaxis_title="Cash Balance ($)",
-        template="plotly_dark",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white'),
-        hovermode='x unified',
-        height=400
-    )
-    
-    return fig
-
-def plot_expense_breakdown(expenses_dict):
-    """Plot expense breakdown"""
-    fig = go.Figure()
-    
-    fig.add_trace(go.Pie(
-        labels=list(expenses_dict.keys()),
-        values=list(expenses_dict.values()),
-        hole=0.4,
-        marker=dict(colors=['#ef4444', '#f59e0b', '#10b981', '#3b82f6', '#8b5cf6']),
-        textinfo='label+percent',
-        textposition='outside'
-    ))
-    
-    fig.update_layout(
-        title="📊 Expense Breakdown",
-        template="plotly_dark",
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white'),
-        height=400,
-        showlegend=False
-    )
-    
-    return fig
-
-def plot_profit_trend(revenue, expenses):
-    """Plot profit trend over time"""
-    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    profit_trend = []
-    
-    # Simulate some variation
-    for i in range(12):
-        month_revenue = revenue * (1 + np.random.uniform(-0.1, 0.2))
-        month_expenses = expenses * (1 + np.random.uniform(-0.05, 0.15))
-        profit_trend.append(month_revenue - month_expenses)
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Scatter(
-        x=months,
-        y=profit_trend,
-        mode='lines+markers',
-        name='Monthly Profit',
-        line=dict(color='#10b981', width=3),
-        marker=dict(size=8)
-    ))
-    
-    fig.update_layout(
-        title="📈 Monthly Profit Trend",
-        xaxis_title="Month",
-        yaxis_title="Profit ($)",
-        template="plotly_dark",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white'),
-        hovermode='x unified',
-        height=400
-    )
-    
-    return fig
-
-def plot_runway_analysis(cash_balance, monthly_expenses):
-    """Plot runway analysis"""
-    if monthly_expenses == 0:
-        return None
-    
-    scenarios = {
-        'Current': cash_balance / monthly_expenses,
-        'Reduce Expenses 20%': cash_balance / (monthly_expenses * 0.8),
-        'Increase Revenue 20%': (cash_balance + (monthly_expenses * 0.2 * 6)) / monthly_expenses,
-        'Both Strategies': cash_balance / (monthly_expenses * 0.8) + 2
-    }
-    
-    fig = go.Figure()
-    
-    colors = ['#3b82f6', '#10b981', '#f59e0b', '#8b5cf6']
-    
-    for i, (scenario, runway) in enumerate(scenarios.items()):
-        fig.add_trace(go.Bar(
-            x=[scenario],
-            y=[runway],
-            name=scenario,
-            marker_color=colors[i],
-            text=[f'{runway:.1f} months'],
-            textposition='outside'
-        ))
-    
-    fig.add_hline(y=6, line_dash="dash", line_color="green", 
-                  annotation_text="6-Month Safety Net", 
-                  annotation_position="top right")
-    
-    fig.update_layout(
-        title="🛡️ Runway Analysis - Different Strategies",
-        yaxis_title="Months of Runway",
-        showlegend=False,
-        template="plotly_dark",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='white'),
-        height=400
-    )
-    
-    return fig
-
 # ========== SESSION STATE ==========
-if "messages" not in st.session_state:
-    st.session_state.messages = [
-        {"role": "assistant", "content": "👋 **Welcome to UXXCA AI CFO!** I'm your financial co-pilot. I can analyze your finances, generate professional spreadsheets, create interactive graphs, and provide actionable advice."}
-    ]
+CHAT_PAGE_SIZE = 20
+
+# Every session starts from the same inputs; their dashboard and graphs are built once per server
+start_warmup()
+
+# Chat history lives in the chat store; the session only keeps its id and how many pages to show
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+    st.session_state.history_pages = 1
+    append_message(st.session_state.session_id, "assistant", "👋 **Welcome to UXXCA AI CFO!** I'm your financial co-pilot. I can analyze your finances, generate professional spreadsheets, create interactive graphs, and provide actionable advice.")
+
+# Graph controls are only drawn while their graph is shown, and Streamlit drops the state of
+# widgets that are not drawn; re-assigning the keys every run keeps the user's settings
+for key, default in GRAPH_DEFAULTS.items():
+    st.session_state[key] = st.session_state.get(key, default)
+
+# Trace this rerun when the performance panel is open, or when sampled
+PERF_HISTORY = 50
+st.session_state.reruns = st.session_state.get("reruns", 0) + 1
+start_rerun(st.session_state.session_id, st.session_state.reruns, force=st.session_state.get("perf_panel", False))
+
+def finish_tracing():
+    """End this rerun's trace and keep its record for the performance panel"""
+    record = finish_rerun()
+    if record is not None:
+        st.session_state.perf_history = (st.session_state.get("perf_history", []) + [record])[-PERF_HISTORY:]
+
+def rerun():
+    """st.rerun, which stops the script before the end-of-run trace export, so the trace is finished first"""
+    finish_tracing()
+    st.rerun()
 
 if "financial_data" not in st.session_state:
-    st.session_state.financial_data = {
-        "revenue": 15000,
-        "expenses": 12000,
-        "cash_balance": 50000,
-        "company_name": "Your Business"
-    }
-
-# ========== HELPER FUNCTIONS ==========
-def ask_cfo_assistant(question, financial_context=None):
-    """Enhanced CFO AI Assistant"""
-    if financial_context:
-        return f"""
-**Analysis of your financial situation:**
-
-**Current Metrics:**
-- Monthly Revenue: ${financial_context['revenue']:,.2f}
-- Monthly Expenses: ${financial_context['expenses']:,.2f}
-- Monthly Profit: ${financial_context['revenue'] - financial_context['expenses']:,.2f}
-- Profit Margin: {(financial_context['revenue'] - financial_context['expenses']) / financial_context['revenue'] * 100:.1f}%
-- Cash Runway: {financial_context['cash_balance'] / financial_context['expenses']:.1f} months
-
-**Recommendations:**
-1. Focus on increasing your profit margin by optimizing expenses
-2. Maintain at least 6 months of cash runway for safety
-3. Consider reinvesting profits into growth opportunities
-
-**Next Steps:**
-Generate detailed reports using the spreadsheet feature below, or explore interactive graphs to visualize your financial health.
-"""
-    return "I'm here to help with your financial analysis. Please provide your financial data in the sidebar."
+    st.session_state.financial_data = dict(DEFAULT_FINANCIAL_DATA)
 
 # ========== SIDEBAR ==========
-with st.sidebar:
+with st.sidebar, span("sidebar"):
     st.markdown("""
     <div style="text-align: center; padding: 1.5rem 0;">
         <h1 style="color: #60a5fa; font-size: 2.2rem; margin: 0;">UXXCA</h1>
@@ -359,6 +167,62 @@ with st.sidebar:
                                  value=st.session_state.financial_data.get('company_name', ''),
                                  key="company_name")
     
+    # Bank ledger import (above the number inputs so it can prefill them). Once imported the rows
+    # live in the ledger, so the uploader gets a new key and the session stops holding the file.
+    bank_uploads = st.session_state.get("bank_uploads", 0)
+    bank_file = st.file_uploader("**Bank Export (CSV/XLSX)**", type=["csv", "xlsx"], key=f"bank_file_{bank_uploads}")
+    if bank_file is not None:
+        with st.spinner("Importing transactions..."):
+            import_stats = ingest_transactions(bank_file, company_name, filename=bank_file.name)
+        st.session_state.bank_uploads = bank_uploads + 1
+        st.success(f"✅ Imported {import_stats['rows_appended']:,} new of {import_stats['rows_read']:,} rows")
+    
+    ledger_rows = transaction_count(company_name)
+    ledger_rules = load_rules(company_name) if ledger_rows else []
+    if ledger_rows:
+        st.caption(f"🏦 {ledger_rows:,} transactions on file")
+        with span("sync actuals"):
+            sync_ledger_actuals(company_name, ledger_rows)
+        with st.expander("🏷️ Categorization Rules"):
+            st.caption("Descriptions containing a pattern get its category, ahead of the built-in keywords.")
+            unmatched_caption = st.empty()
+            merchant_totals = ledger_merchant_totals(company_name, ledger_rows)
+            edited_rules = st.data_editor(pd.DataFrame(ledger_rules, columns=["pattern", "category"]),
+                                          num_rows="dynamic", hide_index=True, use_container_width=True,
+                                          column_config={
+                                              "pattern": st.column_config.TextColumn("Description Contains"),
+                                              "category": st.column_config.TextColumn("Category"),
+                                          })
+            if st.button("💾 Save Rules", use_container_width=True):
+                before = merchant_categories(merchant_totals, categorizer(company_name))
+                save_rules(company_name, [rule for rule in edited_rules.to_dict("records")
+                                          if pd.notna(rule["pattern"]) and pd.notna(rule["category"])])
+                ledger_rules = load_rules(company_name)
+                after = merchant_categories(merchant_totals, categorizer(company_name))
+                changed = before.index[before.to_numpy() != after.to_numpy()].get_level_values("merchant").nunique()
+                sync_ledger_actuals(company_name, ledger_rows, force=True)
+                if st.session_state.financial_data.get("source") == "ledger":
+                    derived = ledger_financials(company_name, ledger_rows, ledger_rules)
+                    st.session_state.financial_data["expense_breakdown"] = dict(derived["expense_breakdown"])
+                st.success(f"✅ Re-categorized {changed:,} merchants")
+            # Filled in after any save, so it reflects the rules just stored
+            unmatched = unmatched_merchants(merchant_totals, categorizer(company_name))
+            if unmatched:
+                unmatched_caption.caption("Largest unmatched: " + ", ".join(f"{merchant} (${spend:,.0f}/mo)"
+                                                                            for merchant, spend in unmatched.items()))
+        if st.button("📥 Use Ledger Figures", use_container_width=True):
+            derived = ledger_financials(company_name, ledger_rows, ledger_rules)
+            st.session_state.revenue_input = int(round(derived["revenue"]))
+            st.session_state.expenses_input = int(round(derived["expenses"]))
+            st.session_state.financial_data.update({
+                "revenue": st.session_state.revenue_input,
+                "expenses": st.session_state.expenses_input,
+                "company_name": company_name,
+                "expense_breakdown": dict(derived["expense_breakdown"]),
+                "source": "ledger",
+            })
+            rerun()
+    
     revenue = st.number_input("**Monthly Revenue ($)**", 
                              min_value=0, 
                              value=st.session_state.financial_data['revenue'],
@@ -376,11 +240,11 @@ with st.sidebar:
     
     # Expense breakdown inputs
     st.markdown("### 📈 Expense Categories")
-    marketing = st.number_input("Marketing ($)", min_value=0, value=int(expenses * 0.2), key="marketing")
-    salaries = st.number_input("Salaries ($)", min_value=0, value=int(expenses * 0.4), key="salaries")
-    operations = st.number_input("Operations ($)", min_value=0, value=int(expenses * 0.2), key="operations")
-    software = st.number_input("Software ($)", min_value=0, value=int(expenses * 0.1), key="software")
-    other = st.number_input("Other ($)", min_value=0, value=int(expenses * 0.1), key="other")
+    marketing = st.number_input("Marketing ($)", min_value=0, value=int(expenses * DEFAULT_EXPENSE_SPLIT["Marketing"]), key="marketing")
+    salaries = st.number_input("Salaries ($)", min_value=0, value=int(expenses * DEFAULT_EXPENSE_SPLIT["Salaries"]), key="salaries")
+    operations = st.number_input("Operations ($)", min_value=0, value=int(expenses * DEFAULT_EXPENSE_SPLIT["Operations"]), key="operations")
+    software = st.number_input("Software ($)", min_value=0, value=int(expenses * DEFAULT_EXPENSE_SPLIT["Software"]), key="software")
+    other = st.number_input("Other ($)", min_value=0, value=int(expenses * DEFAULT_EXPENSE_SPLIT["Other"]), key="other")
     
     if st.button("🔄 Update All Data", type="primary", use_container_width=True):
         st.session_state.financial_data = {
@@ -396,8 +260,10 @@ with st.sidebar:
                 "Other": other
             }
         }
+        record_month(company_name, datetime.now(), revenue, expenses,
+                     st.session_state.financial_data["expense_breakdown"], cash_balance)
         st.success("✅ All data updated!")
-        st.rerun()
+        rerun()
 
 # ========== MAIN INTERFACE ==========
 # Header
@@ -413,71 +279,142 @@ st.markdown("""
 # ========== FINANCIAL METRICS ==========
 st.markdown("### 📊 Live Financial Dashboard")
 
+def current_expense_breakdown():
+    """Ledger categories once ledger figures are in use, otherwise the sidebar categories"""
+    if st.session_state.financial_data.get("source") == "ledger":
+        return st.session_state.financial_data["expense_breakdown"]
+    return {
+        "Marketing": marketing,
+        "Salaries": salaries,
+        "Operations": operations,
+        "Software": software,
+        "Other": other
+    }
+
+
 col1, col2, col3, col4 = st.columns(4)
 
-profit = revenue - expenses
-runway = cash_balance / expenses if expenses > 0 else 0
-profit_margin = (profit / revenue * 100) if revenue > 0 else 0
-
-with col1:
-    st.metric("Monthly Revenue", f"${revenue:,.0f}")
-with col2:
-    st.metric("Monthly Expenses", f"${expenses:,.0f}")
-with col3:
-    st.metric("Monthly Profit", f"${profit:,.0f}", 
-              f"{profit_margin:.1f}% margin")
-with col4:
-    runway_status = "✅" if runway >= 6 else "⚠️" if runway >= 3 else "🚨"
-    st.metric("Cash Runway", f"{runway:.1f} months", runway_status)
+with span("metrics"):
+    # Read-only and shared by every session with the same figures, so sessions keep no copy
+    metrics = shared_dashboard(revenue, expenses, cash_balance, current_expense_breakdown(), company_name)
+    profit = metrics["monthly_profit"]
+    runway = metrics["runway_months"]
+    margin = metrics["profit_margin"]
+
+    with col1:
+        st.metric("Monthly Revenue", f"${revenue:,.0f}")
+    with col2:
+        st.metric("Monthly Expenses", f"${expenses:,.0f}")
+    with col3:
+        st.metric("Monthly Profit", f"${profit:,.0f}", 
+                  f"{margin:.1f}% margin")
+    with col4:
+        runway_status = "✅" if runway >= 6 else "⚠️" if runway >= 3 else "🚨"
+        st.metric("Cash Runway", format_runway(runway), runway_status)
 
 # ========== SPREADSHEET GENERATOR ==========
 st.markdown("---")
 st.markdown("### 📈 Generate Professional Spreadsheet")
 
+report_params = {
+    "forecast_months": st.session_state.get("forecast_months", 12),
+    "revenue_growth": st.session_state.get("revenue_growth", 0.0) / 100,
+    "expense_growth": st.session_state.get("expense_growth", 0.0) / 100,
+}
+with span("report key"):
+    current_report_key = report_key(st.session_state.financial_data, company_name, ledger_rows, ledger_rules,
+                                    report_params, datetime.now().strftime("%Y-%m"))
+
+# Reports build on the shared job queue; the closure takes copies because it runs outside this session
+REPORT_POLL_SECONDS = 0.5
+report_financial_data = dict(st.session_state.financial_data)
+report_ledger_company = company_name if ledger_rows else None
+
+def write_report(path, progress):
+    company_report(path, report_financial_data, ledger_company=report_ledger_company,
+                   progress=progress, **report_params)
+
+report_queue = get_report_queue()
+report_job = report_queue.get(st.session_state.get("report_job_id"))
+
 if st.button("🚀 Generate Excel Financial Report", type="primary", use_container_width=True):
-    with st.spinner("Creating professional Excel report..."):
-        # Generate Excel file
-        excel_file = create_financial_spreadsheet(st.session_state.financial_data)
-        
-        # Create download link
-        st.markdown(get_download_link(excel_file, f"{company_name}_Financial_Report.xlsx"), unsafe_allow_html=True)
-        
-        st.success("✅ Report generated! Click the button above to download.")
+    try:
+        with span("report submit"):
+            report_job = report_queue.submit(current_report_key, write_report, st.session_state.session_id)
+        st.session_state.report_job_id = report_job.id
+    except JobQueueFull as e:
+        st.warning(f"⏳ {e}")
+
+if report_job is not None:
+    if report_job.active:
+        st.progress(report_job.progress, text=f"Creating professional Excel report... {report_job.stage}")
+        if st.button("✖ Cancel Report", use_container_width=True):
+            report_queue.cancel(report_job.id, st.session_state.session_id)
+            st.session_state.report_job_id = report_job = None
+    else:
+        st.session_state.report_job_id = None
+        if report_job.status == DONE:
+            st.session_state.report_key = report_job.key
+            st.success("✅ Report generated! Click the button below to download.")
+        elif report_job.status == FAILED:
+            st.error(f"❌ Report generation failed: {report_job.error}")
+        elif report_job.status == CANCELLED:
+            st.info("Report generation cancelled")
+
+# Offer the download for as long as the inputs match the generated report
+if st.session_state.get("report_key") == current_report_key:
+    report_file = cached_report(current_report_key)
+    if report_file:
+        with open(report_file, "rb") as f, span("report download"):
+            st.download_button("📥 Download Financial Report", data=f,
+                               file_name=f"{company_name}_Financial_Report.xlsx",
+                               mime=XLSX_MIME, type="primary", use_container_width=True)
 
 # ========== INTERACTIVE GRAPHS ==========
 st.markdown("---")
 st.markdown("### 📊 Interactive Financial Graphs")
 
-# Create tabs for different graphs
-tab1, tab2, tab3, tab4 = st.tabs(["Cash Flow Forecast", "Expense Breakdown", "Profit Trend", "Runway Analysis"])
-
-with tab1:
+# Only the selected graph is computed and sent to the browser. st.tabs can't report which tab
+# is open, so a horizontal radio acts as the tab bar.
+def render_cash_flow_tab():
     st.markdown('<div class="graph-box">', unsafe_allow_html=True)
-    fig1 = plot_cash_flow_forecast(revenue, expenses, cash_balance)
+    fc_col1, fc_col2, fc_col3 = st.columns(3)
+    with fc_col1:
+        forecast_months = st.slider("Horizon (months)", 6, 120, step=6, key="forecast_months")
+    with fc_col2:
+        revenue_growth = st.number_input("Monthly revenue growth (%)", min_value=-99.0, step=0.5,
+                                         key="revenue_growth") / 100
+    with fc_col3:
+        expense_growth = st.number_input("Monthly expense growth (%)", min_value=-99.0, step=0.5,
+                                         key="expense_growth") / 100
+    
+    fig1 = shared_figure(plot_cash_flow_forecast, revenue, expenses, cash_balance, forecast_months,
+                         revenue_growth, expense_growth)
     st.plotly_chart(fig1, use_container_width=True)
     
+    forecast = cash_forecast(cash_balance, revenue, expenses, forecast_months,
+                             revenue_growth, expense_growth)
+    months_to_zero = forecast["months_to_zero"]
+    cash_out_text = (f"Cash runs out in month **{months_to_zero:.0f}**" if np.isfinite(months_to_zero)
+                     else f"Cash stays positive for all {forecast_months} months")
+    
     st.markdown("**💡 Insights:**")
     st.markdown(f"""
-    - Your cash will reach **${cash_balance + (revenue - expenses) * 12:,.0f}** in 12 months
-    - Monthly cash flow: **${revenue - expenses:,.0f}**
-    - Break-even point: {abs(cash_balance / (revenue - expenses)):.1f} months (if negative cash flow)
+    - Your cash will reach **${forecast["ending_balance"]:,.0f}** in {forecast_months} months
+    - Monthly cash flow: **${metrics["monthly_profit"]:,.0f}** (today)
+    - Lowest projected balance: **${forecast["min_balance"]:,.0f}**
+    - {cash_out_text}
     """)
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab2:
+def render_expense_tab():
     st.markdown('<div class="graph-box">', unsafe_allow_html=True)
-    expense_data = {
-        "Marketing": marketing,
-        "Salaries": salaries,
-        "Operations": operations,
-        "Software": software,
-        "Other": other
-    }
-    fig2 = plot_expense_breakdown(expense_data)
+    expense_data = metrics["category_spend"]
+    fig2 = shared_figure(plot_expense_breakdown, expense_data)
     st.plotly_chart(fig2, use_container_width=True)
     
     st.markdown("**💡 Insights:**")
-    largest_expense = max(expense_data, key=expense_data.get)
+    largest_expense = metrics["largest_expense"]
     st.markdown(f"""
     - Largest expense category: **{largest_expense}** (${expense_data[largest_expense]:,.0f})
     - Total expenses: **${expenses:,.0f}**
@@ -485,25 +422,104 @@ with tab2:
     """)
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab3:
+def render_profit_trend_tab():
     st.markdown('<div class="graph-box">', unsafe_allow_html=True)
-    fig3 = plot_profit_trend(revenue, expenses)
+    sim_col1, sim_col2 = st.columns(2)
+    with sim_col1:
+        sim_seed = st.number_input("Simulation seed", min_value=0, step=1, key="sim_seed")
+    with sim_col2:
+        sim_paths = st.select_slider("Simulated paths", options=[10_000, 50_000, 100_000, 250_000],
+                                     key="sim_paths")
+    
+    fig3 = shared_figure(plot_profit_trend, revenue, expenses, seed=sim_seed, company_name=company_name,
+                         revision=actuals_revision(company_name)[0])
     st.plotly_chart(fig3, use_container_width=True)
     
+    simulation = cash_simulation(cash_balance, revenue, expenses, 36, sim_paths, sim_seed)
+    st.plotly_chart(shared_figure(plot_cash_fan_chart, simulation), use_container_width=True)
+    
+    runway_p = {p: ("36+" if not np.isfinite(v) else f"{v:.0f}") for p, v in simulation["runway"].items()}
+    
+    # Recorded history, read from the pre-aggregated monthly and quarterly rollups
+    history = monthly_actuals(company_name, 24)
+    quarters = quarterly_actuals(company_name)
+    history_lines = []
+    if history["months"]:
+        recent = history["profit"][-3:]
+        history_lines.append(f"Average monthly profit over the last {len(recent)} recorded months: "
+                             f"**${recent.mean():,.0f}**")
+        if history["ttm_months"][-1] == TRAILING_MONTHS:
+            ttm_margin = (history["ttm_profit"][-1] / history["ttm_revenue"][-1] * 100
+                          if history["ttm_revenue"][-1] else 0.0)
+            history_lines.append(f"Trailing-12 profit: **${history['ttm_profit'][-1]:,.0f}** "
+                                 f"({ttm_margin:.1f}% margin)")
+        if np.isfinite(history["yoy_revenue"][-1]):
+            history_lines.append(f"Revenue in {history['months'][-1]} vs a year earlier: "
+                                 f"**{history['yoy_revenue'][-1]:+.1%}**")
+        complete = np.flatnonzero(quarters["months"] == 3)
+        if len(complete) >= 2:
+            latest, previous = complete[-1], complete[-2]
+            history_lines.append(f"{quarters['quarters'][latest]} profit: **${quarters['profit'][latest]:,.0f}** "
+                                 f"vs ${quarters['profit'][previous]:,.0f} in {quarters['quarters'][previous]}")
+        if history["ttm_months"][-1] == TRAILING_MONTHS:
+            year = slice(-TRAILING_MONTHS, None)
+            best, worst = np.argmax(history["profit"][year]), np.argmin(history["profit"][year])
+            history_lines.append(f"Seasonality: best month {history['months'][year][best]}, "
+                                 f"weakest {history['months'][year][worst]}")
+    else:
+        history_lines.append(f"Average monthly profit: **${profit:,.0f}** (no history recorded yet; each "
+                             "🔄 Update All Data records the month and bank imports fill in past months)")
+    
+    insights = history_lines + [
+        f"Profit margin target: **20%+** (currently {margin:.1f}%)",
+        f"Runway to zero (P5 / P50 / P95): **{runway_p[5]} / {runway_p[50]} / {runway_p[95]} months**",
+        f"Chance of running out of cash within 36 months: **{simulation['cash_out_probability']:.1%}**",
+    ]
     st.markdown("**💡 Insights:**")
-    st.markdown(f"""
-    - Average monthly profit: **${profit:,.0f}**
-    - Profit margin target: **20%+** (currently {profit_margin:.1f}%)
-    - Seasonality: Consider adjusting for business cycles
-    """)
+    st.markdown("\n".join(f"- {line}" for line in insights))
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab4:
+def render_runway_tab():
     st.markdown('<div class="graph-box">', unsafe_allow_html=True)
-    fig4 = plot_runway_analysis(cash_balance, expenses)
-    if fig4:
-        st.plotly_chart(fig4, use_container_width=True)
-        
+    rw_col1, rw_col2, rw_col3 = st.columns(3)
+    with rw_col1:
+        cut_range = st.slider("Expense cut (%)", 0, 90, key="sensitivity_cuts")
+    with rw_col2:
+        growth_range = st.slider("Monthly revenue growth (%)", -10.0, 20.0, step=0.5, key="sensitivity_growth")
+    with rw_col3:
+        resolution = st.select_slider("Grid size", options=[100, 250, 500, 1000], key="sensitivity_resolution")
+    metric = st.radio("Show", list(SENSITIVITY_METRICS), horizontal=True, key="sensitivity_metric")
+    expense_growth = st.session_state.expense_growth / 100
+    
+    fig4 = shared_figure(plot_runway_analysis, cash_balance, revenue, expenses, cut_range, growth_range,
+                         expense_growth, resolution, SENSITIVITY_METRICS[metric])
+    st.plotly_chart(fig4, use_container_width=True)
+    
+    grid = runway_sensitivity(cash_balance, revenue, expenses, cut_range, growth_range,
+                              expense_growth, resolution, SENSITIVITY_MONTHS)
+    safe = grid["months_to_zero"] > SAFETY_MONTHS
+    frontier = safety_frontier(grid, SAFETY_MONTHS)
+    # Growth closest to flat, and the smallest cut on the grid
+    base_col = int(np.abs(grid["revenue_growth"]).argmin())
+    base_growth = round(grid["revenue_growth"][base_col] * 100, 2) + 0.0  # no "-0.0%"
+    cut_needed = frontier[base_col]
+    cut_text = (f"At {base_growth:.1f}% monthly growth, a **{cut_needed * 100:.1f}%** expense cut keeps "
+                f"{SAFETY_MONTHS}+ months of cash" if np.isfinite(cut_needed)
+                else f"At {base_growth:.1f}% monthly growth, no cut up to {cut_range[1]}% keeps "
+                     f"{SAFETY_MONTHS} months of cash")
+    growth_text = (f"With a {cut_range[0]}% cut, **{grid['revenue_growth'][safe[0].argmax()] * 100:.2f}%** monthly "
+                   f"revenue growth keeps {SAFETY_MONTHS}+ months of cash" if safe[0].any()
+                   else f"With a {cut_range[0]}% cut, no growth up to {growth_range[1]}%/month keeps "
+                        f"{SAFETY_MONTHS} months of cash")
+    
+    st.markdown("**💡 Insights:**")
+    st.markdown(f"""
+    - {cut_text}
+    - {growth_text}
+    - **{safe.mean():.0%}** of the {safe.size:,} scenarios keep {SAFETY_MONTHS}+ months of cash
+    """)
+    
+    if expenses > 0:
         st.markdown("**💡 Recommendations:**")
         if runway < 3:
             st.error("**🚨 CRITICAL:** Runway below 3 months! Immediate action required.")
@@ -522,60 +538,192 @@ with tab4:
             st.markdown("3. Explore new opportunities")
     st.markdown('</div>', unsafe_allow_html=True)
 
+def calendar_events(today):
+    """The cash calendar schedule, rebuilt from the sidebar figures whenever those change"""
+    revenue_growth = st.session_state.revenue_growth / 100
+    expense_growth = st.session_state.expense_growth / 100
+    expense_data = metrics["category_spend"]
+    basis = (revenue, tuple(expense_data.items()), revenue_growth, expense_growth, str(today))
+    if st.session_state.get("calendar_basis") != basis:
+        st.session_state.calendar_basis = basis
+        st.session_state.calendar_events = default_events(revenue, expense_data, today,
+                                                          revenue_growth, expense_growth)
+    return st.session_state.calendar_events
+
+def render_cash_calendar_tab():
+    st.markdown('<div class="graph-box">', unsafe_allow_html=True)
+    today = datetime.now().date()
+    calendar_years = st.slider("Horizon (years)", 1, 10, key="calendar_years")
+    
+    # Amounts are positive for money in, negative for money out; growth is monthly
+    schedule = pd.DataFrame(calendar_events(today), columns=["name", "amount", "frequency", "start", "end", "growth"])
+    schedule["start"] = pd.to_datetime(schedule["start"]).dt.date
+    schedule["end"] = pd.to_datetime(schedule["end"]).dt.date
+    schedule["growth"] = schedule["growth"].fillna(0) * 100
+    with st.expander("🗓️ Recurring Events", expanded=False):
+        st.caption("Rebuilt from the sidebar figures when they change. Add one-off invoices with frequency \"once\".")
+        if trimmed := st.session_state.pop("calendar_trimmed", 0):
+            st.warning(f"This session ran past its memory budget, so the {trimmed:,} oldest events were dropped.")
+        edited = st.data_editor(schedule, num_rows="dynamic", hide_index=True, use_container_width=True,
+                                column_config={
+                                    "name": st.column_config.TextColumn("Event"),
+                                    "amount": st.column_config.NumberColumn("Amount ($)", format="%.2f"),
+                                    "frequency": st.column_config.SelectboxColumn("Frequency", options=FREQUENCIES),
+                                    "start": st.column_config.DateColumn("First Date"),
+                                    "end": st.column_config.DateColumn("Last Date"),
+                                    "growth": st.column_config.NumberColumn("Growth (%/month)", min_value=-99.0, format="%.2f"),
+                                })
+    events = [{"name": row["name"] or "", "amount": float(row["amount"]), "frequency": row["frequency"],
+               "start": str(row["start"]), "end": str(row["end"]) if pd.notna(row["end"]) else None,
+               "growth": float(row["growth"]) / 100 if pd.notna(row["growth"]) else 0.0}
+              for row in edited.to_dict("records")
+              if pd.notna(row["amount"]) and row["frequency"] in FREQUENCIES and pd.notna(row["start"])]
+    st.session_state.calendar_events = events
+    
+    fig5 = shared_figure(plot_cash_calendar, cash_balance, events, str(today), calendar_years)
+    st.plotly_chart(fig5, use_container_width=True)
+    
+    calendar = daily_cash_calendar(cash_balance, events, str(today), calendar_years)
+    min_date = datetime.strptime(calendar["min_date"], "%Y-%m-%d")
+    first_negative = calendar["first_negative_date"]
+    cash_out_text = (f"Cash first goes negative on **{datetime.strptime(first_negative, '%Y-%m-%d'):%a %d %b %Y}**"
+                     if first_negative else f"Cash stays positive every day for {calendar_years} years")
+    
+    st.markdown("**💡 Insights:**")
+    st.markdown(f"""
+    - Lowest balance: **${calendar["min_balance"]:,.0f}** on **{min_date:%a %d %b %Y}**
+    - {cash_out_text}
+    - Balance after {calendar_years} years: **${calendar["ending_balance"]:,.0f}**
+    - {len(events)} scheduled events over {calendar["days"]:,} days
+    """)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+GRAPH_TABS = {
+    "Cash Flow Forecast": render_cash_flow_tab,
+    "Expense Breakdown": render_expense_tab,
+    "Profit Trend": render_profit_trend_tab,
+    "Runway Analysis": render_runway_tab,
+    "Cash Calendar": render_cash_calendar_tab,
+}
+active_tab = st.radio("Graph", list(GRAPH_TABS), horizontal=True, key="graph_tab", label_visibility="collapsed")
+with span(f"tab: {active_tab}"):
+    GRAPH_TABS[active_tab]()
+
 # ========== CHAT INTERFACE ==========
 st.markdown("---")
 st.markdown("### 💬 AI CFO Assistant")
 
-# Display chat
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+# Display chat: only the latest pages are read from the store
+session_id = st.session_state.session_id
+message_count = count_messages(session_id)
+shown = min(message_count, CHAT_PAGE_SIZE * st.session_state.history_pages)
+if shown < message_count:
+    history_cols = st.columns([3, 1])
+    history_cols[0].caption(f"Showing the latest {shown:,} of {message_count:,} messages")
+    if history_cols[1].button("⬆️ Load older messages", use_container_width=True):
+        st.session_state.history_pages += 1
+        rerun()
+
+with span("chat history"):
+    for message in recent_messages(session_id, limit=shown):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+def answer_prompt(prompt, prompt_id):
+    """The assistant's answer, with the conversation before prompt_id packed into the prompt budget"""
+    context = assistant_context(prompt, st.session_state.financial_data, session_id, before_id=prompt_id)
+    st.session_state.context_tokens = {**context["tokens"], "verbatim": context["verbatim"],
+                                       "summarized": context["summarized"]}
+    return ask_cfo_assistant(prompt, st.session_state.financial_data, context)
 
 # Chat input
 if prompt := st.chat_input("💭 Ask your AI CFO about financial strategies, analysis, or report generation..."):
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    prompt_id = append_message(session_id, "user", prompt)
     
     with st.chat_message("user"):
         st.markdown(prompt)
     
     with st.chat_message("assistant"):
         with st.spinner("🔍 Analyzing your finances..."):
-            response = ask_cfo_assistant(prompt, st.session_state.financial_data)
+            response = answer_prompt(prompt, prompt_id)
             st.markdown(response)
-            st.session_state.messages.append({"role": "assistant", "content": response})
+            append_message(session_id, "assistant", response)
 
 # ========== QUICK ACTIONS ==========
 st.markdown("---")
 st.markdown("### 🚀 Quick Actions")
 
+def quick_action(prompt):
+    """Post a canned question and its answer; arithmetic ones are answered locally"""
+    prompt_id = append_message(session_id, "user", prompt)
+    with st.spinner("🔍 Analyzing your finances..."):
+        append_message(session_id, "assistant", answer_prompt(prompt, prompt_id))
+    rerun()
+
 action_cols = st.columns(4)
 with action_cols[0]:
     if st.button("📊 Full Analysis", use_container_width=True):
-        st.session_state.messages.append({
-            "role": "user", 
-            "content": "Provide a comprehensive financial analysis with recommendations"
-        })
-        st.rerun()
+        quick_action("Provide a comprehensive financial analysis with recommendations")
 
 with action_cols[1]:
     if st.button("💰 Optimize Expenses", use_container_width=True):
-        st.session_state.messages.append({
-            "role": "user", 
-            "content": f"Suggest ways to optimize my ${expenses:,.0f} in monthly expenses"
-        })
-        st.rerun()
+        quick_action(f"Suggest ways to optimize my ${expenses:,.0f} in monthly expenses")
 
 with action_cols[2]:
     if st.button("📈 Growth Plan", use_container_width=True):
-        st.session_state.messages.append({
-            "role": "user", 
-            "content": f"Create a 6-month growth plan for ${revenue:,.0f} revenue business"
-        })
-        st.rerun()
+        quick_action(f"Create a 6-month growth plan for ${revenue:,.0f} revenue business")
 
 with action_cols[3]:
     if st.button("🔄 Update Graphs", use_container_width=True):
-        st.rerun()
+        rerun()
+
+# ========== CONVERSATION SEARCH ==========
+# Visitors only search their own session; searching every session is left to the chat_store CLI
+with st.sidebar.expander("🔎 Search Conversation"):
+    query = st.text_input("Search past messages", key="history_query")
+    if query:
+        hits = search_messages(query, session_id=session_id)
+        if not hits:
+            st.caption("No matching messages")
+        for hit in hits:
+            st.markdown(f"**{hit['role'].title()}** · {datetime.fromtimestamp(hit['created_at']):%Y-%m-%d %H:%M}")
+            st.caption(hit["snippet"])
+
+# ========== CACHE STATS ==========
+with st.sidebar.expander("⚡ Cache Stats"):
+    stats = cache_stats()
+    total_hits = sum(c["hits"] for c in stats.values())
+    total_lookups = total_hits + sum(c["misses"] for c in stats.values())
+    st.caption(f"{total_hits:,} hits / {total_lookups:,} lookups"
+               + (f" ({total_hits / total_lookups:.0%})" if total_lookups else ""))
+    st.dataframe(
+        pd.DataFrame.from_dict(stats, orient="index").rename(index=lambda name: name.rsplit(".", 1)[-1]),
+        use_container_width=True
+    )
+    report_stats = report_cache_stats()
+    st.caption(f"📁 {report_stats['reports']} cached reports ({report_stats['bytes'] / 1e6:.1f} MB)")
+    job_stats = report_queue.stats()
+    st.caption(f"🧾 Report jobs: {job_stats['running']} running, {job_stats['queued']} queued, "
+               f"{job_stats['deduplicated']} deduplicated")
+    store_stats = get_store().stats()
+    st.caption(f"🧩 Shared dashboards: {store_stats['entries']} ({store_stats['bytes'] / 1e6:.1f} MB), "
+               f"{store_stats['hits']:,} hits ({store_stats['hit_rate']:.0%}), {store_stats['builds']} built")
+    if "session_bytes" in st.session_state:
+        st.caption(f"🧠 This session: {st.session_state.session_bytes / 1e3:,.0f} KB of "
+                   f"{SESSION_MEMORY_BYTES / 1e6:.0f} MB")
+    answer_stats = response_cache_stats()
+    st.caption(f"🧮 {answer_stats['local_answers']} questions answered locally")
+    context_tokens = st.session_state.get("context_tokens")
+    if context_tokens:
+        st.caption(f"🧾 Last prompt: {context_tokens['total']:,} tokens ({context_tokens['history']:,} for "
+                   f"{context_tokens['verbatim']} recent messages, {context_tokens['summary']:,} summarizing "
+                   f"{context_tokens['summarized']} earlier, {context_tokens['financials']:,} for the figures)")
+    if backend_configured():
+        st.caption(f"💬 Answer cache: {answer_stats['hits']} hits ({answer_stats['hit_rate']:.0%}), "
+                   f"{answer_stats['saved_seconds']:.1f}s saved")
+        llm_stats = get_client().stats()
+        st.caption(f"🤖 Model backend: {llm_stats['calls']} calls, {llm_stats['failures']} failures, "
+                   f"{llm_stats['retries']} retries, breaker {llm_stats['breaker']}")
 
 # ========== FOOTER ==========
 st.markdown("---")
@@ -589,3 +737,37 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+# ========== PERFORMANCE PANEL ==========
+finish_tracing()
+# What a session accumulates is kept under its budget, dropping the oldest rerun timings, then calendar events
+calendar_rows = len(st.session_state.get("calendar_events") or ())
+session_sizes = enforce_session_budget(st.session_state, trimmable=("perf_history", "calendar_events"),
+                                       counted=("calendar_basis", "context_tokens"))
+st.session_state.session_bytes = sum(session_sizes.values())
+if len(st.session_state.get("calendar_events") or ()) < calendar_rows:
+    st.session_state.calendar_trimmed = calendar_rows - len(st.session_state.calendar_events)
+
+if st.sidebar.checkbox("⏱️ Performance panel", key="perf_panel"):
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        history = st.session_state.get("perf_history", [])
+        if not history:
+            st.caption("Timing starts with the next rerun")
+        else:
+            latest = history[-1]
+            st.caption(f"Rerun {latest['rerun']}: {latest['total_ms']:,.0f} ms")
+            st.dataframe(pd.DataFrame([
+                {"rerun": r["rerun"], "total": r["total_ms"],
+                 **{s["name"]: s["ms"] for s in r["spans"] if s["depth"] == 0}}
+                for r in reversed(history[-10:])
+            ]).set_index("rerun").round(1), use_container_width=True)
+            st.caption(f"p50 / p95 over the last {len(history)} reruns (ms)")
+            st.dataframe(pd.DataFrame(span_percentiles(history)).set_index("span").round(1),
+                         use_container_width=True)
+        st.caption(f"Traces: {TRACE_DIR} · sampling {TRACE_SAMPLE_RATE:.0%} of other reruns")
+
+# ========== REPORT JOB POLLING ==========
+# While this session's report builds, rerun shortly so the progress bar and download button update
+if report_job is not None and report_job.active:
+    time.sleep(REPORT_POLL_SECONDS)
+    rerun()
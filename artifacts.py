@@ -0,0 +1,89 @@
+import os
+import threading
+
+from cache import stable_hash
+from config import DATA_DIR
+
+REPORT_DIR = os.path.join(DATA_DIR, "reports")
+MAX_REPORT_CACHE_BYTES = int(os.environ.get("UXXCA_REPORT_CACHE_MB", "512")) * 1024 * 1024
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Striped locks so concurrent requests for the same report build it once
+_BUILD_LOCKS = [threading.Lock() for _ in range(64)]
+
+# ========== REPORT ARTIFACT CACHE ==========
+def report_key(*parts):
+    """Content hash identifying one report build"""
+    return stable_hash("report-v1", *parts)
+
+def report_path(key):
+    return os.path.join(REPORT_DIR, f"{key}.xlsx")
+
+def cached_report(key):
+    """Path of a finished report, marking it recently used, or None"""
+    if not key:
+        return None
+    path = report_path(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+def build_report(key, build):
+    """Return the report for key, calling build(path) only on a cache miss
+
+    The build writes to a temp file that is renamed into place, so readers
+    never see a partial workbook, even across server processes.
+    """
+    path = cached_report(key)
+    if path:
+        return path
+    with _BUILD_LOCKS[int(key[:8], 16) % len(_BUILD_LOCKS)]:
+        path = cached_report(key)
+        if path:
+            return path
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        path = report_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            build(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    evict_reports(keep=path)
+    return path
+
+def _report_files():
+    try:
+        names = [name for name in os.listdir(REPORT_DIR) if name.endswith(".xlsx")]
+    except FileNotFoundError:
+        return []
+    files = []
+    for name in names:
+        try:
+            stat = os.stat(os.path.join(REPORT_DIR, name))
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, os.path.join(REPORT_DIR, name)))
+    return sorted(files)
+
+def evict_reports(max_bytes=MAX_REPORT_CACHE_BYTES, keep=None):
+    """Delete least recently used reports until the cache fits in max_bytes"""
+    files = _report_files()
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def report_cache_stats():
+    files = _report_files()
+    return {"reports": len(files), "bytes": sum(size for _, size, _ in files)}
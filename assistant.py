@@ -0,0 +1,101 @@
+import re
+import threading
+import time
+
+from cache import LRUCache, stable_hash
+from conversation import build_context
+from intents import answer_locally
+from tracing import traced
+from llm_client import LLMError, get_client, backend_configured
+from metrics import format_runway, metrics_snapshot
+
+# Fields of financial_data an answer depends on
+CONTEXT_FIELDS = ("company_name", "revenue", "expenses", "cash_balance", "expense_breakdown")
+
+# ========== RESPONSE CACHE ==========
+_responses = LRUCache(max_entries=1024, ttl=3600)
+_saved_seconds = 0.0
+_local_answers = 0
+_saved_lock = threading.Lock()
+
+def normalize_prompt(question):
+    """Fold case, punctuation and whitespace so trivially different prompts share an answer"""
+    return " ".join(re.sub(r"[^\w\s]", "", question.lower()).split())
+
+def response_cache_key(question, financial_context=None, history_key=None):
+    context = {field: (financial_context or {}).get(field) for field in CONTEXT_FIELDS}
+    return stable_hash(normalize_prompt(question), context, history_key)
+
+def response_cache_stats():
+    """Hit rate and upstream latency saved by the response cache and local answers"""
+    return {**_responses.stats(), "saved_seconds": _saved_seconds, "local_answers": _local_answers}
+
+# ========== CFO ASSISTANT ==========
+CFO_SYSTEM_PROMPT = (
+    "You are UXXCA, an AI CFO assistant for small businesses. "
+    "Give concise, practical answers with concrete numbers where possible."
+)
+
+def template_analysis(financial_context=None):
+    """Canned analysis used when no model backend is available"""
+    if financial_context:
+        metrics = metrics_snapshot(financial_context)
+        return f"""
+**Analysis of your financial situation:**
+
+**Current Metrics:**
+- Monthly Revenue: ${metrics['revenue']:,.2f}
+- Monthly Expenses: ${metrics['expenses']:,.2f}
+- Monthly Profit: ${metrics['monthly_profit']:,.2f}
+- Profit Margin: {metrics['profit_margin']:.1f}%
+- Cash Runway: {format_runway(metrics['runway_months'])}
+
+**Recommendations:**
+1. Focus on increasing your profit margin by optimizing expenses
+2. Maintain at least 6 months of cash runway for safety
+3. Consider reinvesting profits into growth opportunities
+
+**Next Steps:**
+Generate detailed reports using the spreadsheet feature below, or explore interactive graphs to visualize your financial health.
+"""
+    return "I'm here to help with your financial analysis. Please provide your financial data in the sidebar."
+
+def assistant_context(question, financial_context=None, session_id=None, before_id=None):
+    """Token-budgeted model messages for a question, with the session's turns before before_id"""
+    return build_context(CFO_SYSTEM_PROMPT, question, financial_context, session_id, before_id)
+
+@traced()
+def ask_cfo_assistant(question, financial_context=None, context=None):
+    """Enhanced CFO AI Assistant
+
+    Arithmetic questions (runway, break-even, expense and growth scenarios)
+    are answered locally from the dashboard metrics; only open-ended
+    questions go to the model backend, with context from assistant_context
+    (the question and figures alone when it is not given).
+    """
+    global _saved_seconds, _local_answers
+    local_answer = answer_locally(question, financial_context)
+    if local_answer is not None:
+        with _saved_lock:
+            _local_answers += 1
+        return local_answer
+    if not backend_configured():
+        return template_analysis(financial_context)
+
+    if context is None:
+        context = assistant_context(question, financial_context)
+    key = response_cache_key(question, financial_context, context["history_key"])
+    cached = _responses.get(key)
+    if cached is not None:
+        answer, latency = cached
+        with _saved_lock:
+            _saved_seconds += latency
+        return answer
+
+    started = time.perf_counter()
+    try:
+        answer = get_client().chat(context["messages"])
+    except LLMError as e:
+        return f"⚠️ The AI backend is unavailable right now ({e}). Here's a quick read of your numbers:\n" + template_analysis(financial_context)
+    _responses.set(key, (answer, time.perf_counter() - started))
+    return answer
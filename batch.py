@@ -0,0 +1,186 @@
+import argparse
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from core import company_metrics, company_report
+from metrics import DEFAULT_EXPENSE_SPLIT, format_runway
+
+REQUIRED_COLUMNS = ("company_name", "revenue", "expenses", "cash_balance")
+READ_CHUNK_ROWS = 10_000
+
+# ========== INPUT ==========
+def read_companies(path):
+    """Yield one dict per company from a CSV, JSON Lines, JSON or Excel file
+
+    Columns: company_name, revenue, expenses, cash_balance, and optionally
+    forecast_months, revenue_growth, expense_growth (monthly, as decimals)
+    and per-category spend (marketing, salaries, operations, software, other).
+    CSV and JSON Lines files are read in chunks.
+    """
+    lower = path.lower()
+    if lower.endswith((".csv", ".txt")):
+        chunks = pd.read_csv(path, chunksize=READ_CHUNK_ROWS)
+    elif lower.endswith((".jsonl", ".ndjson")):
+        chunks = pd.read_json(path, lines=True, chunksize=READ_CHUNK_ROWS)
+    elif lower.endswith(".json"):
+        chunks = [pd.read_json(path)]
+    elif lower.endswith((".xlsx", ".xls")):
+        chunks = [pd.read_excel(path)]
+    else:
+        raise ValueError(f"Unsupported companies file: {path}")
+    for chunk in chunks:
+        chunk.columns = [str(c).strip().lower() for c in chunk.columns]
+        missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Companies file is missing columns: {', '.join(missing)}")
+        for row in chunk.to_dict("records"):
+            yield {key: value for key, value in row.items() if not pd.isna(value)}
+
+def _company_inputs(row):
+    """financial_data in the app's shape, plus forecast parameters"""
+    financial_data = {
+        "company_name": str(row["company_name"]),
+        "revenue": float(row["revenue"]),
+        "expenses": float(row["expenses"]),
+        "cash_balance": float(row["cash_balance"]),
+    }
+    breakdown = {category: float(row[category.lower()]) for category in DEFAULT_EXPENSE_SPLIT
+                 if category.lower() in row}
+    if breakdown:
+        financial_data["expense_breakdown"] = breakdown
+    params = {
+        "forecast_months": int(row.get("forecast_months", 12)),
+        "revenue_growth": float(row.get("revenue_growth", 0.0)),
+        "expense_growth": float(row.get("expense_growth", 0.0)),
+    }
+    return financial_data, params
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "company"
+
+# ========== WORKERS ==========
+def run_company(index, row, report_dir=None, n_paths=10_000, with_ledger=False):
+    """Metrics and (optionally) workbook for one company; errors are reported, not raised"""
+    started = time.perf_counter()
+    result = {"index": index, "company_name": str(row.get("company_name", ""))}
+    try:
+        financial_data, params = _company_inputs(row)
+        result.update(company_metrics(financial_data, n_paths=n_paths, **params))
+        if report_dir:
+            path = os.path.join(report_dir, f"{index:06d}-{_slug(financial_data['company_name'])}.xlsx")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                company_report(tmp_path, financial_data,
+                               ledger_company=financial_data["company_name"] if with_ledger else None, **params)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            result["report"] = path
+        result["status"] = "ok"
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+def _run_chunk(items, report_dir, n_paths, with_ledger):
+    return [run_company(index, row, report_dir, n_paths, with_ledger) for index, row in items]
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# ========== BATCH RUN ==========
+def run_batch(companies_path, out_dir, workers=None, chunk_size=8, reports=True, n_paths=10_000,
+              with_ledger=False, progress=None):
+    """Compute every company in companies_path over a process pool
+
+    Companies are sent to workers in small chunks with a bounded number in
+    flight, so memory stays flat however long the file is. Each finished
+    chunk is appended to out_dir/results.jsonl straight away; workbooks go
+    to out_dir/reports. Returns the per-company results.
+    """
+    workers = workers or os.cpu_count() or 1
+    report_dir = os.path.join(out_dir, "reports") if reports else None
+    os.makedirs(report_dir or out_dir, exist_ok=True)
+    results = []
+    pending = set()
+    chunks = _chunks(enumerate(read_companies(companies_path)), chunk_size)
+
+    with open(os.path.join(out_dir, "results.jsonl"), "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        def collect(done):
+            for future in done:
+                for result in future.result():
+                    # Never-runs-out months are inf; JSON has no infinity, so they are written as null
+                    out.write(json.dumps({key: None if isinstance(value, float) and not math.isfinite(value) else value
+                                          for key, value in result.items()}) + "\n")
+                    results.append(result)
+            out.flush()
+            if progress:
+                progress(len(results))
+
+        for chunk in chunks:
+            pending.add(pool.submit(_run_chunk, chunk, report_dir, n_paths, with_ledger))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    return results
+
+def summary_table(results, elapsed=None, top=10):
+    """Printable portfolio summary: throughput, health buckets and the earliest cash-outs"""
+    df = pd.DataFrame(results)
+    ok = df[df["status"] == "ok"] if "status" in df else df.iloc[0:0]
+    lines = [f"Companies: {len(df):,} ({len(ok):,} ok, {len(df) - len(ok):,} failed)"]
+    if elapsed:
+        lines.append(f"Elapsed: {elapsed:.1f}s ({len(df) / elapsed:,.1f} companies/s)")
+    if not ok.empty:
+        runway = ok["runway_months"]
+        lines += [
+            f"Total monthly revenue: ${ok['revenue'].sum():,.0f}, expenses: ${ok['expenses'].sum():,.0f}",
+            f"Median runway: {format_runway(runway.median())}, "
+            f"under 3 months: {(runway < 3).sum():,}, under 6 months: {(runway < 6).sum():,}",
+            f"Unprofitable: {(ok['profit'] < 0).sum():,}",
+            "",
+            "Earliest cash-outs:",
+        ]
+        columns = [c for c in ("company_name", "revenue", "expenses", "cash_balance", "runway_months",
+                               "months_to_zero", "cash_out_probability") if c in ok]
+        lines.append(ok.sort_values(["months_to_zero", "runway_months"]).head(top)[columns].to_string(index=False, float_format="{:,.1f}".format))
+    failed = df[df["status"] != "ok"] if "status" in df else df.iloc[0:0]
+    if not failed.empty:
+        lines += ["", "Failures:", failed[["index", "company_name", "error"]].head(top).to_string(index=False)]
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute dashboard metrics and reports for many companies")
+    parser.add_argument("companies", help="CSV, JSON Lines, JSON or Excel file with one company per row")
+    parser.add_argument("--out", default="batch_output", help="output directory")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=8, help="companies per worker task")
+    parser.add_argument("--paths", type=int, default=10_000, help="Monte Carlo paths per company, 0 to skip")
+    parser.add_argument("--no-reports", action="store_true", help="skip the Excel workbooks")
+    parser.add_argument("--with-ledger", action="store_true", help="include each company's stored ledger")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = run_batch(args.companies, args.out, workers=args.workers, chunk_size=args.chunk_size,
+                        reports=not args.no_reports, n_paths=args.paths, with_ledger=args.with_ledger,
+                        progress=lambda n: print(f"\r{n:,} companies done", end="", flush=True))
+    print()
+    print(summary_table(results, time.perf_counter() - started))
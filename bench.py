@@ -0,0 +1,321 @@
+"""Benchmarks for the forecast, chart, report and chat hot paths
+
+    python bench.py run --out before.json
+    python bench.py run --out after.json
+    python bench.py compare before.json after.json --threshold 0.10
+
+Runs offline: data goes to a temporary directory and the assistant talks
+to the local stub backend. Memoized functions are timed uncached.
+"""
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DEFAULT_THRESHOLD = 0.10
+
+# Input sizes per benchmark; "full" adds the slow end of each range
+SIZES = {
+    "quick": {
+        "forecast_scenarios": (1, 10_000),
+        "forecast_months": (12, 120),
+        "simulation_paths": (10_000, 100_000),
+        "chart_months": (12, 60, 120),
+        "trend_paths": (1_000, 10_000),
+        "breakdown_categories": (5, 50),
+        "transaction_rows": (0, 10_000),
+        "categorize_rows": (100_000, 1_000_000),
+        "actuals_months": (24, 240),
+        "conversation_messages": (10, 10_000),
+        "calendar_years": (5, 10),
+        "sensitivity_resolution": (100, 500),
+    },
+    "full": {
+        "forecast_scenarios": (1, 10_000, 1_000_000),
+        "forecast_months": (12, 120),
+        "simulation_paths": (10_000, 100_000, 1_000_000),
+        "chart_months": (12, 60, 120),
+        "trend_paths": (1_000, 10_000, 100_000),
+        "breakdown_categories": (5, 50, 500),
+        "transaction_rows": (0, 10_000, 100_000),
+        "categorize_rows": (100_000, 1_000_000, 10_000_000),
+        "actuals_months": (24, 240, 1200),
+        "conversation_messages": (10, 10_000, 100_000),
+        "calendar_years": (5, 10),
+        "sensitivity_resolution": (100, 500, 1000),
+    },
+}
+
+BASE = {"revenue": 15000.0, "expenses": 12000.0, "cash_balance": 50000.0, "company_name": "Bench Co"}
+
+# ========== TIMING ==========
+def measure(fn, min_time=0.5, min_repeats=3, max_repeats=200):
+    """Call fn once to warm up, then repeatedly until min_time has elapsed; times in seconds"""
+    fn()
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_repeats and (len(times) < min_repeats or time.perf_counter() - started < min_time):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    times.sort()
+    return {
+        "repeats": len(times),
+        "min": times[0],
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "p95": times[min(len(times) - 1, int(len(times) * 0.95))],
+    }
+
+# ========== CASES ==========
+def _transactions(rows, seed=0):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    categories = np.array(["Revenue", "Payroll", "Rent", "Software", "Marketing", "Travel"])
+    category = categories[rng.integers(0, len(categories), rows)]
+    return pd.DataFrame({
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, rows), unit="D"),
+        "description": np.char.add("Vendor ", rng.integers(0, 500, rows).astype(str)),
+        "category": category,
+        "amount": np.where(category == "Revenue", 1, -1) * rng.uniform(10, 5000, rows).round(2),
+    })
+
+def build_cases(sizes):
+    """(name, callable) pairs; project modules are imported here, after the environment is set"""
+    import numpy as np
+    import pyarrow as pa
+
+    from actuals import month_label, monthly_actuals, record_month
+    from artifacts import build_report, cached_report, report_key
+    from assistant import ask_cfo_assistant, assistant_context
+    from cache import clear_caches
+    from chat_store import append_message
+    from cash_calendar import calendar_balances, default_events
+    from categorize import Categorizer
+    from charts import (plot_cash_calendar, plot_cash_flow_forecast, plot_expense_breakdown, plot_profit_trend,
+                        plot_runway_analysis)
+    from dashboards import get_store, warm_defaults
+    from forecast import forecast_paths, sensitivity_grid
+    from reports import create_financial_spreadsheet
+    from simulation import simulate_cash_paths
+
+    cases = []
+    for scenarios, months in itertools.product(sizes["forecast_scenarios"], sizes["forecast_months"]):
+        revenue = [BASE["revenue"]] * scenarios
+        cases.append((f"forecast_paths[scenarios={scenarios},months={months}]",
+                      lambda r=revenue, m=months: forecast_paths(BASE["cash_balance"], r, BASE["expenses"], m,
+                                                                 0.02, 0.01)))
+    for paths in sizes["simulation_paths"]:
+        cases.append((f"simulate_cash_paths[paths={paths}]",
+                      lambda p=paths: simulate_cash_paths(BASE["cash_balance"], BASE["revenue"], BASE["expenses"],
+                                                          months=36, n_paths=p)))
+
+    # Chart functions are unwrapped past @traced and @memoize, so they are timed uncached
+    for months in sizes["chart_months"]:
+        cases.append((f"plot_cash_flow_forecast[months={months}]",
+                      lambda m=months: inspect.unwrap(plot_cash_flow_forecast)(
+                          BASE["revenue"], BASE["expenses"], BASE["cash_balance"], m, 0.02, 0.01)))
+    for paths in sizes["trend_paths"]:
+        cases.append((f"plot_profit_trend[paths={paths}]",
+                      lambda p=paths: inspect.unwrap(plot_profit_trend)(BASE["revenue"], BASE["expenses"], n_paths=p)))
+    # History queries read the rollups, so they should stay flat as the stored months grow
+    for months in sizes["actuals_months"]:
+        company = f"Bench Co {months}"
+        for month in range(2000 * 12, 2000 * 12 + months):
+            record_month(company, month_label(month), BASE["revenue"] + month % 12 * 100, BASE["expenses"])
+        cases.append((f"monthly_actuals[months={months}]", lambda c=company: monthly_actuals(c)))
+        cases.append((f"plot_profit_trend[history={months}]",
+                      lambda c=company: inspect.unwrap(plot_profit_trend)(BASE["revenue"], BASE["expenses"],
+                                                                          n_paths=1_000, company_name=c)))
+    # plot_runway_analysis reads the grid from core's memoized runway_sensitivity, so its cases time the
+    # figure alone; sensitivity_grid times the computation
+    for resolution in sizes["sensitivity_resolution"]:
+        cuts, growth = np.linspace(0, 0.5, resolution), np.linspace(-0.02, 0.1, resolution)
+        cases.append((f"sensitivity_grid[{resolution}x{resolution}]",
+                      lambda c=cuts, g=growth: sensitivity_grid(BASE["cash_balance"], BASE["revenue"],
+                                                                BASE["expenses"], c, g, 0.01)))
+        cases.append((f"plot_runway_analysis[{resolution}x{resolution}]",
+                      lambda r=resolution: inspect.unwrap(plot_runway_analysis)(
+                          BASE["cash_balance"], BASE["revenue"], BASE["expenses"], resolution=r)))
+    for count in sizes["breakdown_categories"]:
+        breakdown = {f"Category {i}": 100.0 + i for i in range(count)}
+        cases.append((f"plot_expense_breakdown[categories={count}]",
+                      lambda b=breakdown: inspect.unwrap(plot_expense_breakdown)(b)))
+    events = default_events(BASE["revenue"], {"Salaries": 6000.0, "Software": 1200.0, "Other": 4800.0},
+                            "2025-01-01", 0.02, 0.01)
+    for years in sizes["calendar_years"]:
+        cases.append((f"calendar_balances[years={years}]",
+                      lambda y=years: calendar_balances(BASE["cash_balance"], events, "2025-01-01", y)))
+        cases.append((f"plot_cash_calendar[years={years}]",
+                      lambda y=years: inspect.unwrap(plot_cash_calendar)(BASE["cash_balance"], events, "2025-01-01", y)))
+
+    # A fresh categorizer per call, so every distinct merchant is scanned as on first import
+    for rows in sizes["categorize_rows"]:
+        descriptions = pa.array(_transactions(rows)["description"].to_numpy())
+        cases.append((f"categorize[rows={rows}]", lambda d=descriptions: Categorizer().categorize(d)))
+
+    # Report generation, then the download path: artifact cache miss, build, read back
+    builds = itertools.count()
+    for rows in sizes["transaction_rows"]:
+        transactions = _transactions(rows) if rows else None
+
+        def build_and_download(transactions=transactions, rows=rows):
+            key = report_key("bench", rows, next(builds))
+            path = build_report(key, lambda out: create_financial_spreadsheet(BASE, transactions, output=out))
+            with open(path, "rb") as f:
+                data = f.read()
+            os.remove(path)
+            return data
+
+        cases.append((f"create_financial_spreadsheet+download[rows={rows}]", build_and_download))
+
+    hit_key = report_key("bench", "cached")
+    build_report(hit_key, lambda out: create_financial_spreadsheet(BASE, output=out))
+
+    def cached_download():
+        with open(cached_report(hit_key), "rb") as f:
+            return f.read()
+
+    cases.append(("report_download[cached]", cached_download))
+
+    # Assistant: local intent answer, a model round trip to the stub, and a response cache hit
+    questions = itertools.count()
+    cases += [
+        ("ask_cfo_assistant[local]", lambda: ask_cfo_assistant("What's my runway if I cut marketing 20%?", BASE)),
+        ("ask_cfo_assistant[model]",
+         lambda: ask_cfo_assistant(f"Tell me something about pricing strategy #{next(questions)}", BASE)),
+        ("ask_cfo_assistant[cached]", lambda: ask_cfo_assistant("Tell me something about pricing strategy", BASE)),
+    ]
+    # Context building should cost the same however long the conversation; each call adds one turn
+    for count in sizes["conversation_messages"]:
+        session = f"bench-{count}"
+        for i in range(count):
+            append_message(session, "user" if i % 2 == 0 else "assistant", f"Message {i} about runway and pricing. " * 8)
+
+        def next_turn(session=session):
+            prompt_id = append_message(session, "user", "How should I plan hiring this quarter?")
+            context = assistant_context("How should I plan hiring this quarter?", BASE, session, before_id=prompt_id)
+            append_message(session, "assistant", "Hire against signed revenue. " * 20)
+            return context
+
+        cases.append((f"assistant_context[messages={count}]", next_turn))
+
+    # A session's first paint with the default inputs, built from scratch and read from the shared store
+    def cold_defaults():
+        get_store().clear()
+        clear_caches()
+        return warm_defaults()
+
+    cases += [("default_dashboard[cold]", cold_defaults), ("default_dashboard[shared]", warm_defaults)]
+    return cases
+
+# ========== RUN / COMPARE ==========
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run(size="quick", pattern=None, min_time=0.5, stub_latency=0.0):
+    """Run every case (or those whose name contains pattern) and return the results document"""
+    data_dir = tempfile.mkdtemp(prefix="uxxca-bench-")
+    os.environ["UXXCA_DATA_DIR"] = data_dir
+    from stub_llm_server import start_stub_server
+
+    server, url = start_stub_server(latency=stub_latency)
+    os.environ["UXXCA_LLM_URL"] = url
+    # Empty rather than unset, so load_dotenv cannot fill in a real key from .env
+    os.environ["UXXCA_LLM_API_KEY"] = os.environ["PERPLEXITY_API_KEY"] = ""
+
+    import numpy as np
+
+    results = {}
+    try:
+        for name, fn in build_cases(SIZES[size]):
+            if pattern and pattern not in name:
+                continue
+            results[name] = measure(fn, min_time=min_time)
+            print(f"{name:<60} {results[name]['median'] * 1000:10.2f} ms  (n={results[name]['repeats']})",
+                  flush=True)
+    finally:
+        server.shutdown()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "size": size,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+def compare(base, new, threshold=DEFAULT_THRESHOLD):
+    """Rows of (name, base median, new median, ratio, status) for cases in both runs"""
+    rows = []
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        before, after = base["results"].get(name), new["results"].get(name)
+        if before is None or after is None:
+            rows.append((name, before and before["median"], after and after["median"], None,
+                         "added" if before is None else "removed"))
+            continue
+        ratio = after["median"] / before["median"] if before["median"] else float("inf")
+        status = "REGRESSION" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "ok"
+        rows.append((name, before["median"], after["median"], ratio, status))
+    return rows
+
+def _print_comparison(rows):
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.2f}"
+
+    print(f"{'case':<60} {'base ms':>10} {'new ms':>10} {'ratio':>7}  status")
+    for name, before, after, ratio, status in rows:
+        print(f"{name:<60} {ms(before):>10} {ms(after):>10} {'-' if ratio is None else f'{ratio:.2f}x':>7}  {status}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_cmd = commands.add_parser("run", help="run the benchmarks and save the results as JSON")
+    run_cmd.add_argument("--out", default="bench_results.json")
+    run_cmd.add_argument("--size", choices=sorted(SIZES), default="quick")
+    run_cmd.add_argument("--filter", help="only cases whose name contains this text")
+    run_cmd.add_argument("--min-time", type=float, default=0.5, help="seconds of repeats per case")
+    run_cmd.add_argument("--stub-latency", type=float, default=0.0, help="simulated model latency in seconds")
+    compare_cmd = commands.add_parser("compare", help="flag regressions between two result files")
+    compare_cmd.add_argument("base")
+    compare_cmd.add_argument("new")
+    compare_cmd.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                             help="allowed slowdown of the median, as a fraction")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        document = run(args.size, args.filter, args.min_time, args.stub_latency)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+        print(f"Saved {len(document['results'])} results to {args.out}")
+    else:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        rows = compare(base, new, args.threshold)
+        _print_comparison(rows)
+        regressions = [row for row in rows if row[4] == "REGRESSION"]
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,152 @@
+import hashlib
+import pickle
+import threading
+import time
+import types
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+
+_MISSING = object()
+
+# ========== LRU + TTL CACHE ==========
+class LRUCache:
+    """Thread-safe LRU cache with optional TTL and hit/miss counters"""
+
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+# ========== STABLE HASHING ==========
+def _feed(h, obj):
+    """Feed a canonical encoding of obj into hasher h"""
+    if obj is None or isinstance(obj, (bool, int, float, complex, str)):
+        h.update(f"{type(obj).__name__}:{obj!r};".encode())
+    elif isinstance(obj, bytes):
+        h.update(b"bytes:%d;" % len(obj))
+        h.update(obj)
+    elif isinstance(obj, np.generic):
+        _feed(h, obj.item())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"ndarray:{obj.dtype.str}:{obj.shape};".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (dict, types.MappingProxyType)):
+        h.update(b"dict:%d;" % len(obj))
+        for key_hash, key in sorted((stable_hash(key), key) for key in obj):
+            h.update(key_hash.encode())
+            _feed(h, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}:{len(obj)};".encode())
+        for item in obj:
+            _feed(h, item)
+    elif isinstance(obj, types.CodeType):
+        h.update(obj.co_code)
+        _feed(h, obj.co_consts)
+    elif isinstance(obj, (set, frozenset)):
+        h.update(b"set:%d;" % len(obj))
+        for item_hash in sorted(stable_hash(item) for item in obj):
+            h.update(item_hash.encode())
+    elif type(obj).__module__.startswith("pandas"):
+        import pandas as pd
+
+        h.update(f"{type(obj).__name__}:{obj.shape};".encode())
+        if isinstance(obj, pd.DataFrame):
+            _feed(h, [str(c) for c in obj.columns])
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    else:
+        h.update(pickle.dumps(obj, protocol=4))
+
+def stable_hash(*parts):
+    """Hex digest that is identical for equal inputs across processes and reruns"""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _feed(h, part)
+    return h.hexdigest()
+
+# ========== MEMOIZATION ==========
+_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def memoize(max_entries=128, ttl=3600):
+    """Cache a pure function's results process-wide, keyed on a stable hash of its arguments
+
+    Caches are registered by the function's qualified name, so functions that
+    Streamlit redefines on every rerun keep hitting the same cache. Results are
+    shared between sessions and must not be mutated by callers.
+    """
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        with _REGISTRY_LOCK:
+            cache = _REGISTRY.get(name)
+            if cache is None:
+                cache = _REGISTRY[name] = LRUCache(max_entries, ttl)
+        code_hash = stable_hash(fn.__code__, fn.__defaults__, fn.__kwdefaults__)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = stable_hash(code_hash, args, kwargs)
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = fn(*args, **kwargs)
+                cache.set(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+def cache_stats():
+    """Hit/miss counters for every memoized function"""
+    with _REGISTRY_LOCK:
+        caches = list(_REGISTRY.items())
+    return {name: cache.stats() for name, cache in caches}
+
+def clear_caches():
+    with _REGISTRY_LOCK:
+        for cache in _REGISTRY.values():
+            cache.clear()
@@ -0,0 +1,131 @@
+import numpy as np
+
+# Recurring events step either a fixed number of days or whole calendar months;
+# month steps keep the anchor day, clipped to the end of shorter months
+DAY_STEPS = {"weekly": 7, "biweekly": 14}
+MONTH_STEPS = {"monthly": 1, "quarterly": 3, "annual": 12}
+FREQUENCIES = ("once", *DAY_STEPS, *MONTH_STEPS)
+
+DEFAULT_YEARS = 5
+ESTIMATED_TAX_RATE = 0.25
+DAYS_PER_MONTH = 365.25 / 12
+
+# ========== SCHEDULE EXPANSION ==========
+def _day(value):
+    return np.datetime64(str(value)[:10], "D")
+
+def _add_months(date, months):
+    """date shifted by each number of months, keeping its day clipped to the month's length"""
+    anchor = date.astype("datetime64[M]")
+    day = (date - anchor.astype("datetime64[D]")).astype(int)
+    shifted = anchor + months
+    month_start = shifted.astype("datetime64[D]")
+    month_length = ((shifted + 1).astype("datetime64[D]") - month_start).astype(int)
+    return month_start + np.minimum(day, month_length - 1)
+
+def event_dates(frequency, start, stop, end=None):
+    """Every occurrence of an event from start up to (not including) stop or its own end date"""
+    start = _day(start)
+    stop = min(_day(stop), _day(end)) if end else _day(stop)
+    if start >= stop:
+        return np.empty(0, dtype="datetime64[D]")
+    if frequency == "once":
+        return np.array([start])
+    if frequency in DAY_STEPS:
+        step = DAY_STEPS[frequency]
+        count = -(-(stop - start).astype(int) // step)
+        return start + np.arange(count) * np.timedelta64(step, "D")
+    if frequency not in MONTH_STEPS:
+        raise ValueError(f"Unknown frequency {frequency!r}; expected one of {', '.join(FREQUENCIES)}")
+    step = MONTH_STEPS[frequency]
+    span = (stop.astype("datetime64[M]") - start.astype("datetime64[M]")).astype(int)
+    dates = _add_months(start, np.arange(span // step + 1) * step)
+    return dates[dates < stop]
+
+def expand_events(events, start, days):
+    """Day offsets and amounts of every occurrence of every event within days of start
+
+    Each event is a dict with amount (positive in, negative out), frequency,
+    start, and optionally end and growth (monthly, compounding from the
+    calendar start). Returns two flat arrays, one element per occurrence.
+    """
+    start = _day(start)
+    stop = start + np.timedelta64(days, "D")
+    offsets, amounts = [], []
+    for event in events:
+        dates = event_dates(event["frequency"], event["start"], stop, event.get("end"))
+        offset = (dates[dates >= start] - start).astype(int)
+        growth = float(event.get("growth") or 0.0)
+        offsets.append(offset)
+        amounts.append(float(event["amount"]) * np.exp(np.log1p(growth) * offset / DAYS_PER_MONTH))
+    if not offsets:
+        return np.empty(0, dtype=int), np.empty(0)
+    return np.concatenate(offsets), np.concatenate(amounts)
+
+def calendar_balances(cash_balance, events, start, years=DEFAULT_YEARS):
+    """Daily dates, net flows and end-of-day cash balances for the whole horizon"""
+    start = _day(start)
+    days = (_add_months(start, 12 * int(years)) - start).astype(int)
+    offsets, amounts = expand_events(events, start, days)
+    flows = np.bincount(offsets, weights=amounts, minlength=days)
+    return {
+        "dates": start + np.arange(days),
+        "flows": flows,
+        "balance": cash_balance + np.cumsum(flows),
+    }
+
+def calendar_summary(calendar):
+    """Lowest balance and its date, first day below zero, and the closing balance"""
+    balance = calendar["balance"]
+    low = int(balance.argmin())
+    below = balance < 0
+    return {
+        "min_balance": float(balance[low]),
+        "min_date": str(calendar["dates"][low]),
+        "first_negative_date": str(calendar["dates"][below.argmax()]) if below.any() else None,
+        "ending_balance": float(balance[-1]),
+        "days": len(balance),
+    }
+
+# ========== DEFAULT SCHEDULE ==========
+def _next_weekday(start, weekday):
+    """First date on or after start falling on weekday (Monday is 0)"""
+    start = _day(start)
+    # 1970-01-01 was a Thursday, weekday 3
+    return start + np.timedelta64((weekday - (start.astype(int) + 3)) % 7, "D")
+
+def _next_month_day(start, day):
+    """First date on or after start falling on the given day of the month"""
+    start = _day(start)
+    candidate = start.astype("datetime64[M]").astype("datetime64[D]") + (day - 1)
+    if candidate < start:
+        candidate = (start.astype("datetime64[M]") + 1).astype("datetime64[D]") + (day - 1)
+    return candidate
+
+def default_events(revenue, expense_breakdown, start, revenue_growth=0.0, expense_growth=0.0):
+    """A typical schedule matching the monthly figures
+
+    Revenue is collected on the 1st, salaries are paid every other Friday,
+    software is billed annually, the other categories monthly, and
+    estimated tax on profit is due quarterly on the 15th.
+    """
+    first_of_month = str(_next_month_day(start, 1))
+    events = [{"name": "Customer receipts", "amount": float(revenue), "frequency": "monthly",
+               "start": first_of_month, "growth": revenue_growth}]
+    for category, amount in expense_breakdown.items():
+        if not amount:
+            continue
+        if category == "Salaries":
+            event = {"name": "Payroll", "amount": -amount * 12 / 26, "frequency": "biweekly",
+                     "start": str(_next_weekday(start, 4))}
+        elif category == "Software":
+            event = {"name": "Software subscriptions", "amount": -amount * 12, "frequency": "annual",
+                     "start": first_of_month}
+        else:
+            event = {"name": category, "amount": -float(amount), "frequency": "monthly", "start": first_of_month}
+        events.append({**event, "growth": expense_growth})
+    quarterly_profit = 3 * (revenue - sum(expense_breakdown.values()))
+    if quarterly_profit > 0:
+        events.append({"name": "Estimated taxes", "amount": -ESTIMATED_TAX_RATE * quarterly_profit,
+                       "frequency": "quarterly", "start": str(_next_month_day(start, 15)), "growth": 0.0})
+    return events
@@ -0,0 +1,203 @@
+import re
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Built-in keywords per expense category. Keywords match whole words of the
+# normalized description, so "ups" matches "UPS*1Z99" but not "groups".
+DEFAULT_KEYWORDS = {
+    "Salaries": ("payroll", "salary", "salaries", "wages", "gusto", "adp", "paychex", "rippling", "deel",
+                 "justworks", "trinet", "remote com", "contractor", "bonus"),
+    "Software": ("aws", "amazon web services", "google cloud", "gcp", "azure", "github", "gitlab", "atlassian",
+                 "jira", "slack", "notion", "figma", "zoom", "dropbox", "microsoft", "office", "google workspace",
+                 "gsuite", "heroku", "digitalocean", "vercel", "openai", "adobe", "salesforce", "intuit",
+                 "quickbooks", "software", "saas", "subscription"),
+    "Marketing": ("google ads", "adwords", "facebook ads", "facebk", "meta ads", "linkedin ads", "twitter ads",
+                  "tiktok ads", "bing ads", "mailchimp", "hubspot", "semrush", "ahrefs", "advertising", "marketing",
+                  "sponsorship", "conference", "promo"),
+    "Operations": ("rent", "lease", "wework", "regus", "utilities", "electric", "water", "internet", "comcast",
+                   "verizon", "at&t", "insurance", "fedex", "ups", "usps", "dhl", "shipping", "staples",
+                   "office depot", "cleaning", "legal", "accounting", "bank fee", "service charge", "stripe fee"),
+}
+
+# Rows nothing matches keep the bank's category, or Other when the bank had none
+UNCATEGORIZED = "Uncategorized"
+FALLBACK_CATEGORY = "Other"
+
+USER_PRIORITY, KEYWORD_PRIORITY = 1, 0
+
+_NOISE = re.compile(r"[^a-z&]+")
+
+def merchant_key(description):
+    """Lower-cased words of a description without digits or punctuation: 'AWS EMEA*1234' -> 'aws emea'"""
+    return _NOISE.sub(" ", str(description).lower()).strip()
+
+# ========== MATCHER ==========
+class KeywordMatcher:
+    """Aho-Corasick automaton finding every whole-word keyword in one pass over a merchant key
+
+    Keywords are added as (keyword, value) pairs and padded with spaces, as
+    is the scanned text, so matches always fall on word boundaries.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for keyword, value in keywords:
+            key = merchant_key(keyword)
+            if not key:
+                continue
+            state = 0
+            for ch in f" {key} ":
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (value,)
+        # Breadth-first, so every state's failure target is finished before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def __len__(self):
+        return len(self._goto)
+
+    def find(self, merchant):
+        """Values of every keyword occurring in a merchant key"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state, found = 0, []
+        for ch in f" {merchant} ":
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.extend(out[state])
+        return found
+
+# ========== CATEGORIZER ==========
+def clean_rules(rules):
+    """User rules as (pattern, category) pairs with blank and duplicate entries dropped, order kept"""
+    cleaned = {}
+    for rule in rules or ():
+        pattern, category = (rule["pattern"], rule["category"]) if isinstance(rule, dict) else rule
+        pattern, category = merchant_key(pattern or ""), str(category or "").strip()
+        if pattern and category:
+            cleaned[pattern] = category
+    return list(cleaned.items())
+
+class Categorizer:
+    """Assigns categories to transaction descriptions
+
+    User rules beat built-in keywords and longer keywords beat shorter ones,
+    so "google ads" wins over "google". Each distinct merchant is matched
+    once and remembered; rows are then categorized by looking up their
+    merchant, so a ledger costs one scan per merchant rather than per row.
+    """
+
+    def __init__(self, rules=()):
+        self.rules = []
+        self.scans = 0
+        self._memo = {}
+        self._matcher = None
+        # Sessions share a company's categorizer; a rule edit must not interleave with a scan
+        self._lock = threading.Lock()
+        self.update_rules(rules)
+
+    def _build_matcher(self):
+        keywords = [(keyword, (KEYWORD_PRIORITY, len(keyword), 0, category))
+                    for category, words in DEFAULT_KEYWORDS.items() for keyword in words]
+        keywords += [(pattern, (USER_PRIORITY, len(pattern), order, category))
+                     for order, (pattern, category) in enumerate(self.rules)]
+        return KeywordMatcher(keywords)
+
+    def update_rules(self, rules):
+        """Replace the user rules, forgetting only merchants an added, changed or removed rule can match
+
+        A merchant's category depends only on which patterns occur in it, so
+        merchants containing none of the changed patterns keep their memo
+        entry. Returns the forgotten merchants.
+        """
+        rules = clean_rules(rules)
+        with self._lock:
+            changed = set(self.rules) ^ set(rules)
+            self.rules = rules
+            self._matcher = self._build_matcher()
+            if not changed or not self._memo:
+                return set()
+            probe = KeywordMatcher((pattern, True) for pattern, _ in changed)
+            affected = {merchant for merchant in self._memo if probe.find(merchant)}
+            for merchant in affected:
+                del self._memo[merchant]
+            return affected
+
+    def _merchant_category(self, merchant):
+        category = self._memo.get(merchant, False)
+        if category is False:
+            self.scans += 1
+            hits = self._matcher.find(merchant)
+            category = self._memo[merchant] = max(hits)[-1] if hits else None
+        return category
+
+    def categorize_unique(self, descriptions):
+        """Categories (None when unmatched or missing) for an array of distinct descriptions"""
+        out = np.empty(len(descriptions), dtype=object)
+        with self._lock:
+            for i, description in enumerate(descriptions):
+                if not pd.isna(description):
+                    out[i] = self._merchant_category(merchant_key(description))
+        return out
+
+    def categorize(self, descriptions, fallback=None):
+        """Category for every row of descriptions (pyarrow, pandas or numpy)
+
+        Rows nothing matches keep their fallback (bank) category, or Other
+        when the bank left them uncategorized. Only distinct descriptions are
+        categorized; rows are filled in with one vectorized lookup.
+        """
+        codes, uniques = _encode(descriptions)
+        categories = self.categorize_unique(uniques)
+        matched = np.not_equal(categories, None)
+        categories[~matched] = FALLBACK_CATEGORY
+        rows = categories[codes]
+        if fallback is not None and not matched.all():
+            unmatched = ~matched[codes]
+            fallback_codes, fallback_values = _encode(fallback)
+            fallback_values = np.where((fallback_values == UNCATEGORIZED) | pd.isna(fallback_values),
+                                       FALLBACK_CATEGORY, fallback_values)
+            rows[unmatched] = fallback_values[fallback_codes[unmatched]]
+        return rows
+
+    def stats(self):
+        return {"rules": len(self.rules), "merchants": len(self._memo), "scans": self.scans,
+                "states": len(self._matcher)}
+
+def _encode(values):
+    """Integer codes and distinct values (as an object array) of a column; nulls get a code of their own"""
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    if isinstance(values, pa.Array):
+        if not pa.types.is_dictionary(values.type):
+            values = pc.dictionary_encode(values)
+        uniques = values.dictionary.to_numpy(zero_copy_only=False).astype(object)
+        if values.null_count:
+            codes = values.indices.fill_null(len(uniques)).to_numpy(zero_copy_only=False)
+            return codes, np.append(uniques, None)
+        return values.indices.to_numpy(zero_copy_only=False), uniques
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    return codes, np.asarray(uniques, dtype=object)
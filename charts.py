@@ -0,0 +1,302 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from actuals import TRAILING_MONTHS, month_label, month_number, monthly_actuals
+from cache import memoize
+from cash_calendar import calendar_balances
+from core import runway_sensitivity
+from forecast import forecast_balances, safety_frontier
+from simulation import simulate_cash_paths
+from tracing import traced
+
+# Long daily series are downsampled to about this many points before plotting
+MAX_CHART_POINTS = 1000
+# Sensitivity heatmaps are sent to the browser at up to this many cells a side
+HEATMAP_SIZE = 200
+SENSITIVITY_MONTHS = 120
+SAFETY_MONTHS = 6
+# Heatmap values offered in the runway tab, by label
+SENSITIVITY_METRICS = {"Months of cash": "runway", "Break-even month": "break_even"}
+
+# ========== DOWNSAMPLING ==========
+def lttb_indices(y, n_out):
+    """Indices of n_out points that keep the shape of an evenly spaced series
+
+    Largest-Triangle-Three-Buckets: the first and last points are kept, and
+    each bucket in between keeps the point forming the largest triangle with
+    the point kept from the previous bucket and the next bucket's average.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    starts, stops = edges[:-1], edges[1:]
+    # Average of each bucket, with the last point standing in for the bucket after the final one
+    sums = np.add.reduceat(y[:n - 1], starts)
+    next_x = np.append((starts[1:] + stops[1:] - 1) / 2, n - 1)
+    next_y = np.append(sums[1:] / (stops[1:] - starts[1:]), y[-1])
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i, (start, stop) in enumerate(zip(starts.tolist(), stops.tolist())):
+        x = np.arange(start, stop)
+        area = np.abs((a - next_x[i]) * (y[start:stop] - y[a]) - (a - x) * (next_y[i] - y[a]))
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+# ========== GRAPH FUNCTIONS ==========
+@traced()
+@memoize(max_entries=64)
+def plot_cash_flow_forecast(revenue, expenses, cash_balance, months=12,
+                            revenue_growth=0.0, expense_growth=0.0):
+    """Plot cash flow forecast"""
+    months_list = list(range(1, months + 1))
+    forecast = forecast_balances(cash_balance, revenue, expenses, months,
+                                 revenue_growth, expense_growth)[0]
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=months_list,
+        y=forecast,
+        mode='lines+markers' if months <= 36 else 'lines',
+        name='Cash Forecast',
+        line=dict(color='#60a5fa', width=3),
+        marker=dict(size=8),
+        fill='tozeroy',
+        fillcolor='rgba(96, 165, 250, 0.1)'
+    ))
+    
+    fig.update_layout(
+        title=f"💰 {months}-Month Cash Flow Forecast",
+        xaxis_title="Months",
+        yaxis_title="Cash Balance ($)",
+        template="plotly_dark",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        hovermode='x unified',
+        height=400
+    )
+    
+    return fig
+
+@traced()
+@memoize(max_entries=64)
+def plot_expense_breakdown(expenses_dict):
+    """Plot expense breakdown"""
+    fig = go.Figure()
+    
+    fig.add_trace(go.Pie(
+        labels=list(expenses_dict.keys()),
+        values=list(expenses_dict.values()),
+        hole=0.4,
+        marker=dict(colors=['#ef4444', '#f59e0b', '#10b981', '#3b82f6', '#8b5cf6']),
+        textinfo='label+percent',
+        textposition='outside'
+    ))
+    
+    fig.update_layout(
+        title="📊 Expense Breakdown",
+        template="plotly_dark",
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        height=400,
+        showlegend=False
+    )
+    
+    return fig
+
+def _add_fan_traces(fig, x, bands, color, fill_rgba, name):
+    """Add a P5-P95 band and P50 line for a percentile dict"""
+    fig.add_trace(go.Scatter(
+        x=x, y=bands[95], mode='lines', line=dict(width=0),
+        name=f'{name} P95', showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=x, y=bands[5], mode='lines', line=dict(width=0),
+        fill='tonexty', fillcolor=fill_rgba, name=f'{name} P5'
+    ))
+    fig.add_trace(go.Scatter(
+        x=x, y=bands[50], mode='lines+markers', name=f'{name} P50',
+        line=dict(color=color, width=3), marker=dict(size=6)
+    ))
+
+@traced()
+@memoize(max_entries=64)
+def plot_profit_trend(revenue, expenses, seed=42, n_paths=10_000, company_name=None, revision=0):
+    """Plot recorded monthly profit and its trailing-12 average, then the next 12 months simulated (P5/P50/P95)
+
+    revision is the company's actuals revision, so new months rebuild the memoized figure.
+    """
+    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    simulation = simulate_cash_paths(0, revenue, expenses, months=12, n_paths=n_paths, seed=seed)
+    
+    fig = go.Figure()
+    history = monthly_actuals(company_name) if company_name else None
+    if history and history["months"]:
+        fig.add_trace(go.Bar(
+            x=history["months"], y=history["profit"], name='Actual Profit',
+            marker_color=np.where(history["profit"] >= 0, '#10b981', '#ef4444')
+        ))
+        full_year = history["ttm_months"] == TRAILING_MONTHS
+        if full_year.any():
+            fig.add_trace(go.Scatter(
+                x=history["months"], y=np.where(full_year, history["ttm_profit"] / TRAILING_MONTHS, np.nan),
+                mode='lines', name='Trailing-12 Average', line=dict(color='#fbbf24', width=2, dash='dash')
+            ))
+        last = month_number(history["months"][-1])
+        months = [month_label(last + i) for i in range(1, 13)]
+    _add_fan_traces(fig, months, simulation["profit"], '#10b981', 'rgba(16, 185, 129, 0.15)', 'Monthly Profit')
+    
+    fig.update_layout(
+        title="📈 Monthly Profit Trend",
+        xaxis_title="Month",
+        yaxis_title="Profit ($)",
+        template="plotly_dark",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        hovermode='x unified',
+        height=400
+    )
+    
+    return fig
+
+@traced()
+@memoize(max_entries=64)
+def plot_cash_fan_chart(simulation):
+    """Plot Monte Carlo cash balance fan chart"""
+    fig = go.Figure()
+    _add_fan_traces(fig, simulation["months"], simulation["cash"], '#60a5fa', 'rgba(96, 165, 250, 0.15)', 'Cash')
+    
+    fig.add_hline(y=0, line_dash="dash", line_color="red",
+                  annotation_text="Out of Cash",
+                  annotation_position="bottom right")
+    
+    fig.update_layout(
+        title=f"🎲 Cash Balance Simulation ({simulation['n_paths']:,} paths)",
+        xaxis_title="Months",
+        yaxis_title="Cash Balance ($)",
+        template="plotly_dark",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        hovermode='x unified',
+        height=400
+    )
+    
+    return fig
+
+@traced()
+@memoize(max_entries=32)
+def plot_runway_analysis(cash_balance, revenue, expenses, cut_range=(0, 50), growth_range=(-2.0, 10.0),
+                         expense_growth=0.0, resolution=500, metric="runway"):
+    """Plot runway (or break-even month) over expense cut x revenue growth, with the 6-month safety line"""
+    grid = runway_sensitivity(cash_balance, revenue, expenses, cut_range, growth_range,
+                              expense_growth, resolution, SENSITIVITY_MONTHS)
+    cuts = grid["expense_cut"] * 100
+    growth = grid["revenue_growth"] * 100
+    frontier = safety_frontier(grid, SAFETY_MONTHS) * 100
+    
+    # The browser gets at most HEATMAP_SIZE cells a side; the safety line keeps full resolution
+    row_step = -(-len(cuts) // HEATMAP_SIZE)
+    col_step = -(-len(growth) // HEATMAP_SIZE)
+    if metric == "break_even":
+        z = grid["break_even"][::row_step, ::col_step]
+        z = np.where(np.isfinite(z), z, np.nan).astype(np.float32)
+        colorbar_title = "Break-even month"
+        hover = "Break-even: month %{z:.0f}"
+        colorscale, zmax = 'RdYlGn_r', 36
+    else:
+        # Full months of cash, capped at the horizon when it never runs out
+        months_to_zero = grid["months_to_zero"][::row_step, ::col_step]
+        z = np.where(np.isfinite(months_to_zero), months_to_zero - 1, SENSITIVITY_MONTHS).astype(np.int16)
+        colorbar_title = "Months of cash"
+        hover = "Cash lasts %{z:.0f} months"
+        colorscale, zmax = 'RdYlGn', 24
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Heatmap(
+        x=growth[::col_step],
+        y=cuts[::row_step],
+        z=z,
+        zmin=0,
+        zmax=zmax,
+        colorscale=colorscale,
+        colorbar=dict(title=colorbar_title),
+        hovertemplate=f"Revenue growth %{{x:.2f}}%/mo<br>Expense cut %{{y:.1f}}%<br>{hover}<extra></extra>"
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=growth,
+        y=frontier,
+        mode='lines',
+        name=f'{SAFETY_MONTHS}-Month Safety Net',
+        line=dict(color='white', width=3, dash='dash'),
+        hovertemplate=f"Cut %{{y:.1f}}% at %{{x:.2f}}%/mo growth keeps {SAFETY_MONTHS}+ months of cash<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        title="🛡️ Runway Sensitivity - Expense Cuts vs Revenue Growth",
+        xaxis_title="Monthly Revenue Growth (%)",
+        yaxis_title="Expense Cut (%)",
+        template="plotly_dark",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        legend=dict(orientation='h', y=-0.2),
+        height=450
+    )
+    
+    return fig
+
+@traced()
+@memoize(max_entries=32)
+def plot_cash_calendar(cash_balance, events, start, years):
+    """Plot the daily cash balance, downsampled, with the lowest day marked"""
+    calendar = calendar_balances(cash_balance, events, start, years)
+    balance = calendar["balance"]
+    low = int(balance.argmin())
+    # The lowest day is always kept so the marker sits on the line
+    keep = np.union1d(lttb_indices(balance, MAX_CHART_POINTS), [low])
+    dates = calendar["dates"][keep].astype(str)
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scattergl(
+        x=dates,
+        y=balance[keep],
+        mode='lines',
+        name='Cash Balance',
+        line=dict(color='#60a5fa', width=2)
+    ))
+    
+    fig.add_trace(go.Scattergl(
+        x=[str(calendar["dates"][low])],
+        y=[balance[low]],
+        mode='markers',
+        name='Lowest Balance',
+        marker=dict(color='#ef4444', size=12, symbol='diamond')
+    ))
+    
+    fig.add_hline(y=0, line_dash="dash", line_color="red",
+                  annotation_text="Out of Cash",
+                  annotation_position="bottom right")
+    
+    fig.update_layout(
+        title=f"📅 Daily Cash Calendar ({years} Years)",
+        xaxis_title="Date",
+        yaxis_title="Cash Balance ($)",
+        template="plotly_dark",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        hovermode='x unified',
+        height=400
+    )
+    
+    return fig
@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from config import DATA_DIR
+
+CHAT_DB_PATH = os.path.join(DATA_DIR, "chat_history.db")
+MAX_AGE_DAYS = float(os.environ.get("UXXCA_CHAT_MAX_AGE_DAYS", "90"))
+MAX_MESSAGES = int(os.environ.get("UXXCA_CHAT_MAX_MESSAGES", "200000"))
+ROTATE_EVERY_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+CREATE INDEX IF NOT EXISTS messages_created ON messages (created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (
+    content, content='messages', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TABLE IF NOT EXISTS summaries (
+    session_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+_local = threading.local()
+_last_rotation = 0.0
+_rotation_lock = threading.Lock()
+
+# ========== CONNECTION ==========
+def _connect(path=None):
+    """Per-thread connection; Streamlit runs each session's script on its own thread"""
+    path = path or CHAT_DB_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        connections[path] = conn
+    return conn
+
+# ========== WRITES ==========
+def append_message(session_id, role, content, created_at=None, db_path=None):
+    """Store one chat message and return its id"""
+    conn = _connect(db_path)
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+            (session_id, role, content, created_at or time.time()),
+        )
+    _maybe_rotate(db_path)
+    return cursor.lastrowid
+
+def rotate(max_age_days=MAX_AGE_DAYS, max_messages=MAX_MESSAGES, db_path=None):
+    """Drop messages older than max_age_days, then the oldest beyond max_messages"""
+    conn = _connect(db_path)
+    with conn:
+        removed = conn.execute("DELETE FROM messages WHERE created_at < ?",
+                               (time.time() - max_age_days * 86400,)).rowcount
+        removed += conn.execute(
+            "DELETE FROM messages WHERE id <= (SELECT id FROM messages ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (max_messages,),
+        ).rowcount
+        conn.execute("DELETE FROM summaries WHERE session_id NOT IN (SELECT DISTINCT session_id FROM messages)")
+    return removed
+
+def _maybe_rotate(db_path=None):
+    global _last_rotation
+    now = time.monotonic()
+    if now - _last_rotation < ROTATE_EVERY_SECONDS or not _rotation_lock.acquire(blocking=False):
+        return
+    try:
+        _last_rotation = now
+        rotate(db_path=db_path)
+    finally:
+        _rotation_lock.release()
+
+# ========== READS ==========
+def count_messages(session_id, after_id=0, before_id=None, db_path=None):
+    return _connect(db_path).execute(
+        "SELECT COUNT(*) FROM messages WHERE session_id = ? AND id > ? AND id < ?",
+        (session_id, after_id, before_id if before_id is not None else 2 ** 63 - 1),
+    ).fetchone()[0]
+
+def recent_messages(session_id, limit=20, before_id=None, db_path=None):
+    """Latest messages of a session in chronological order, optionally older than before_id"""
+    rows = _connect(db_path).execute(
+        "SELECT id, role, content, created_at FROM messages "
+        "WHERE session_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+        (session_id, before_id if before_id is not None else 2 ** 63 - 1, limit),
+    ).fetchall()
+    return [dict(row) for row in reversed(rows)]
+
+def messages_after(session_id, after_id=0, before_id=None, limit=200, db_path=None):
+    """The latest messages newer than after_id (and older than before_id), in chronological order"""
+    rows = _connect(db_path).execute(
+        "SELECT id, role, content FROM messages "
+        "WHERE session_id = ? AND id > ? AND id < ? ORDER BY id DESC LIMIT ?",
+        (session_id, after_id, before_id if before_id is not None else 2 ** 63 - 1, limit),
+    ).fetchall()
+    return [dict(row) for row in reversed(rows)]
+
+def search_messages(query, session_id=None, limit=20, db_path=None):
+    """Full-text search over stored messages, best matches first"""
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return []
+    match = " ".join(f'"{term}"' for term in terms)
+    sql = ("SELECT m.id, m.session_id, m.role, m.created_at, "
+           "snippet(messages_fts, 0, '**', '**', '…', 12) AS snippet "
+           "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+           "WHERE messages_fts MATCH ?")
+    params = [match]
+    if session_id is not None:
+        sql += " AND m.session_id = ?"
+        params.append(session_id)
+    sql += " ORDER BY bm25(messages_fts) LIMIT ?"
+    params.append(limit)
+    return [dict(row) for row in _connect(db_path).execute(sql, params).fetchall()]
+
+# ========== SUMMARIES ==========
+def load_summary(session_id, db_path=None):
+    """A session's rolling conversation summary state, or None"""
+    row = _connect(db_path).execute("SELECT state FROM summaries WHERE session_id = ?", (session_id,)).fetchone()
+    return json.loads(row["state"]) if row else None
+
+def save_summary(session_id, state, db_path=None):
+    conn = _connect(db_path)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO summaries (session_id, state, updated_at) VALUES (?, ?, ?)",
+                     (session_id, json.dumps(state), time.time()))
+
+# ========== LEGACY LOG IMPORT ==========
+_LOG_LINE = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] (USER|BOT): ?(.*)$")
+
+def import_legacy_log(path, session_id="legacy", db_path=None):
+    """Load a flat bot_chat_history.txt log; multi-line replies are kept together"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            match = _LOG_LINE.match(line)
+            if match:
+                timestamp, speaker, text = match.groups()
+                created_at = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").timestamp()
+                entries.append([session_id, "user" if speaker == "USER" else "assistant", text, created_at])
+            elif entries:
+                entries[-1][2] += "\n" + line
+    conn = _connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+            [tuple(entry) for entry in entries],
+        )
+    return len(entries)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the chat history store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_cmd = commands.add_parser("import", help="import a flat bot_chat_history.txt log")
+    import_cmd.add_argument("path")
+    search_cmd = commands.add_parser("search", help="full-text search past conversations")
+    search_cmd.add_argument("query")
+    search_cmd.add_argument("--session")
+    replay_cmd = commands.add_parser("replay", help="print a session's latest messages")
+    replay_cmd.add_argument("session")
+    replay_cmd.add_argument("--limit", type=int, default=50)
+    commands.add_parser("rotate", help="apply the age/size retention policy now")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        print(f"Imported {import_legacy_log(args.path)} messages")
+    elif args.command == "search":
+        for hit in search_messages(args.query, session_id=args.session):
+            print(f"[{datetime.fromtimestamp(hit['created_at']):%Y-%m-%d %H:%M}] {hit['session_id']} "
+                  f"{hit['role']}: {hit['snippet']}")
+    elif args.command == "replay":
+        for message in recent_messages(args.session, limit=args.limit):
+            print(f"[{datetime.fromtimestamp(message['created_at']):%Y-%m-%d %H:%M}] "
+                  f"{message['role'].upper()}: {message['content']}")
+    else:
+        print(f"Removed {rotate()} messages")
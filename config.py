@@ -0,0 +1,14 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ========== PATHS ==========
+DATA_DIR = os.environ.get("UXXCA_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+# ========== MODEL BACKEND ==========
+# OpenAI-compatible chat completions endpoint (Perplexity by default)
+LLM_URL = os.environ.get("UXXCA_LLM_URL", "https://api.perplexity.ai/chat/completions")
+LLM_API_KEY = os.environ.get("UXXCA_LLM_API_KEY") or os.environ.get("PERPLEXITY_API_KEY")
+LLM_MODEL = os.environ.get("UXXCA_LLM_MODEL", "sonar")
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep the ledger, actuals and chat databases the tests write out of the app's data directory
+os.environ["UXXCA_DATA_DIR"] = tempfile.mkdtemp(prefix="uxxca-test-")
@@ -0,0 +1,148 @@
+import os
+import re
+from collections import Counter
+
+from cache import stable_hash
+from chat_store import count_messages, load_summary, messages_after, save_summary
+from metrics import metrics_snapshot
+from tracing import traced
+
+# Prompt budget in estimated tokens; the question is always sent, the rest fills what it leaves
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("UXXCA_CONTEXT_TOKENS", "2000"))
+SUMMARY_TOKEN_BUDGET = 300
+MESSAGE_OVERHEAD_TOKENS = 4
+DIGEST_CHARS = 160
+TOPIC_WORDS = 8
+# Messages read per turn; a conversation further behind its summary than this is folded in as a count
+CATCH_UP_MESSAGES = 200
+
+_STOPWORDS = frozenset(
+    "about after again also because been before being could does doing from have into just like make more most "
+    "much only other over should some such than that their them then there these they this those through very "
+    "what when where which while with would your yours month months monthly".split()
+)
+
+def count_tokens(text):
+    """Token estimate at about four characters per token, as for English text with most tokenizers"""
+    return -(-len(text) // 4)
+
+def financial_snapshot(financial_context):
+    """The dashboard figures as one compact line"""
+    metrics = metrics_snapshot(financial_context)
+    runway = metrics["runway_months"]
+    breakdown = sorted(metrics["category_spend"].items(), key=lambda item: -item[1])
+    return (
+        f"Company: {financial_context.get('company_name') or 'Your Business'}. "
+        f"Monthly revenue ${metrics['revenue']:,.0f}, expenses ${metrics['expenses']:,.0f}, "
+        f"cash ${metrics['cash_balance']:,.0f}, "
+        + (f"cash covers {runway:.1f} months of expenses." if metrics["expenses"] > 0 else "no expenses.")
+        + (" Expenses: " + ", ".join(f"{category} ${amount:,.0f}" for category, amount in breakdown) + "."
+           if breakdown else "")
+    )
+
+# ========== ROLLING SUMMARY ==========
+def _digest(message):
+    """One line standing in for a message: its first sentence, without markdown, cut to DIGEST_CHARS"""
+    text = " ".join(re.sub(r"[*_`#>|]+", " ", message["content"]).split())
+    first = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    if len(first) > DIGEST_CHARS:
+        first = first[:DIGEST_CHARS - 1].rstrip() + "…"
+    return f"{'User' if message['role'] == 'user' else 'Assistant'}: {first}"
+
+def _keywords(line):
+    return [word for word in re.findall(r"[a-z]{4,}", line.split(": ", 1)[-1].lower()) if word not in _STOPWORDS]
+
+def render_summary(state):
+    if not state or not (state["lines"] or state["earlier"]):
+        return ""
+    parts = ["Earlier in this conversation (oldest first):"]
+    if state["earlier"]:
+        topics = ", ".join(state["topics"])
+        parts.append(f"({state['earlier']} earlier messages" + (f" about {topics})" if topics else ")"))
+    parts += [f"- {line}" for line in state["lines"]]
+    return "\n".join(parts)
+
+def fold_messages(state, messages, skipped=0):
+    """Summary state with messages (and skipped older ones, as a count) folded in
+
+    New messages become digest lines; while the summary is over its token
+    budget the oldest lines are dropped into a count and a topic list. The
+    work is proportional to the messages folded, not to the conversation.
+    """
+    lines = list(state["lines"])
+    earlier = state["earlier"] + skipped
+    topics = Counter(state["topics"])
+    lines += [_digest(message) for message in messages]
+    while True:
+        folded = {
+            "upto_id": messages[-1]["id"] if messages else state["upto_id"],
+            "lines": lines,
+            "earlier": earlier,
+            "topics": [word for word, _ in topics.most_common(TOPIC_WORDS)],
+        }
+        if not lines or count_tokens(render_summary(folded)) + MESSAGE_OVERHEAD_TOKENS <= SUMMARY_TOKEN_BUDGET:
+            return folded
+        topics.update(_keywords(lines.pop(0)))
+        earlier += 1
+
+# ========== CONTEXT BUILDER ==========
+@traced()
+def build_context(system_prompt, question, financial_context=None, session_id=None, before_id=None,
+                  budget=CONTEXT_TOKEN_BUDGET):
+    """Chat messages for one model call, packed into a token budget
+
+    The system prompt, a one-line snapshot of the figures and the question
+    always go in. The latest turns of the session before before_id follow
+    verbatim while they fit; turns that no longer fit are folded, once, into
+    a rolling summary stored with the session, so each turn only reads and
+    summarizes what is new. Returns the messages, a tokens breakdown and
+    history_key, which identifies the conversation state the answer depends on.
+    """
+    snapshot = financial_snapshot(financial_context) if financial_context else ""
+    tokens = {"system": count_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS,
+              "financials": count_tokens(snapshot) + MESSAGE_OVERHEAD_TOKENS if snapshot else 0,
+              "summary": 0, "history": 0,
+              "question": count_tokens(question) + MESSAGE_OVERHEAD_TOKENS}
+    history, summary, summarized = [], "", 0
+    if session_id is not None:
+        state = load_summary(session_id) or {"upto_id": 0, "lines": [], "earlier": 0, "topics": []}
+        recent = messages_after(session_id, state["upto_id"], before_id, limit=CATCH_UP_MESSAGES)
+        skipped = (count_messages(session_id, state["upto_id"], recent[0]["id"])
+                   if len(recent) == CATCH_UP_MESSAGES else 0)
+        # The summary's share is reserved first, so a growing summary never squeezes out the latest turns
+        available = budget - sum(tokens.values()) - SUMMARY_TOKEN_BUDGET
+        keep = len(recent)
+        used = 0
+        while keep:
+            cost = count_tokens(recent[keep - 1]["content"]) + MESSAGE_OVERHEAD_TOKENS
+            if used + cost > available:
+                break
+            used += cost
+            keep -= 1
+        # Verbatim history opens with a user turn, as some backends require alternating roles
+        while keep < len(recent) and recent[keep]["role"] != "user":
+            keep += 1
+        history = [{"role": m["role"], "content": m["content"]} for m in recent[keep:]]
+        if keep or skipped:
+            state = fold_messages(state, recent[:keep], skipped)
+            save_summary(session_id, state)
+        summary = render_summary(state)
+        summarized = state["earlier"] + len(state["lines"])
+        tokens["summary"] = count_tokens(summary) + MESSAGE_OVERHEAD_TOKENS if summary else 0
+        tokens["history"] = sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in history)
+    tokens["total"] = sum(tokens.values())
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if snapshot:
+        messages.append({"role": "system", "content": snapshot})
+    if summary:
+        messages.append({"role": "system", "content": summary})
+    messages += history
+    messages.append({"role": "user", "content": question})
+    return {
+        "messages": messages,
+        "tokens": tokens,
+        "verbatim": len(history),
+        "summarized": summarized,
+        "history_key": stable_hash(summary, history) if history or summary else None,
+    }
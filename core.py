@@ -0,0 +1,126 @@
+import numpy as np
+
+from cache import memoize
+from cash_calendar import calendar_balances, calendar_summary
+from forecast import break_even_month, forecast_balances, forecast_summary, sensitivity_grid
+from metrics import metrics_snapshot
+from simulation import simulate_cash_paths
+from tracing import traced
+
+# UI-free compute shared by the Streamlit app and the batch runner. Only
+# numpy is imported up front; the ledger (pandas, pyarrow) and the Excel
+# writer (openpyxl) are imported by the functions that use them.
+
+# ========== MEMOIZED COMPUTE ==========
+@traced()
+@memoize(max_entries=64)
+def cash_forecast(cash_balance, revenue, expenses, months, revenue_growth, expense_growth):
+    """Single-scenario forecast summary as plain floats"""
+    summary = forecast_summary(forecast_balances(cash_balance, revenue, expenses, months,
+                                                 revenue_growth, expense_growth))
+    return {key: float(values[0]) for key, values in summary.items()}
+
+@traced()
+@memoize(max_entries=32)
+def cash_simulation(cash_balance, revenue, expenses, months, n_paths, seed):
+    """Monte Carlo summary, identical for identical inputs and seed"""
+    return simulate_cash_paths(cash_balance, revenue, expenses, months=months,
+                               n_paths=n_paths, seed=seed)
+
+@traced()
+@memoize(max_entries=32)
+def daily_cash_calendar(cash_balance, events, start, years):
+    """Daily cash calendar summary: lowest balance and its date, first day below zero"""
+    return calendar_summary(calendar_balances(cash_balance, events, start, years))
+
+@traced()
+@memoize(max_entries=16)
+def runway_sensitivity(cash_balance, revenue, expenses, cut_range, growth_range, expense_growth=0.0,
+                       resolution=500, months=120):
+    """Sensitivity grid over evenly spaced expense cuts and monthly revenue growth rates, given in percent"""
+    return sensitivity_grid(cash_balance, revenue, expenses,
+                            np.linspace(cut_range[0], cut_range[1], resolution) / 100,
+                            np.linspace(growth_range[0], growth_range[1], resolution) / 100,
+                            expense_growth, months)
+
+@traced()
+@memoize(max_entries=32)
+def ledger_merchant_totals(company_name, ledger_rows):
+    """Monthly totals per merchant; ledger_rows changes whenever the store grows"""
+    from ledger import monthly_merchant_totals
+
+    return monthly_merchant_totals(company_name)
+
+@traced()
+@memoize(max_entries=32)
+def ledger_financials(company_name, ledger_rows, rules=()):
+    """Figures derived from the ledger under the company's categorization rules
+
+    A rule edit only regroups the memoized merchant totals; the transactions
+    are not read again.
+    """
+    from ledger import categorized_totals, categorizer, derive_financials
+
+    return derive_financials(categorized_totals(ledger_merchant_totals(company_name, ledger_rows),
+                                                categorizer(company_name)))
+
+def sync_ledger_actuals(company_name, ledger_rows, force=False):
+    """Rebuild the company's ledger actuals unless they already cover all ledger_rows transactions
+
+    Imports add their own months as they land; this catches ledgers stored
+    before the actuals existed and, with force, a change of categorization
+    rules. Returns whether anything was rebuilt.
+    """
+    from actuals import actuals_revision, replace_source
+    from ledger import categorized_totals, categorizer
+
+    if not force and actuals_revision(company_name)[1] == ledger_rows:
+        return False
+    replace_source(company_name, categorized_totals(ledger_merchant_totals(company_name, ledger_rows),
+                                                    categorizer(company_name)), rows=ledger_rows)
+    return True
+
+# ========== PER-COMPANY RESULTS ==========
+def company_metrics(financial_data, forecast_months=12, revenue_growth=0.0, expense_growth=0.0,
+                    n_paths=10_000, seed=42):
+    """Flat dict of dashboard metrics, forecast and (when n_paths > 0) Monte Carlo runway"""
+    metrics = metrics_snapshot(financial_data)
+    revenue, expenses, cash_balance = metrics["revenue"], metrics["expenses"], metrics["cash_balance"]
+    forecast = cash_forecast(cash_balance, revenue, expenses, forecast_months, revenue_growth, expense_growth)
+    result = {
+        "company_name": financial_data.get("company_name", "Your Business"),
+        "revenue": revenue,
+        "expenses": expenses,
+        "cash_balance": cash_balance,
+        "profit": metrics["monthly_profit"],
+        "profit_margin": metrics["profit_margin"],
+        "runway_months": metrics["runway_months"],
+        "ending_balance": forecast["ending_balance"],
+        "min_balance": forecast["min_balance"],
+        "months_to_zero": forecast["months_to_zero"],
+        "break_even_month": float(break_even_month(revenue, expenses, revenue_growth, expense_growth)[0]),
+    }
+    if n_paths:
+        simulation = cash_simulation(cash_balance, revenue, expenses, 36, n_paths, seed)
+        result.update({f"runway_p{p}": float(v) for p, v in simulation["runway"].items()})
+        result["cash_out_probability"] = float(simulation["cash_out_probability"])
+    return result
+
+@traced()
+def company_report(output, financial_data, forecast_months=12, revenue_growth=0.0, expense_growth=0.0,
+                   ledger_company=None, progress=None):
+    """Write a company's workbook, with its stored ledger when ledger_company has transactions
+
+    progress(fraction, stage) is passed through to the spreadsheet writer.
+    """
+    from ledger import iter_categorized_batches, transaction_count
+    from reports import create_financial_spreadsheet
+
+    transactions, rows = None, 0
+    if ledger_company is not None:
+        rows = transaction_count(ledger_company)
+    if rows:
+        transactions = iter_categorized_batches(ledger_company, ["date", "description", "category", "amount"])
+    return create_financial_spreadsheet(financial_data, transactions, output=output,
+                                        forecast_months=forecast_months, revenue_growth=revenue_growth,
+                                        expense_growth=expense_growth, progress=progress, transaction_rows=rows)
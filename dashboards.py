@@ -0,0 +1,202 @@
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+from cache import stable_hash
+from cash_calendar import DEFAULT_YEARS
+from metrics import DEFAULT_FINANCIAL_DATA, expense_breakdown, metrics_snapshot
+from tracing import span
+
+SHARED_STORE_BYTES = int(os.environ.get("UXXCA_SHARED_STORE_MB", "128")) * 1024 * 1024
+
+# Graph settings every session starts from; the app re-assigns them each run, see app.py
+GRAPH_DEFAULTS = {"forecast_months": 12, "revenue_growth": 0.0, "expense_growth": 0.0,
+                  "sim_seed": 42, "sim_paths": 100_000, "calendar_years": DEFAULT_YEARS,
+                  "sensitivity_cuts": (0, 50), "sensitivity_growth": (-2.0, 10.0), "sensitivity_resolution": 500,
+                  "sensitivity_metric": "Months of cash"}
+
+_MISSING = object()
+
+# ========== SHARED STORE ==========
+class SharedStore:
+    """Process-wide store of immutable computed values, addressed by a hash of their inputs
+
+    Sessions with identical inputs read the same object instead of each
+    building and keeping a copy. Values are charged their size against
+    max_bytes and the least recently used are dropped past it. Concurrent
+    requests for a missing value build it once.
+    """
+
+    def __init__(self, max_bytes=SHARED_STORE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._build_locks = [threading.Lock() for _ in range(64)]
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        """Store value, unless it alone exceeds the budget; returns value either way"""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self._bytes -= dropped
+                self.evictions += 1
+        return value
+
+    def get_or_build(self, key, build, size=len):
+        """The value for key, calling build() only if no session has stored it yet"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._build_locks[int(key[:8], 16) % len(self._build_locks)]:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            value = build()
+            self.builds += 1
+            return self.put(key, value, size(value))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "builds": self.builds,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Process-wide shared store, read by every Streamlit session on this server"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SharedStore()
+        return _store
+
+# ========== SHARED DASHBOARDS ==========
+def _freeze(value):
+    """value with every dict in it, however deeply nested, replaced by a read-only view"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+def _snapshot_size(snapshot):
+    return len(json.dumps(snapshot, default=lambda value: dict(value) if isinstance(value, MappingProxyType)
+                          else str(value)))
+
+def shared_dashboard(revenue, expenses, cash_balance, expense_breakdown=None, company_name=None):
+    """Read-only snapshot of every dashboard KPI for these inputs, shared by sessions with identical inputs
+
+    On a miss the snapshot is read from the company's metrics model, which
+    recomputes only what changed since that company's last dashboard.
+    """
+    inputs = {"revenue": revenue, "expenses": expenses, "cash_balance": cash_balance,
+              "expense_breakdown": expense_breakdown}
+    return get_store().get_or_build(stable_hash("dashboard-v1", inputs),
+                                    lambda: _freeze(metrics_snapshot({**inputs, "company_name": company_name})),
+                                    size=_snapshot_size)
+
+def _figure_size(figure):
+    import plotly.utils
+
+    return len(json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder))
+
+def shared_figure(plot, *args, **kwargs):
+    """plot(*args, **kwargs), built once per distinct input on this server
+
+    The chart function is called past its @memoize, so the Figure is held
+    by the store alone and charged its encoded size. st.plotly_chart copies
+    a Figure before sending it, so sessions can share one; callers must
+    not modify it.
+    """
+    fn = inspect.unwrap(plot)
+    key = stable_hash("figure", fn.__module__, fn.__qualname__, fn.__code__, args, kwargs)
+
+    def build():
+        with span(fn.__name__):
+            return fn(*args, **kwargs)
+    return get_store().get_or_build(key, build, size=_figure_size)
+
+# ========== STARTUP WARMING ==========
+def warm_defaults():
+    """Build what a new session shows for the default inputs: the KPIs and every graph but the calendar
+
+    The calendar is left out because its schedule starts today and comes
+    back from the events editor in a different form. Returns the dashboard
+    and the figures by graph.
+    """
+    from actuals import actuals_revision
+    from charts import (SENSITIVITY_METRICS, plot_cash_fan_chart, plot_cash_flow_forecast, plot_expense_breakdown,
+                        plot_profit_trend, plot_runway_analysis)
+    from core import cash_forecast, cash_simulation
+
+    revenue, expenses = DEFAULT_FINANCIAL_DATA["revenue"], DEFAULT_FINANCIAL_DATA["expenses"]
+    cash_balance, company_name = DEFAULT_FINANCIAL_DATA["cash_balance"], DEFAULT_FINANCIAL_DATA["company_name"]
+    # Mirrors app.py: growth inputs are entered in percent, the sidebar splits expenses by DEFAULT_EXPENSE_SPLIT
+    settings = GRAPH_DEFAULTS
+    revenue_growth, expense_growth = settings["revenue_growth"] / 100, settings["expense_growth"] / 100
+    breakdown = expense_breakdown(DEFAULT_FINANCIAL_DATA)
+
+    dashboard = shared_dashboard(revenue, expenses, cash_balance, breakdown, company_name)
+    cash_forecast(cash_balance, revenue, expenses, settings["forecast_months"], revenue_growth, expense_growth)
+    simulation = cash_simulation(cash_balance, revenue, expenses, 36, settings["sim_paths"], settings["sim_seed"])
+    figures = {
+        "cash_flow": shared_figure(plot_cash_flow_forecast, revenue, expenses, cash_balance,
+                                   settings["forecast_months"], revenue_growth, expense_growth),
+        "expense_breakdown": shared_figure(plot_expense_breakdown, dashboard["category_spend"]),
+        "profit_trend": shared_figure(plot_profit_trend, revenue, expenses, seed=settings["sim_seed"],
+                                      company_name=company_name, revision=actuals_revision(company_name)[0]),
+        "cash_fan": shared_figure(plot_cash_fan_chart, simulation),
+        "runway": shared_figure(plot_runway_analysis, cash_balance, revenue, expenses, settings["sensitivity_cuts"],
+                                settings["sensitivity_growth"], expense_growth, settings["sensitivity_resolution"],
+                                SENSITIVITY_METRICS[settings["sensitivity_metric"]]),
+    }
+    return {"dashboard": dashboard, "figures": figures}
+
+_warmup = None
+_warmup_lock = threading.Lock()
+
+def start_warmup():
+    """Warm the shared store for the default inputs on a background thread, once per process"""
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = threading.Thread(target=warm_defaults, name="dashboard-warmup", daemon=True)
+            _warmup.start()
+        return _warmup
@@ -0,0 +1,151 @@
+import numpy as np
+
+# A monthly rate of -100% or below has no compound path (log1p is -inf or NaN), so rates are floored here
+MIN_MONTHLY_GROWTH = -0.99
+
+# ========== VECTORIZED CASH-FLOW FORECAST ENGINE ==========
+def forecast_paths(cash_balance, revenue, expenses, months=12,
+                   revenue_growth=0.0, expense_growth=0.0):
+    """Project monthly revenue, expenses and month-end cash for many scenarios in one pass
+
+    Every scenario argument may be a scalar or a 1-D array; they broadcast
+    against each other, one element per scenario. Growth rates are monthly
+    and compound. Returns (n_scenarios, months) float matrices.
+    """
+    cash, rev, exp, rev_g, exp_g = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(v, dtype=float))
+          for v in (cash_balance, revenue, expenses, revenue_growth, expense_growth))
+    )
+    rev_g, exp_g = np.maximum(rev_g, MIN_MONTHLY_GROWTH), np.maximum(exp_g, MIN_MONTHLY_GROWTH)
+    t = np.arange(months, dtype=float)
+    revenue_path = rev[:, None] * np.exp(np.log1p(rev_g)[:, None] * t)
+    expense_path = exp[:, None] * np.exp(np.log1p(exp_g)[:, None] * t)
+    return {
+        "revenue": revenue_path,
+        "expenses": expense_path,
+        "balance": cash[:, None] + np.cumsum(revenue_path - expense_path, axis=1),
+    }
+
+def forecast_balances(cash_balance, revenue, expenses, months=12,
+                      revenue_growth=0.0, expense_growth=0.0):
+    """Month-end cash balances, a (n_scenarios, months) matrix"""
+    return forecast_paths(cash_balance, revenue, expenses, months,
+                          revenue_growth, expense_growth)["balance"]
+
+def months_to_zero(balances, axis=1):
+    """First month (1-based) each scenario's balance goes negative, inf if never"""
+    below = balances < 0
+    first = below.argmax(axis=axis) + 1.0
+    return np.where(below.any(axis=axis), first, np.inf)
+
+def forecast_summary(balances):
+    """Per-scenario ending balance, low point and month cash runs out"""
+    return {
+        "ending_balance": balances[:, -1],
+        "min_balance": balances.min(axis=1),
+        "months_to_zero": months_to_zero(balances),
+    }
+
+def break_even_month(revenue, expenses, revenue_growth=0.0, expense_growth=0.0, months=120):
+    """First month (1-based) each scenario's monthly profit is non-negative, inf if not within months"""
+    paths = forecast_paths(0.0, revenue, expenses, months, revenue_growth, expense_growth)
+    profitable = paths["revenue"] >= paths["expenses"]
+    return np.where(profitable.any(axis=1), profitable.argmax(axis=1) + 1.0, np.inf)
+
+def scenario_grid(revenue, expenses, revenue_growth=0.0, expense_growth=0.0):
+    """Expand per-axis values into flat arrays covering every combination"""
+    axes = [np.atleast_1d(np.asarray(v, dtype=float))
+            for v in (revenue, expenses, revenue_growth, expense_growth)]
+    grids = np.meshgrid(*axes, indexing="ij")
+    return {
+        "revenue": grids[0].ravel(),
+        "expenses": grids[1].ravel(),
+        "revenue_growth": grids[2].ravel(),
+        "expense_growth": grids[3].ravel(),
+    }
+
+# ========== SENSITIVITY GRID ==========
+def _geometric_sum(log_growth, t):
+    """1 + g + ... + g**(t-1) for g = exp(log_growth), exact at zero growth"""
+    flat = log_growth == 0
+    ratio = np.expm1(t * log_growth) / np.where(flat, 1.0, np.expm1(log_growth))
+    return np.where(flat, t, ratio)
+
+def sensitivity_grid(cash_balance, revenue, expenses, expense_cuts, revenue_growths,
+                     expense_growth=0.0, months=120):
+    """Months to zero and break-even month for every (expense cut, revenue growth) pair
+
+    expense_cuts and revenue_growths are 1-D arrays of fractions; results are
+    (len(expense_cuts), len(revenue_growths)) matrices matching
+    months_to_zero(forecast_balances(...)) and break_even_month(...) with
+    inf beyond months. Cells are evaluated in closed form rather than month
+    by month: cumulative cash is a difference of geometric sums, and since
+    monthly profit changes sign at most once, the balance falls over one
+    stretch of months in which the first negative month is found by
+    bisection.
+    """
+    cuts = np.asarray(expense_cuts, dtype=float)[:, None]
+    log_revenue = np.log1p(np.asarray(revenue_growths, dtype=float))[None, :]
+    log_expense = np.log1p(float(expense_growth))
+    revenue = float(revenue)
+    expenses = float(expenses) * (1 - cuts)
+    log_ratio = log_revenue - log_expense
+
+    def profitable(k):
+        """Whether month k (0-based) makes a profit"""
+        return revenue * np.exp(log_revenue * k) >= expenses * np.exp(log_expense * k)
+
+    def balance(t, log_revenue, expenses):
+        return cash_balance + revenue * _geometric_sum(log_revenue, t) - expenses * _geometric_sum(log_expense, t)
+
+    # First month whose profitability differs from month 0's, from logs and then corrected by one
+    # step either way, since rounding can land next to the exact month
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing = np.log(expenses / revenue) / log_ratio if revenue > 0 else np.full(log_ratio.shape, np.inf)
+    starts_profitable = profitable(0)
+    crossing = np.where(starts_profitable, np.floor(crossing) + 1, np.ceil(crossing))
+    crossing = np.where(np.isfinite(crossing) & (crossing > 0), crossing, months)
+    switch = np.minimum(crossing, months)
+    switch = np.where((switch > 1) & (profitable(switch - 1) != starts_profitable), switch - 1, switch)
+    switch = np.where((switch < months) & (profitable(switch) == starts_profitable), switch + 1, switch)
+
+    break_even = np.where(starts_profitable, 1.0, np.where(switch < months, switch + 1, np.inf))
+
+    # Cash falls while unprofitable: up to the switch when losing money first, after it otherwise
+    lo = np.where(starts_profitable, switch, 0.0)
+    hi = np.where(starts_profitable, float(months), np.maximum(switch, 1.0))
+    log_revenue, expenses = np.broadcast_arrays(log_revenue, expenses)
+    runs_out = (balance(hi, log_revenue, expenses) < 0) & (hi > lo)
+    months_to_zero = np.full(runs_out.shape, np.inf)
+    if cash_balance < 0:
+        # Starting below zero, a profitable first month may not be enough to climb out
+        months_to_zero[balance(1.0, log_revenue, expenses) < 0] = 1.0
+        runs_out &= np.isinf(months_to_zero)
+
+    # Bisect only the cells that run out, as flat arrays
+    cells = np.nonzero(runs_out)
+    lo, hi, log_revenue, expenses = lo[cells], hi[cells], log_revenue[cells], expenses[cells]
+    while True:
+        open_cells = hi - lo > 1
+        if not open_cells.any():
+            break
+        mid = np.floor((lo + hi) / 2)
+        below = balance(mid, log_revenue, expenses) < 0
+        hi = np.where(open_cells & below, mid, hi)
+        lo = np.where(open_cells & ~below, mid, lo)
+    months_to_zero[cells] = hi
+    return {
+        "expense_cut": cuts[:, 0],
+        "revenue_growth": np.asarray(revenue_growths, dtype=float),
+        "months_to_zero": months_to_zero,
+        "break_even": break_even,
+    }
+
+def safety_frontier(grid, min_months=6):
+    """Smallest expense cut per revenue growth rate that keeps cash for min_months, NaN if none does
+
+    Cash lasts longer with bigger cuts, so each column of the grid switches
+    from short to safe runway at most once.
+    """
+    safe = grid["months_to_zero"] > min_months
+    return np.where(safe.any(axis=0), grid["expense_cut"][safe.argmax(axis=0)], np.nan)
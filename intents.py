@@ -0,0 +1,381 @@
+import re
+
+import numpy as np
+
+from forecast import break_even_month, forecast_paths, months_to_zero
+from metrics import format_runway, metrics_snapshot, monthly_profit, profit_margin, runway_months
+
+HORIZON_MONTHS = 120
+DEFAULT_GROWTH_RATES = (0.03, 0.05, 0.10)
+
+# Words people use for the dashboard's expense categories
+CATEGORY_ALIASES = {
+    "marketing": ("marketing", "ads", "advertising", "ad spend", "promotion"),
+    "salaries": ("salaries", "salary", "payroll", "wages", "staff", "headcount"),
+    "operations": ("operations", "ops", "operating"),
+    "software": ("software", "saas", "tools", "subscriptions"),
+    "other": ("other", "misc", "miscellaneous"),
+}
+TOTAL_WORDS = ("expenses", "expense", "costs", "cost", "spending", "spend", "burn", "opex", "everything")
+
+CATEGORY_TIPS = {
+    "marketing": "Pause the lowest-return channels first and keep what demonstrably converts",
+    "salaries": "Freeze open roles and contractor renewals before touching existing staff",
+    "operations": "Renegotiate rent, logistics and vendor contracts on annual terms",
+    "software": "Audit seats and cancel unused or overlapping subscriptions",
+    "other": "Review one-off and miscellaneous spend line by line each month",
+}
+
+# ========== QUESTION PARSING ==========
+_VALUE = r"(?P<value>\$\s*\d[\d,]*(?:\.\d+)?\s*k?|\d+(?:\.\d+)?\s*(?:%|percent))"
+_PER_MONTH = r"(?P<monthly>\s*(?:a|per|each|every)\s+month|\s*monthly|\s*month[\s-]over[\s-]month|\s*mom\b)?"
+_TARGET = r"(?:my\s+|our\s+|the\s+)?(?P<what>[a-z][a-z ]*?)"
+
+_CUT_PATTERNS = [
+    re.compile(rf"\b(?:cut|cutting|reduce|reducing|lower|lowering|trim|trimming|slash|slashing|decrease|decreasing)\s+"
+               rf"{_TARGET}\s+(?:by\s+)?{_VALUE}"),
+    re.compile(rf"{_VALUE}\s+(?:cut|reduction|decrease|less)\s+(?:in|to|of|on)\s+{_TARGET}(?=[^a-z ]|$)"),
+    # Follow-on cuts sharing the verb: "cut payroll by $2k and marketing by 10%"
+    re.compile(rf"(?:,|\band)\s+{_TARGET}\s+(?:by\s+)?{_VALUE}"),
+]
+_REVENUE_PATTERNS = [
+    (1, re.compile(rf"\b(?:increase|raise|grow|boost|lift)\s+(?:my\s+|our\s+|the\s+)?(?:revenue|sales|income)\s+"
+                   rf"(?:by\s+)?{_VALUE}{_PER_MONTH}")),
+    (1, re.compile(rf"\b(?:revenue|sales|income)\s+(?:grows?|growing|increases?|increasing|rises?|goes up)\s+"
+                   rf"(?:by\s+)?{_VALUE}{_PER_MONTH}")),
+    (-1, re.compile(rf"\b(?:revenue|sales|income)\s+(?:drops?|dropping|falls?|falling|declines?|declining|shrinks?)\s+"
+                    rf"(?:by\s+)?{_VALUE}{_PER_MONTH}")),
+    (1, re.compile(rf"\b(?:with|at)\s+{_VALUE}\s+(?:monthly\s+)?(?:revenue\s+|sales\s+)?growth")),
+]
+_EXPENSE_GROWTH = re.compile(rf"\b(?:expenses|costs|spending)\s+(?:grow|increase|rise)\s+(?:by\s+)?{_VALUE}{_PER_MONTH}")
+_HORIZON = re.compile(r"\b(\d{1,3})[\s-]*months?\b")
+# Amounts restating a current figure, as in the quick actions: "my $12,000 in monthly expenses"
+_CURRENT_FIGURE = re.compile(rf"{_VALUE}\s+(?:in\s+)?(?:monthly\s+)?(?:revenue|sales|income|expenses|costs)\b")
+# Changes the local answers cannot model; a question making one goes to the model
+_UNMODELED = re.compile(r"\b(?:hir(?:e|es|ed|ing)|fir(?:e|es|ed|ing)|lay(?:ing)? off|laid off|layoffs?"
+                        r"|invest(?:s|ed|ing)?|buy(?:s|ing)?|bought|purchas(?:e|es|ed|ing)|acquir(?:e|es|ed|ing)"
+                        r"|borrow(?:s|ed|ing)?|loans?|raise (?:a round|funding|capital|money|prices?)"
+                        r"|pric(?:e|es|ing) (?:increase|change|cut|rise)s?)\b")
+
+_BREAK_EVEN = re.compile(r"\bbreak[\s-]?even\b|\b(?:become|be|get|turn|go)\s+profitable\b")
+_OPTIMIZE = re.compile(r"\boptimi[sz]e\b.*\b(?:expenses|costs|spend|spending|budget)\b"
+                       r"|\b(?:where|how)\b.*\b(?:cut|save|reduce)\b.*\b(?:expenses|costs|spend|spending)\b"
+                       r"|\bexpense (?:review|breakdown|optimi[sz]ation)\b")
+_GROWTH_PLAN = re.compile(r"\bgrowth plan\b|\bplan (?:to|for) grow")
+_RUNWAY = re.compile(r"\brunway\b|\bhow long\b.*\b(?:cash|money)\b.*\blast\b|\bmonths of cash\b"
+                     r"|\brun out of (?:cash|money)\b")
+_SNAPSHOT = re.compile(r"\b(?:what(?:'s| is| are)|how much is|show)\s+(?:my\s+|our\s+|the\s+)?"
+                       r"(?:profit margin|margin|monthly profit|profit|burn(?: rate)?|cash balance|key metrics|metrics)\b")
+_OPEN_ENDED = re.compile(r"\b(?:why|should|advice|ideas?|strateg(?:y|ies)|explain|compare)\b"
+                         r"|\bhow (?:can|could|do|would) (?:i|we)\b")
+
+def _parse_value(text):
+    """("percent", 0.2) for "20%", ("amount", 2000.0) for "$2k" """
+    text = text.replace(" ", "").lower()
+    if text.startswith("$"):
+        number = float(text[1:].rstrip("k").replace(",", ""))
+        return "amount", number * (1000 if text.endswith("k") else 1)
+    return "percent", float(re.sub(r"%|percent", "", text)) / 100
+
+def _resolve_target(words):
+    """Category key for the words after "cut", "total" for overall spend, or None"""
+    words = f" {words.strip()} "
+    for category, aliases in CATEGORY_ALIASES.items():
+        if any(f" {alias} " in words or f" {alias}s " in words for alias in aliases):
+            return category
+    if any(f" {word} " in words for word in TOTAL_WORDS):
+        return "total"
+    return None
+
+def parse_question(question):
+    """Turn a chat question into a structured query, or None when it needs the model
+
+    The query is a dict with an ``intent`` (scenario, break_even, optimize,
+    growth_plan, runway or snapshot) plus any parsed adjustments: expense
+    ``cuts`` per category, one-off ``revenue_change``, monthly
+    ``revenue_growth``/``expense_growth`` and a ``months`` horizon.
+    """
+    text = " ".join(question.lower().replace("’", "'").split())
+    query = {"cuts": [], "revenue_change": None, "revenue_growth": None, "expense_growth": None, "months": None}
+    consumed = [match.span() for match in _CURRENT_FIGURE.finditer(text)]
+
+    cuts = {}
+    for pattern in _CUT_PATTERNS:
+        for match in pattern.finditer(text):
+            target = _resolve_target(match.group("what"))
+            if target is not None:
+                cuts.setdefault(match.start("value"), (target, *_parse_value(match.group("value"))))
+                consumed.append(match.span())
+    query["cuts"] = [cuts[start] for start in sorted(cuts)]
+    for sign, pattern in _REVENUE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            consumed.append(match.span())
+            kind, value = _parse_value(match.group("value"))
+            if "monthly" in pattern.groupindex and match.group("monthly") or "growth" in match.group(0):
+                if kind == "percent":
+                    query["revenue_growth"] = sign * value
+            else:
+                query["revenue_change"] = (kind, sign * value)
+            break
+    match = _EXPENSE_GROWTH.search(text)
+    if match and match.group("monthly"):
+        kind, value = _parse_value(match.group("value"))
+        if kind == "percent":
+            query["expense_growth"] = value
+            consumed.append(match.span())
+    match = _HORIZON.search(text)
+    if match and 0 < int(match.group(1)) <= HORIZON_MONTHS:
+        query["months"] = int(match.group(1))
+        consumed.append(match.span())
+
+    # A number or change the parse left unused would be silently ignored by a local answer
+    rest = text
+    for start, end in consumed:
+        rest = rest[:start] + " " * (end - start) + rest[end:]
+    if re.search(r"\d", rest) or _UNMODELED.search(rest):
+        return None
+
+    adjusted = bool(query["cuts"] or query["revenue_change"])
+    if _OPTIMIZE.search(text) and not adjusted:
+        query["intent"] = "optimize"
+    elif _GROWTH_PLAN.search(text):
+        query["intent"] = "growth_plan"
+    elif _OPEN_ENDED.search(text) and not adjusted:
+        return None
+    elif _BREAK_EVEN.search(text):
+        query["intent"] = "break_even"
+    elif adjusted:
+        query["intent"] = "scenario"
+    elif _RUNWAY.search(text):
+        query["intent"] = "runway"
+    elif _SNAPSHOT.search(text):
+        query["intent"] = "snapshot"
+    else:
+        return None
+    return query
+
+# ========== LOCAL ANSWERS ==========
+def _money(value):
+    return f"-${-value:,.0f}" if value < 0 else f"${value:,.0f}"
+
+def _months(value):
+    return "never" if not np.isfinite(value) else f"month {value:.0f}"
+
+def _break_even(month):
+    if month == 1:
+        return "already profitable"
+    return f"not within {HORIZON_MONTHS // 12} years" if not np.isfinite(month) else f"month {month:.0f}"
+
+def _compare(describe, new, current):
+    return describe(new) if new == current else f"{describe(new)} (currently: {describe(current)})"
+
+def _cash_out(months):
+    if not np.isfinite(months):
+        return f"cash stays positive for the next {HORIZON_MONTHS // 12} years"
+    return f"cash runs out in month {months:.0f}"
+
+def _category_key(breakdown, category):
+    """Matching key of financial_data's breakdown, e.g. "salaries" -> "Salaries" """
+    for key in breakdown:
+        if _resolve_target(key.lower()) == category or key.lower() == category:
+            return key
+    return None
+
+def _apply_adjustments(query, revenue, expenses, breakdown):
+    """Revenue and expenses after the query's cuts and revenue change, plus a line per change"""
+    lines = []
+    new_revenue, new_expenses = revenue, expenses
+    for target, kind, value in query["cuts"]:
+        if target == "total":
+            saving = expenses * value if kind == "percent" else min(value, expenses)
+            label = "Total expenses"
+        else:
+            key = _category_key(breakdown, target)
+            if key is None:
+                lines.append(f"- No {target} spend recorded, so that cut was skipped")
+                continue
+            spend = breakdown[key]
+            saving = spend * value if kind == "percent" else min(value, spend)
+            label = f"{key}: {_money(spend)} → {_money(spend - saving)}"
+        new_expenses -= saving
+        lines.append(f"- {label} (saves {_money(saving)}/month)")
+    if query["revenue_change"]:
+        kind, value = query["revenue_change"]
+        change = revenue * value if kind == "percent" else value
+        new_revenue += change
+        lines.append(f"- Revenue: {_money(revenue)} → {_money(new_revenue)} ({'+' if change >= 0 else ''}{_money(change)}/month)")
+    return new_revenue, max(new_expenses, 0.0), lines
+
+def _growth(query, field):
+    return query[field] if query[field] is not None else 0.0
+
+def _figures(metrics):
+    return metrics["cash_balance"], metrics["revenue"], metrics["expenses"]
+
+def _answer_scenario(query, metrics):
+    cash_balance, revenue, expenses = _figures(metrics)
+    new_revenue, new_expenses, lines = _apply_adjustments(query, revenue, expenses, metrics["category_spend"])
+    revenue_growth, expense_growth = _growth(query, "revenue_growth"), _growth(query, "expense_growth")
+    paths = forecast_paths(cash_balance, [revenue, new_revenue], [expenses, new_expenses],
+                           HORIZON_MONTHS, revenue_growth, expense_growth)
+    cash_out = months_to_zero(paths["balance"])
+    break_even = break_even_month([revenue, new_revenue], [expenses, new_expenses], revenue_growth, expense_growth)
+    return "\n".join([
+        "**Scenario (calculated from your dashboard numbers):**",
+        "",
+        *lines,
+        f"- Monthly expenses: {_money(expenses)} → {_money(new_expenses)}",
+        f"- Monthly profit: {_money(metrics['monthly_profit'])} → {_money(monthly_profit(new_revenue, new_expenses))}",
+        f"- Profit margin: {metrics['profit_margin']:.1f}% → {profit_margin(new_revenue, new_expenses):.1f}%",
+        f"- Cash runway: {format_runway(metrics['runway_months'])} → "
+        f"**{format_runway(runway_months(cash_balance, new_expenses))}**",
+        f"- Forecast: {_compare(_cash_out, cash_out[1], cash_out[0])}",
+        f"- Break-even: {_compare(_break_even, break_even[1], break_even[0])}",
+    ])
+
+def _answer_runway(query, metrics):
+    cash_balance, revenue, expenses = _figures(metrics)
+    runway = metrics["runway_months"]
+    balances = forecast_paths(cash_balance, revenue, expenses, HORIZON_MONTHS,
+                              _growth(query, "revenue_growth"), _growth(query, "expense_growth"))["balance"]
+    status = ("✅ **Healthy:** no expenses to burn through" if not np.isfinite(runway)
+              else "✅ **Healthy:** above 6 months" if runway >= 6
+              else "⚠️ **Caution:** 3-6 months" if runway >= 3 else "🚨 **Critical:** under 3 months")
+    return "\n".join([
+        "**Your cash runway:**",
+        "",
+        f"- Cash balance {_money(cash_balance)} covers **{runway:.1f} months** of {_money(expenses)} expenses"
+        if np.isfinite(runway) else f"- No expenses recorded, so your {_money(cash_balance)} cash balance is not being spent",
+        f"- At {_money(metrics['monthly_profit'])}/month profit, {_cash_out(months_to_zero(balances)[0])}",
+        f"- {status}",
+    ])
+
+def _answer_break_even(query, metrics):
+    cash_balance, revenue, expenses = _figures(metrics)
+    profit = metrics["monthly_profit"]
+    if profit >= 0 and query["expense_growth"] is None:
+        return "\n".join([
+            "**You're already at or above break-even:**",
+            "",
+            f"- Monthly profit: {_money(profit)} ({metrics['profit_margin']:.1f}% margin)",
+            f"- Expenses could rise {_money(profit)}/month before you'd lose money",
+        ])
+    rates = ((query["revenue_growth"],) if query["revenue_growth"] is not None else DEFAULT_GROWTH_RATES)
+    expense_growth = _growth(query, "expense_growth")
+    break_even = break_even_month(revenue, expenses, rates, expense_growth)
+    cash_out = months_to_zero(forecast_paths(cash_balance, revenue, expenses, HORIZON_MONTHS,
+                                             rates, expense_growth)["balance"])
+    gap = metrics["net_burn"]
+    lines = ["**Break-even analysis:**", ""]
+    if gap > 0:
+        lines += [
+            f"- You're losing {_money(gap)}/month today",
+            f"- Break even now by adding {_money(gap)}/month revenue (+{gap / revenue * 100:.1f}%)"
+            if revenue > 0 else f"- Break even now by adding {_money(gap)}/month revenue",
+            f"- Or by cutting {_money(gap)}/month of expenses (-{gap / expenses * 100:.1f}%)",
+        ]
+    lines += ["", "| Monthly revenue growth | Break-even | Cash runs out |", "|---|---|---|"]
+    for rate, month, out in zip(rates, break_even, cash_out):
+        warning = " ⚠️" if out < month else ""
+        lines.append(f"| {rate * 100:.1f}% | {_months(month)}{warning} | {_months(out)} |")
+    if np.any(cash_out < break_even):
+        lines += ["", "⚠️ Cash runs out before break-even in the flagged scenarios."]
+    return "\n".join(lines)
+
+def _answer_optimize(query, metrics):
+    cash_balance, revenue, expenses = _figures(metrics)
+    ranked = sorted(((spend, key) for key, spend in metrics["category_spend"].items() if spend > 0), reverse=True)
+    if not ranked:
+        return None
+    lines = [
+        f"**Expense optimization for {_money(expenses)}/month:**",
+        "",
+        "| Category | Monthly | Share | 10% cut saves | Runway after cut |",
+        "|---|---|---|---|---|",
+    ]
+    total = sum(spend for spend, _ in ranked)
+    for spend, key in ranked:
+        lines.append(f"| {key} | {_money(spend)} | {spend / total * 100:.0f}% | {_money(spend * 0.1)} | "
+                     f"{format_runway(runway_months(cash_balance, expenses - spend * 0.1))} |")
+    top = ranked[:2]
+    saving = sum(spend for spend, _ in top) * 0.1
+    lines += [
+        "",
+        f"- Cutting {' and '.join(key for _, key in top)} by 10% saves **{_money(saving)}/month**, "
+        f"taking runway from {format_runway(metrics['runway_months'])} to "
+        f"{format_runway(runway_months(cash_balance, expenses - saving))} and margin from "
+        f"{metrics['profit_margin']:.1f}% to {profit_margin(revenue, expenses - saving):.1f}%",
+    ]
+    gap = metrics["net_burn"]
+    if gap > 0:
+        lines.append(f"- Breaking even on expenses alone needs {_money(gap)}/month of cuts "
+                     f"({gap / expenses * 100:.1f}% of spend)")
+    tips = [(key, CATEGORY_TIPS[_resolve_target(key.lower())]) for _, key in ranked
+            if _resolve_target(key.lower()) in CATEGORY_TIPS]
+    if tips:
+        lines += ["", "**Where to look first:**"]
+        lines += [f"{i}. **{key}:** {tip}" for i, (key, tip) in enumerate(tips[:3], start=1)]
+    return "\n".join(lines)
+
+def _answer_growth_plan(query, metrics):
+    cash_balance, revenue, expenses = _figures(metrics)
+    months = query["months"] or 6
+    rates = ((query["revenue_growth"],) if query["revenue_growth"] is not None else DEFAULT_GROWTH_RATES)
+    expense_growth = _growth(query, "expense_growth")
+    paths = forecast_paths(cash_balance, revenue, expenses, months, rates, expense_growth)
+    profit = paths["revenue"] - paths["expenses"]
+    lines = [
+        f"**{months}-month growth plan from {_money(revenue)}/month revenue:**",
+        "",
+        f"| Monthly growth | Month {months} revenue | Month {months} profit | Cumulative profit | Cash at month {months} |",
+        "|---|---|---|---|---|",
+    ]
+    for i, rate in enumerate(rates):
+        lines.append(f"| {rate * 100:.1f}% | {_money(paths['revenue'][i, -1])} | {_money(profit[i, -1])} | "
+                     f"{_money(profit[i].sum())} | {_money(paths['balance'][i, -1])} |")
+    target = len(rates) // 2
+    milestones = ", ".join(f"M{m + 1}: {_money(v)}" for m, v in enumerate(paths["revenue"][target]))
+    lines += [
+        "",
+        f"**Monthly revenue targets at {rates[target] * 100:.1f}% growth:** {milestones}",
+        f"- That is {_money(paths['revenue'][target, -1] - revenue)}/month of new revenue by month {months}",
+    ]
+    if revenue < expenses:
+        break_even = break_even_month(revenue, expenses, rates, expense_growth)
+        lines.append("- Break-even: " + ", ".join(f"{_months(m)} at {r * 100:.1f}%" for r, m in zip(rates, break_even)))
+    return "\n".join(lines)
+
+def _answer_snapshot(query, metrics):
+    cash_balance, revenue, expenses = _figures(metrics)
+    return "\n".join([
+        "**Your key metrics:**",
+        "",
+        f"- Monthly revenue: {_money(revenue)}",
+        f"- Monthly expenses (burn): {_money(expenses)}",
+        f"- Monthly profit: {_money(metrics['monthly_profit'])}",
+        f"- Profit margin: {metrics['profit_margin']:.1f}%",
+        f"- Cash balance: {_money(cash_balance)}",
+        f"- Cash runway: {format_runway(metrics['runway_months'])}",
+    ])
+
+_ANSWERS = {
+    "scenario": _answer_scenario,
+    "runway": _answer_runway,
+    "break_even": _answer_break_even,
+    "optimize": _answer_optimize,
+    "growth_plan": _answer_growth_plan,
+    "snapshot": _answer_snapshot,
+}
+
+def answer_locally(question, financial_context=None):
+    """Answer arithmetic questions from the dashboard metrics, or None to defer to the model"""
+    if not financial_context:
+        return None
+    query = parse_question(question)
+    if query is None:
+        return None
+    metrics = metrics_snapshot({**financial_context,
+                                **{field: float(financial_context[field])
+                                   for field in ("revenue", "expenses", "cash_balance")}})
+    return _ANSWERS[query["intent"]](query, metrics)
@@ -0,0 +1,372 @@
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from categorize import Categorizer, clean_rules, merchant_key
+from config import DATA_DIR
+
+CHUNK_ROWS = 100_000
+
+LEDGER_SCHEMA = pa.schema([
+    ("date", pa.date32()),
+    ("amount", pa.float64()),
+    ("category", pa.dictionary(pa.int32(), pa.string())),
+    ("description", pa.string()),
+])
+
+# Lower-cased header names seen in common bank exports
+COLUMN_ALIASES = {
+    "date": ("date", "transaction date", "posted date", "posting date", "booking date", "value date"),
+    "amount": ("amount", "transaction amount"),
+    "debit": ("debit", "withdrawal", "withdrawals", "money out", "paid out"),
+    "credit": ("credit", "deposit", "deposits", "money in", "paid in"),
+    "category": ("category",),
+    "description": ("description", "memo", "details", "narrative", "payee", "merchant", "name"),
+}
+
+# ========== STORE LAYOUT ==========
+def ledger_dir(company_name):
+    """Directory holding one company's transaction store"""
+    slug = re.sub(r"[^a-z0-9]+", "-", str(company_name).lower()).strip("-") or "default"
+    return os.path.join(DATA_DIR, "ledger", slug)
+
+def _load_manifest(store):
+    path = os.path.join(store, "_manifest.json")
+    if not os.path.exists(path):
+        return {"parts": [], "coverage": []}
+    with open(path) as f:
+        return json.load(f)
+
+def _save_manifest(store, manifest):
+    path = os.path.join(store, "_manifest.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def _part_paths(store, manifest):
+    return [os.path.join(store, part["file"]) for part in manifest["parts"]]
+
+def load_rules(company_name):
+    """The company's categorization rules as a list of {"pattern", "category"} dicts"""
+    path = os.path.join(ledger_dir(company_name), "_rules.json")
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def save_rules(company_name, rules):
+    """Store the company's categorization rules; returns the merchants whose category may have changed"""
+    store = ledger_dir(company_name)
+    os.makedirs(store, exist_ok=True)
+    rules = [{"pattern": pattern, "category": category} for pattern, category in clean_rules(rules)]
+    path = os.path.join(store, "_rules.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(rules, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return categorizer(company_name).update_rules(rules)
+
+# One categorizer per company, shared by every session so its merchant memo outlives reruns
+_categorizers = {}
+_categorizers_lock = threading.Lock()
+
+def categorizer(company_name):
+    """The company's categorizer, loaded with its stored rules on first use"""
+    store = ledger_dir(company_name)
+    with _categorizers_lock:
+        engine = _categorizers.get(store)
+        if engine is None:
+            engine = _categorizers[store] = Categorizer(load_rules(company_name))
+        return engine
+
+def _merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+# ========== PARSING ==========
+def _iter_xlsx_chunks(source):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == CHUNK_ROWS:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        wb.close()
+
+def _iter_chunks(source, filename=None):
+    name = (filename or getattr(source, "name", None) or str(source)).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        return _iter_xlsx_chunks(source)
+    return pd.read_csv(source, chunksize=CHUNK_ROWS)
+
+def _to_number(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    cleaned = (values.astype(str)
+               .str.replace(r"[,$\s]", "", regex=True)
+               .str.replace(r"^\((.*)\)$", r"-\1", regex=True))
+    return pd.to_numeric(cleaned, errors="coerce")
+
+def _normalize_chunk(df):
+    """Map a raw export chunk onto the date/amount/category/description columns"""
+    columns = {str(c).strip().lower(): c for c in df.columns}
+
+    def pick(field):
+        for alias in COLUMN_ALIASES[field]:
+            if alias in columns:
+                return df[columns[alias]]
+        return None
+
+    dates = pick("date")
+    if dates is None:
+        raise ValueError("Bank export has no date column")
+
+    amount = pick("amount")
+    if amount is not None:
+        amount = _to_number(amount)
+    else:
+        debit, credit = pick("debit"), pick("credit")
+        if debit is None and credit is None:
+            raise ValueError("Bank export has no amount or debit/credit columns")
+        amount = pd.Series(0.0, index=df.index)
+        if credit is not None:
+            amount = amount + _to_number(credit).fillna(0).abs()
+        if debit is not None:
+            amount = amount - _to_number(debit).fillna(0).abs()
+
+    category = pick("category")
+    description = pick("description")
+    out = pd.DataFrame({
+        "date": pd.to_datetime(dates, errors="coerce").dt.normalize(),
+        "amount": amount,
+        "category": "Uncategorized" if category is None else category.fillna("Uncategorized").astype(str),
+        "description": "" if description is None else description.fillna("").astype(str),
+    })
+    return out.dropna(subset=["date", "amount"])
+
+def _row_hashes(df):
+    return pd.util.hash_pandas_object(df[["date", "amount", "description"]], index=False).to_numpy()
+
+# ========== INGESTION ==========
+def ingest_transactions(source, company_name, filename=None):
+    """Stream a CSV/XLSX bank export into the company's columnar store
+
+    The export is read CHUNK_ROWS at a time and appended as row groups of a
+    new Parquet part, so memory stays flat regardless of file size. Rows
+    dated inside a previously uploaded period are matched by date, amount
+    and description against the stored rows of the same days, so
+    re-uploading an overlapping export only appends what is new while a
+    second account's export over the same months is kept in full. The
+    appended rows' monthly totals are added to the company's actuals.
+    """
+    from actuals import add_monthly_totals
+
+    store = ledger_dir(company_name)
+    os.makedirs(store, exist_ok=True)
+    manifest = _load_manifest(store)
+
+    coverage = [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in manifest["coverage"]]
+    stored_rows = Counter()
+    loaded_days = set()
+    dataset = None
+
+    part_name = f"part-{len(manifest['parts']):05d}.parquet"
+    part_path = os.path.join(store, part_name)
+    stats = {"rows_read": 0, "rows_appended": 0, "min_date": None, "max_date": None}
+    engine = categorizer(company_name)
+    appended_totals = empty_monthly_totals()
+    writer = None
+    try:
+        for raw in _iter_chunks(source, filename):
+            chunk = _normalize_chunk(raw)
+            if chunk.empty:
+                continue
+            stats["rows_read"] += len(chunk)
+            low, high = chunk["date"].min(), chunk["date"].max()
+            stats["min_date"] = low if stats["min_date"] is None else min(stats["min_date"], low)
+            stats["max_date"] = high if stats["max_date"] is None else max(stats["max_date"], high)
+
+            covered = pd.Series(False, index=chunk.index)
+            for start, end in coverage:
+                covered |= chunk["date"].between(start, end)
+            if covered.any():
+                days = set(chunk.loc[covered, "date"].unique()) - loaded_days
+                if days:
+                    if dataset is None:
+                        import pyarrow.dataset as ds  # slow to import, and only needed when re-uploading
+
+                        dataset = ds.dataset(_part_paths(store, manifest), format="parquet")
+                    stored = dataset.to_table(
+                        columns=["date", "amount", "description"],
+                        filter=ds.field("date").isin(pa.array([d.date() for d in days], pa.date32())),
+                    )
+                    stored_rows.update(_row_hashes(stored.to_pandas(date_as_object=False)
+                                                   .astype({"date": "datetime64[ns]"})))
+                    loaded_days |= days
+                keep = pd.Series(True, index=chunk.index)
+                for index, row_hash in zip(chunk.index[covered], _row_hashes(chunk[covered])):
+                    if stored_rows[row_hash] > 0:
+                        stored_rows[row_hash] -= 1
+                        keep[index] = False
+                chunk = chunk[keep]
+            if chunk.empty:
+                continue
+
+            if writer is None:
+                writer = pq.ParquetWriter(part_path + ".tmp", LEDGER_SCHEMA, compression="zstd")
+            writer.write_table(pa.Table.from_pandas(chunk, schema=LEDGER_SCHEMA, preserve_index=False))
+            stats["rows_appended"] += len(chunk)
+            appended_totals = accumulate_monthly_totals(appended_totals, chunk.assign(
+                category=engine.categorize(chunk["description"], fallback=chunk["category"])))
+    except Exception:
+        if writer is not None:
+            writer.close()
+            os.remove(part_path + ".tmp")
+        raise
+
+    if writer is not None:
+        writer.close()
+        os.replace(part_path + ".tmp", part_path)
+        manifest["parts"].append({"file": part_name, "rows": stats["rows_appended"]})
+    if stats["min_date"] is not None:
+        manifest["coverage"] = [
+            [start.isoformat(), end.isoformat()]
+            for start, end in _merge_intervals(coverage + [(stats["min_date"], stats["max_date"])])
+        ]
+        _save_manifest(store, manifest)
+    if stats["rows_appended"]:
+        add_monthly_totals(company_name, appended_totals, rows=stats["rows_appended"])
+    return stats
+
+# ========== QUERIES ==========
+def iter_transaction_batches(company_name, columns=None):
+    """Yield the stored transactions as pyarrow record batches"""
+    store = ledger_dir(company_name)
+    for path in _part_paths(store, _load_manifest(store)):
+        yield from pq.ParquetFile(path).iter_batches(columns=columns)
+
+def iter_categorized_batches(company_name, columns=None):
+    """Stored transactions with the bank's category replaced by the company's categorizer
+
+    columns must include description and category.
+    """
+    engine = categorizer(company_name)
+    for batch in iter_transaction_batches(company_name, columns):
+        index = batch.schema.get_field_index("category")
+        categories = engine.categorize(batch.column("description"), fallback=batch.column(index))
+        yield batch.set_column(index, "category", pa.array(categories, pa.string()).dictionary_encode())
+
+def transaction_count(company_name):
+    """Number of stored transactions"""
+    return sum(part["rows"] for part in _load_manifest(ledger_dir(company_name))["parts"])
+
+def empty_monthly_totals():
+    return pd.DataFrame(columns=["revenue", "expenses"], dtype=float,
+                        index=pd.MultiIndex.from_arrays([[], []], names=["month", "category"]))
+
+def accumulate_monthly_totals(totals, batch):
+    """Fold one batch of transactions into running monthly inflow/outflow per category"""
+    df = batch if isinstance(batch, pd.DataFrame) else batch.to_pandas(date_as_object=False)
+    part = pd.DataFrame({
+        "month": pd.to_datetime(df["date"]).to_numpy().astype("datetime64[M]"),
+        "category": df["category"],
+        "revenue": df["amount"].clip(lower=0),
+        "expenses": (-df["amount"]).clip(lower=0),
+    }).groupby(["month", "category"], observed=True).sum()
+    # Categories differ per batch, so align on plain strings after grouping
+    part.index = part.index.set_levels(part.index.levels[1].astype(str), level="category")
+    return part if totals is None or totals.empty else totals.add(part, fill_value=0)
+
+def monthly_merchant_totals(company_name):
+    """Monthly inflow/outflow per merchant and bank category, aggregated batch by batch
+
+    Categories are applied afterwards by categorized_totals, so editing a
+    rule regroups these totals instead of rereading the transactions.
+    """
+    parts = []
+    for batch in iter_transaction_batches(company_name, columns=["date", "amount", "category", "description"]):
+        descriptions = pc.dictionary_encode(batch.column("description"))
+        merchants = [merchant_key(d) for d in descriptions.dictionary.to_pylist()]
+        codes, merchants = pd.factorize(pd.Series(merchants, dtype=object))
+        df = batch.select(["date", "amount", "category"]).to_pandas(date_as_object=False)
+        parts.append(pd.DataFrame({
+            "month": pd.to_datetime(df["date"]).to_numpy().astype("datetime64[M]"),
+            "merchant": pd.Categorical.from_codes(codes[descriptions.indices.to_numpy()], merchants),
+            "category": df["category"].astype(str),
+            "revenue": df["amount"].clip(lower=0),
+            "expenses": (-df["amount"]).clip(lower=0),
+        }).groupby(["month", "merchant", "category"], observed=True).sum())
+    if not parts:
+        return pd.DataFrame(columns=["revenue", "expenses"], dtype=float,
+                            index=pd.MultiIndex.from_arrays([[], [], []], names=["month", "merchant", "category"]))
+    # Merchants differ per batch, so align on plain strings before combining
+    totals = pd.concat(parts)
+    totals.index = totals.index.set_levels(totals.index.levels[1].astype(str), level="merchant")
+    return totals.groupby(level=["month", "merchant", "category"]).sum()
+
+def categorized_totals(merchant_totals, engine):
+    """Monthly inflow/outflow per category from monthly_merchant_totals"""
+    if merchant_totals.empty:
+        return empty_monthly_totals()
+    index = merchant_totals.index
+    category = engine.categorize(index.get_level_values("merchant"), fallback=index.get_level_values("category"))
+    return merchant_totals.groupby([index.get_level_values("month"), pd.Index(category, name="category")]).sum()
+
+def merchant_categories(merchant_totals, engine):
+    """Category of each distinct (merchant, bank category) pair in monthly_merchant_totals"""
+    pairs = merchant_totals.index.droplevel("month").unique()
+    return pd.Series(engine.categorize(pairs.get_level_values("merchant"), fallback=pairs.get_level_values("category")),
+                     index=pairs, dtype=object)
+
+def unmatched_merchants(merchant_totals, engine, limit=5):
+    """Merchants no rule or keyword matches, largest monthly spend first"""
+    if merchant_totals.empty:
+        return {}
+    spend = merchant_totals["expenses"].groupby(level="merchant").sum()
+    spend = spend[spend > 0]
+    matched = engine.categorize_unique(spend.index.to_numpy(dtype=object))
+    spend = spend[np.equal(matched, None)].sort_values(ascending=False)[:limit]
+    months = merchant_totals.index.get_level_values("month").nunique()
+    return {merchant: float(value / months) for merchant, value in spend.items()}
+
+def monthly_totals(company_name):
+    """Monthly inflow/outflow per category, using the company's categorization rules"""
+    return categorized_totals(monthly_merchant_totals(company_name), categorizer(company_name)).sort_index()
+
+def derive_financials(totals, months=3):
+    """Average monthly revenue, expenses and expense split over the latest months"""
+    if totals.empty:
+        return None
+    recent = totals.index.get_level_values("month").unique().sort_values()[-months:]
+    window = totals[totals.index.get_level_values("month").isin(recent)]
+    by_category = window["expenses"].groupby(level="category").sum() / len(recent)
+    by_category = by_category[by_category > 0].sort_values(ascending=False)
+    return {
+        "revenue": float(window["revenue"].sum() / len(recent)),
+        "expenses": float(window["expenses"].sum() / len(recent)),
+        "expense_breakdown": {category: float(value) for category, value in by_category.items()},
+        "months": [month.strftime("%Y-%m") for month in recent],
+    }
@@ -0,0 +1,175 @@
+import random
+import threading
+import time
+
+from config import LLM_URL, LLM_API_KEY, LLM_MODEL
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+class LLMError(Exception):
+    """The model backend could not produce an answer"""
+
+class CircuitOpenError(LLMError):
+    """Calls are short-circuited while the backend is failing"""
+
+# ========== CIRCUIT BREAKER ==========
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through after a cooldown"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+# ========== POOLED CLIENT ==========
+class LLMClient:
+    """Chat-completions client sharing one pooled session across all callers
+
+    Each call is bounded by connect/read timeouts, retried with jittered
+    exponential backoff on transient failures, limited to max_concurrency
+    in-flight requests, and short-circuited while the breaker is open.
+    """
+
+    def __init__(self, url=LLM_URL, api_key=LLM_API_KEY, model=LLM_MODEL, connect_timeout=3.05,
+                 read_timeout=30.0, max_retries=2, backoff_base=0.5, backoff_cap=4.0,
+                 max_concurrency=8, queue_timeout=2.0, pool_size=16, breaker=None):
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        # requests is imported on first use so importing this module stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Content-Type"] = "application/json"
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self._stats_lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _backoff(self, attempt):
+        time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt)))
+
+    def _post(self, payload):
+        import requests
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+                self._backoff(attempt - 1)
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                continue
+            except requests.RequestException as e:
+                raise LLMError(f"Request to backend failed: {e}") from e
+            if response.status_code in RETRYABLE_STATUS:
+                last_error = LLMError(f"Backend returned HTTP {response.status_code}")
+                continue
+            if not response.ok:
+                raise LLMError(f"Backend returned HTTP {response.status_code}: {response.text[:200]}")
+            try:
+                return response.json()["choices"][0]["message"]["content"]
+            except (ValueError, KeyError, IndexError) as e:
+                raise LLMError("Malformed response from backend") from e
+        raise LLMError(f"Backend unavailable after {self.max_retries + 1} attempts: {last_error}")
+
+    def chat(self, messages, **options):
+        """Send chat messages and return the assistant's reply text"""
+        # The slot is taken first: a half-open breaker's trial call must not be lost waiting for one
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise LLMError("Too many concurrent model requests")
+        try:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Model backend is temporarily unavailable")
+            self._count("calls")
+            try:
+                content = self._post({"model": self.model, "messages": messages, **options})
+            except Exception as e:
+                # Any failure must settle the breaker, or a half-open trial would stay in flight forever
+                self._count("failures")
+                self.breaker.record_failure()
+                if isinstance(e, LLMError):
+                    raise
+                raise LLMError(f"Model request failed: {e}") from e
+        finally:
+            self._slots.release()
+        self.breaker.record_success()
+        return content
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "breaker": self.breaker.state,
+        }
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Process-wide client, shared by every Streamlit session on this server"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
+
+def backend_configured():
+    """True when there is a backend to call: an API key, or a keyless local URL such as the stub"""
+    return bool(LLM_API_KEY) or LLM_URL.startswith(("http://127.0.0.1", "http://localhost"))
@@ -0,0 +1,146 @@
+import math
+import threading
+
+from cache import LRUCache
+
+# ========== DASHBOARD METRICS ==========
+# Default split of monthly expenses used until real categories are entered
+DEFAULT_EXPENSE_SPLIT = {
+    "Marketing": 0.2,
+    "Salaries": 0.4,
+    "Operations": 0.2,
+    "Software": 0.1,
+    "Other": 0.1,
+}
+
+# Figures every new session starts from
+DEFAULT_FINANCIAL_DATA = {
+    "revenue": 15000,
+    "expenses": 12000,
+    "cash_balance": 50000,
+    "company_name": "Your Business",
+}
+
+def monthly_profit(revenue, expenses):
+    return revenue - expenses
+
+def profit_margin(revenue, expenses):
+    """Profit as a percentage of revenue, 0 without revenue"""
+    return (revenue - expenses) / revenue * 100 if revenue > 0 else 0
+
+def runway_months(cash_balance, expenses):
+    """Months of expenses the cash balance covers, infinite without expenses"""
+    return cash_balance / expenses if expenses > 0 else math.inf
+
+def format_runway(months):
+    """'8.3 months', or 'No burn' for the infinite runway of a company without expenses"""
+    return f"{months:.1f} months" if math.isfinite(months) else "No burn"
+
+def expense_breakdown(financial_data):
+    """Spend per category, falling back to the default split of total expenses"""
+    breakdown = financial_data.get("expense_breakdown")
+    if breakdown:
+        return dict(breakdown)
+    return {category: int(financial_data["expenses"] * share)
+            for category, share in DEFAULT_EXPENSE_SPLIT.items()}
+
+def net_burn(revenue, expenses):
+    """Cash lost per month, 0 when profitable"""
+    return max(expenses - revenue, 0)
+
+# ========== METRICS MODEL ==========
+class MetricsModel:
+    """Financial inputs and the KPIs derived from them, as a dependency graph
+
+    Derived values are computed when first read and cached. Updating an
+    input marks only the values that depend on it, directly or through
+    other derived values, as dirty; they are recomputed on their next read.
+    Formulas are registered with @MetricsModel.derived(*dependencies).
+    Each company keeps one long-lived model, see metrics_snapshot.
+    """
+
+    INPUTS = ("revenue", "expenses", "cash_balance", "expense_breakdown")
+    _formulas = {}
+    _dependents = {}
+
+    def __init__(self, **inputs):
+        self._values = dict.fromkeys(self.INPUTS)
+        self._dirty = set(self._formulas)
+        self.recomputes = 0
+        self.update(**inputs)
+
+    @classmethod
+    def derived(cls, *dependencies):
+        """Register the decorated function as a derived value named after it"""
+        def decorator(fn):
+            cls._formulas[fn.__name__] = (fn, dependencies)
+            for dependency in dependencies:
+                cls._dependents.setdefault(dependency, []).append(fn.__name__)
+            return fn
+        return decorator
+
+    def update(self, **inputs):
+        """Set inputs; values depending on a changed input are marked dirty"""
+        for name, value in inputs.items():
+            if name not in self.INPUTS:
+                raise KeyError(f"Unknown metrics input: {name}")
+            if self._values[name] != value:
+                # Copied so a caller editing its breakdown in place can't change the input behind our back
+                self._values[name] = dict(value) if isinstance(value, dict) else value
+                self._mark_dirty(name)
+        return self
+
+    def _mark_dirty(self, name):
+        stack = list(self._dependents.get(name, ()))
+        while stack:
+            dependent = stack.pop()
+            if dependent not in self._dirty:
+                self._dirty.add(dependent)
+                stack.extend(self._dependents.get(dependent, ()))
+
+    def __getitem__(self, name):
+        if name in self._dirty:
+            fn, dependencies = self._formulas[name]
+            self._values[name] = fn(*(self[dependency] for dependency in dependencies))
+            self._dirty.discard(name)
+            self.recomputes += 1
+        return self._values[name]
+
+    def snapshot(self):
+        """Every input and derived value as a plain dict, nested dicts copied"""
+        values = {name: self[name] for name in (*self.INPUTS, *self._formulas)}
+        return {name: dict(value) if isinstance(value, dict) else value for name, value in values.items()}
+
+MetricsModel.derived("revenue", "expenses")(monthly_profit)
+MetricsModel.derived("revenue", "expenses")(profit_margin)
+MetricsModel.derived("cash_balance", "expenses")(runway_months)
+MetricsModel.derived("revenue", "expenses")(net_burn)
+
+@MetricsModel.derived("expenses", "expense_breakdown")
+def category_spend(expenses, breakdown):
+    """Spend per category, falling back to the default split of total expenses"""
+    return expense_breakdown({"expenses": expenses, "expense_breakdown": breakdown})
+
+@MetricsModel.derived("category_spend")
+def largest_expense(spend):
+    """Category with the highest spend, None without categories"""
+    return max(spend, key=spend.get) if spend else None
+
+# ========== COMPANY MODELS ==========
+_models = LRUCache(max_entries=1024)
+_models_lock = threading.Lock()
+
+def metrics_snapshot(financial_data):
+    """Every input and KPI for financial_data, read from the company's long-lived MetricsModel
+
+    The company's model is updated with these inputs, so only the KPIs
+    depending on a figure that changed since its last read are recomputed.
+    """
+    name = financial_data.get("company_name") or DEFAULT_FINANCIAL_DATA["company_name"]
+    inputs = {field: financial_data.get(field) for field in MetricsModel.INPUTS}
+    with _models_lock:
+        model = _models.get(name)
+        if model is None:
+            model = MetricsModel()
+            _models.set(name, model)
+        return model.update(**inputs).snapshot()
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from artifacts import build_report, cached_report
+
+# Builds run on a small shared pool, so a month-end rush of exports queues up
+# instead of occupying the script threads that serve interactive reruns
+REPORT_WORKERS = int(os.environ.get("UXXCA_REPORT_WORKERS", "2"))
+MAX_PENDING_JOBS = int(os.environ.get("UXXCA_REPORT_QUEUE", "32"))
+FINISHED_JOBS_KEPT = 256
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+class JobCancelled(Exception):
+    """Raised inside a build when its job has been cancelled"""
+
+class JobQueueFull(RuntimeError):
+    pass
+
+# ========== JOBS ==========
+class ReportJob:
+    """One report build: status, progress and the finished report's path"""
+
+    def __init__(self, key, waiter):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.status = QUEUED
+        self.progress = 0.0
+        self.stage = "Waiting for a free worker"
+        self.path = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        # Ids of the sessions waiting on this job; it is only cancelled once all of them have cancelled
+        self.waiters = {waiter}
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def report_progress(self, fraction, stage):
+        """Progress callback handed to the build; raises JobCancelled once the job is cancelled"""
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+        self.progress = fraction
+        self.stage = stage
+
+    def _finish(self, status, path=None, error=None):
+        self.status = status
+        self.path = path
+        self.error = error
+        self.finished = time.time()
+        if status == DONE:
+            self.progress = 1.0
+
+class ReportJobQueue:
+    """Bounded pool of report builds with job ids, progress, cancellation and deduplication
+
+    A request for a report that is already cached finishes immediately; one
+    for a report that is already queued or building joins that job instead
+    of starting another. Finished reports land in the artifact cache.
+    """
+
+    def __init__(self, workers=REPORT_WORKERS, max_pending=MAX_PENDING_JOBS):
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-job")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._in_flight = {}
+        self.deduplicated = 0
+
+    def submit(self, key, build, waiter):
+        """Queue build(path, progress) for the report key on behalf of the waiter session and return its job"""
+        with self._lock:
+            job = self._in_flight.get(key)
+            if job is not None:
+                # A session clicking again is still one waiter
+                if waiter not in job.waiters:
+                    job.waiters.add(waiter)
+                    self.deduplicated += 1
+                return job
+            job = ReportJob(key, waiter)
+            path = cached_report(key)
+            if path:
+                job._finish(DONE, path=path)
+            else:
+                if len(self._in_flight) >= self.max_pending:
+                    raise JobQueueFull(f"{len(self._in_flight)} reports are already being built; try again shortly")
+                self._in_flight[key] = job
+                job._future = self._pool.submit(self._run, job, build)
+            self._remember(job)
+            return job
+
+    def _remember(self, job):
+        self._jobs[job.id] = job
+        while len(self._jobs) > FINISHED_JOBS_KEPT:
+            oldest = next((j for j in self._jobs.values() if not j.active), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest.id]
+
+    def _run(self, job, build):
+        job.status = RUNNING
+        job.started = time.time()
+        try:
+            job.report_progress(0.0, "Starting")
+            path = build_report(job.key, lambda path: build(path, job.report_progress))
+            job._finish(DONE, path=path)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job._finish(FAILED, error=f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id, waiter):
+        """Withdraw the waiter session from a job, cancelling it when nobody else is waiting"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            job.waiters.discard(waiter)
+            if job.waiters:
+                return True
+            job._cancel.set()
+            # A new request for the report starts a fresh build rather than joining this one
+            self._in_flight.pop(job.key, None)
+            if job._future.cancel():
+                job._finish(CANCELLED)
+            return True
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+        for job in jobs:
+            counts[job.status] += 1
+        return {**counts, "deduplicated": self.deduplicated}
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_report_queue():
+    """Process-wide report queue, shared by every Streamlit session on this server"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ReportJobQueue()
+        return _queue
@@ -0,0 +1,288 @@
+import io
+import os
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import Cell
+from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
+
+from forecast import forecast_paths
+from ledger import accumulate_monthly_totals, empty_monthly_totals
+from metrics import format_runway, metrics_snapshot
+
+EXCEL_MAX_ROWS = 1_048_576
+# Transactions written between progress callbacks (and cancellation checks)
+PROGRESS_ROWS = 5_000
+TRANSACTION_COLUMNS = ["date", "description", "category", "amount"]
+
+TITLE_FONT = Font(size=20, bold=True, color="FFFFFF")
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+BRAND_FILL = PatternFill(start_color="4F46E5", end_color="4F46E5", fill_type="solid")
+MONEY_FORMAT = '"$"#,##0.00'
+PERCENT_FORMAT = '0.0%'
+
+# ========== COLUMN WIDTHS ==========
+class ColumnWidths:
+    """Running maximum text width per column, updated as rows are produced
+
+    Write-only sheets emit their column widths before the first row, so
+    widths have to be applied before any rows are appended.
+    """
+
+    def __init__(self, minimum=8, maximum=60):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.widths = {}
+
+    def update(self, row):
+        for index, value in enumerate(row, start=1):
+            if isinstance(value, Cell):
+                value = value.value
+            if isinstance(value, float):
+                # Money-formatted: "$" plus thousands separators and cents
+                self.update_column(index, len(f"{value:,.2f}") + 1)
+            elif value is not None:
+                self.update_column(index, len(str(value)))
+
+    def update_column(self, index, width):
+        if width > self.widths.get(index, 0):
+            self.widths[index] = width
+
+    def apply(self, ws):
+        for index, width in self.widths.items():
+            ws.column_dimensions[get_column_letter(index)].width = min(max(width + 2, self.minimum), self.maximum)
+
+def _header_row(ws, labels):
+    cells = []
+    for label in labels:
+        cell = WriteOnlyCell(ws, value=label)
+        cell.font = HEADER_FONT
+        cell.fill = BRAND_FILL
+        cells.append(cell)
+    return cells
+
+def _styled(ws, value, number_format):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.number_format = number_format
+    return cell
+
+def _write_table(ws, header, rows):
+    """Write a small, fully materialized table with fitted column widths"""
+    widths = ColumnWidths()
+    widths.update(header)
+    for row in rows:
+        widths.update(row)
+    widths.apply(ws)
+    ws.append(_header_row(ws, header))
+    for row in rows:
+        ws.append(row)
+
+# ========== SHEETS ==========
+def _write_dashboard(ws, financial_data):
+    title_cell = WriteOnlyCell(ws, value="UXXCA FINANCIAL DASHBOARD")
+    title_cell.font = TITLE_FONT
+    title_cell.fill = BRAND_FILL
+    title_cell.alignment = Alignment(horizontal='center')
+    ws.merged_cells.add('A1:F1')
+
+    # Key Metrics
+    model = metrics_snapshot(financial_data)
+    metrics = [
+        ["Monthly Revenue", f"${model['revenue']:,.2f}"],
+        ["Monthly Expenses", f"${model['expenses']:,.2f}"],
+        ["Monthly Profit", f"${model['monthly_profit']:,.2f}"],
+        ["Profit Margin", f"{model['profit_margin']:.1f}%"],
+        ["Cash Balance", f"${model['cash_balance']:,.2f}"],
+        ["Runway", format_runway(model['runway_months'])],
+    ]
+    rows = [
+        [],
+        ["Company Name:", financial_data.get('company_name', 'Your Business')],
+        ["Report Period:", datetime.now().strftime("%B %Y")],
+        [],
+        *metrics,
+    ]
+
+    # The merged title row is left out of the width calculation
+    widths = ColumnWidths()
+    for row in rows:
+        widths.update(row)
+    widths.apply(ws)
+    ws.append([title_cell])
+    for row in rows:
+        ws.append(row)
+
+def _transaction_batches(transactions):
+    """Normalize a DataFrame, pyarrow table or iterable of batches into pyarrow batches"""
+    if isinstance(transactions, (pd.DataFrame, pa.Table, pa.RecordBatch)):
+        transactions = [transactions]
+    for batch in transactions:
+        if isinstance(batch, pd.DataFrame):
+            batch = pa.Table.from_pandas(batch[TRANSACTION_COLUMNS], preserve_index=False)
+        yield batch
+
+def _write_transactions(wb, first_ws, transactions, on_rows=None):
+    """Stream transactions into ledger sheet(s) and return their monthly totals
+
+    Rows go straight from each batch to the sheet, so memory is bounded by
+    the batch size. Column widths are fitted to the first batch; ledgers
+    longer than Excel's row limit continue on extra sheets at the end.
+    on_rows, if given, is called with the rows written so far every
+    PROGRESS_ROWS rows.
+    """
+    header = ["Date", "Description", "Category", "Amount"]
+    totals = empty_monthly_totals()
+    ws, rows_on_sheet, sheets, written = first_ws, 0, 0, 0
+
+    for batch in _transaction_batches(transactions):
+        if batch.num_rows == 0:
+            continue
+        dates = batch.column("date").cast(pa.date32())
+        columns = [
+            dates.to_pylist(),
+            batch.column("description").to_pylist(),
+            batch.column("category").cast(pa.string()).to_pylist(),
+            batch.column("amount").to_pylist(),
+        ]
+        totals = accumulate_monthly_totals(totals, pd.DataFrame({
+            "date": dates.to_pandas(date_as_object=False),
+            "category": columns[2],
+            "amount": columns[3],
+        }))
+
+        rows = zip(*columns)
+        remaining = batch.num_rows
+        while remaining:
+            if sheets == 0 or rows_on_sheet == EXCEL_MAX_ROWS:
+                sheets += 1
+                if sheets > 1:
+                    ws = wb.create_sheet(f"Transactions {sheets}")
+                widths = ColumnWidths()
+                widths.update(header)
+                widths.update_column(1, 10)
+                for column_index, values in ((2, columns[1]), (3, columns[2])):
+                    widths.update_column(column_index, max((len(v) for v in values if v), default=0))
+                widths.update_column(4, len(f"{max(map(abs, columns[3]), default=0):,.2f}") + 1)
+                widths.apply(ws)
+                ws.append(_header_row(ws, header))
+                rows_on_sheet = 1
+            take = min(remaining, EXCEL_MAX_ROWS - rows_on_sheet)
+            for _ in range(take):
+                ws.append(next(rows))
+                written += 1
+                if on_rows and written % PROGRESS_ROWS == 0:
+                    on_rows(written)
+            rows_on_sheet += take
+            remaining -= take
+
+    if sheets == 0:
+        _write_table(ws, header, [])
+    return totals
+
+def _write_monthly_pnl(ws, financial_data, totals):
+    if totals.empty:
+        breakdown = financial_data.get('expense_breakdown', {})
+        categories = list(breakdown)
+        monthly = [(datetime.now().strftime("%Y-%m"), financial_data['revenue'],
+                    financial_data['expenses'], [breakdown[c] for c in categories])]
+    else:
+        by_month = totals.groupby(level="month").sum()
+        spend = totals["expenses"].unstack("category", fill_value=0)
+        categories = [c for c in spend.columns if spend[c].sum() > 0]
+        monthly = [(month.strftime("%Y-%m"), row["revenue"], row["expenses"],
+                    [spend.at[month, c] for c in categories])
+                   for month, row in by_month.iterrows()]
+
+    header = ["Month", "Revenue", "Expenses", "Net Profit", "Margin", *categories]
+    rows = []
+    for month, revenue, expenses, category_spend in monthly:
+        rows.append([
+            month,
+            _styled(ws, float(revenue), MONEY_FORMAT),
+            _styled(ws, float(expenses), MONEY_FORMAT),
+            _styled(ws, float(revenue - expenses), MONEY_FORMAT),
+            _styled(ws, float((revenue - expenses) / revenue) if revenue else None, PERCENT_FORMAT),
+            *(_styled(ws, float(value), MONEY_FORMAT) for value in category_spend),
+        ])
+    _write_table(ws, header, rows)
+
+def _write_forecast(ws, financial_data, months, revenue_growth, expense_growth):
+    paths = forecast_paths(financial_data['cash_balance'], financial_data['revenue'],
+                           financial_data['expenses'], months, revenue_growth, expense_growth)
+    revenue, expenses, balance = paths["revenue"][0], paths["expenses"][0], paths["balance"][0]
+    header = ["Month", "Revenue", "Expenses", "Net Cash Flow", "Cash Balance"]
+    rows = [
+        [month + 1, *(_styled(ws, float(v), MONEY_FORMAT)
+                      for v in (revenue[month], expenses[month], revenue[month] - expenses[month], balance[month]))]
+        for month in range(months)
+    ]
+    _write_table(ws, header, rows)
+
+def _discard(wb):
+    """Close an abandoned write-only workbook's sheets and delete their temp files
+
+    Left to the garbage collector, half-written sheets are closed in the
+    wrong order and openpyxl prints a traceback for each.
+    """
+    for ws in wb.worksheets:
+        try:
+            ws.close()
+            os.remove(ws._writer.out)
+        except Exception:
+            pass
+
+# ========== PROFESSIONAL SPREADSHEET GENERATOR ==========
+def create_financial_spreadsheet(financial_data, transactions=None, output=None, forecast_months=12,
+                                 revenue_growth=0.0, expense_growth=0.0, progress=None, transaction_rows=None):
+    """Create a professional Excel spreadsheet with financial data
+
+    Built on write-only worksheets, so rows are streamed to disk as they are
+    written. ``transactions`` may be a DataFrame, a pyarrow table or an
+    iterable of batches with date/description/category/amount columns; it
+    fills the ledger sheet and the monthly P&L in a single pass. Writes to
+    ``output`` (a path or binary file) when given, otherwise returns a
+    BytesIO. ``progress(fraction, stage)`` is called as each sheet starts
+    and every PROGRESS_ROWS transactions, scaled by ``transaction_rows`` when
+    the ledger's length is known.
+    """
+    def report(fraction, stage):
+        if progress:
+            progress(fraction, stage)
+
+    def on_rows(written):
+        share = min(written / transaction_rows, 1.0) if transaction_rows else 0.0
+        report(0.05 + 0.75 * share, f"Writing transactions ({written:,} rows)")
+
+    wb = openpyxl.Workbook(write_only=True)
+    dashboard = wb.create_sheet("Financial Dashboard")
+    ledger = wb.create_sheet("Transactions") if transactions is not None else None
+    pnl = wb.create_sheet("Monthly P&L")
+    forecast = wb.create_sheet("Forecast")
+
+    try:
+        report(0.0, "Writing dashboard")
+        _write_dashboard(dashboard, financial_data)
+        if ledger is not None:
+            report(0.05, "Writing transactions")
+            totals = _write_transactions(wb, ledger, transactions, on_rows)
+        else:
+            totals = empty_monthly_totals()
+        report(0.8, "Writing monthly P&L")
+        _write_monthly_pnl(pnl, financial_data, totals)
+        report(0.85, "Writing forecast")
+        _write_forecast(forecast, financial_data, forecast_months, revenue_growth, expense_growth)
+        report(0.9, "Saving workbook")
+    except BaseException:
+        _discard(wb)
+        raise
+
+    # Save to bytes
+    excel_bytes = io.BytesIO() if output is None else output
+    wb.save(excel_bytes)
+    if output is None:
+        excel_bytes.seek(0)
+    return excel_bytes
@@ -0,0 +1,36 @@
+import os
+import sys
+
+# Memory one session's own histories may hold in st.session_state before the oldest entries are trimmed
+SESSION_MEMORY_BYTES = int(os.environ.get("UXXCA_SESSION_MB", "2")) * 1024 * 1024
+# Trimmed lists keep at least their newest MIN_KEPT entries
+MIN_KEPT = 5
+
+def deep_size(obj, _seen=None):
+    """Approximate bytes held by obj and what it references, counting shared objects once"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+def enforce_session_budget(state, trimmable, counted=(), budget=SESSION_MEMORY_BYTES):
+    """Halve the oldest end of the trimmable lists until they and the counted keys fit in budget
+
+    trimmable names list-valued keys that grow as the session is used, most
+    expendable first; counted names other keys charged against the budget
+    but never trimmed. Only these keys are measured, so the walk stays
+    cheap. Returns the size per key after trimming.
+    """
+    sizes = {key: deep_size(state.get(key)) for key in (*trimmable, *counted)}
+    for key in trimmable:
+        while sum(sizes.values()) > budget and len(state.get(key) or ()) > MIN_KEPT:
+            items = state[key]
+            state[key] = items[-max(MIN_KEPT, len(items) // 2):]
+            sizes[key] = deep_size(state[key])
+    return sizes
@@ -0,0 +1,61 @@
+import numpy as np
+
+from forecast import months_to_zero
+
+PERCENTILES = (5, 50, 95)
+
+# ========== MONTE CARLO RUNWAY SIMULATOR ==========
+def _row_percentiles(matrix, percentiles=PERCENTILES):
+    """Linear-interpolated percentiles of each row, sorting the matrix in place
+
+    A contiguous row sort is cheaper than np.percentile's strided partition
+    on (months, n_paths) matrices of this size.
+    """
+    matrix.sort(axis=1)
+    position = np.asarray(percentiles, dtype=float) / 100 * (matrix.shape[1] - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, matrix.shape[1] - 1)
+    weight = position - lower
+    values = matrix[:, lower] * (1 - weight) + matrix[:, upper] * weight
+    return dict(zip(percentiles, values.T.astype(float)))
+
+def simulate_cash_paths(cash_balance, revenue, expenses, months=36, n_paths=100_000, seed=42,
+                        revenue_range=(-0.10, 0.20), expense_range=(-0.05, 0.15)):
+    """Simulate revenue/expense paths and summarize cash and runway percentiles
+
+    Each month's revenue and expenses are drawn independently as uniform
+    multipliers on today's values, for all paths at once as (months, n_paths)
+    float32 matrices. The same seed always gives the same result.
+    """
+    rng = np.random.default_rng(seed)
+    shape = (months, n_paths)
+
+    profit = rng.random(shape, dtype=np.float32)
+    profit *= revenue * (revenue_range[1] - revenue_range[0])
+    profit += revenue * (1 + revenue_range[0])
+
+    expense_draws = rng.random(shape, dtype=np.float32)
+    expense_draws *= expenses * (expense_range[1] - expense_range[0])
+    expense_draws += expenses * (1 + expense_range[0])
+    profit -= expense_draws
+    del expense_draws
+
+    # Row-by-row accumulation over months (each step is a vector add over all
+    # paths) is several times faster than np.cumsum along axis 0 here
+    cash = profit.copy()
+    cash[0] += cash_balance
+    for month in range(1, months):
+        cash[month] += cash[month - 1]
+    runway = months_to_zero(cash, axis=0)
+
+    return {
+        "months": np.arange(1, months + 1),
+        "n_paths": n_paths,
+        "seed": seed,
+        "profit": _row_percentiles(profit),
+        "cash": _row_percentiles(cash),
+        # inverted_cdf never interpolates, so paths that never run out stay inf
+        "runway": dict(zip(PERCENTILES, np.quantile(runway, np.divide(PERCENTILES, 100),
+                                                   method="inverted_cdf"))),
+        "cash_out_probability": float(np.isfinite(runway).mean()),
+    }
@@ -0,0 +1,71 @@
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+DEFAULT_TARGETS = ("core", "assistant", "chat_store", "ledger", "reports", "batch")
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+# ========== STARTUP-TIME MEASUREMENT ==========
+def script_imports(path):
+    """Source of a script's top-level import statements, so a Streamlit page can be timed without running it"""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    return "\n".join(ast.get_source_segment(source, node) for node in ast.parse(source).body
+                     if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+def profile_import(target, python=sys.executable):
+    """Import target in a fresh interpreter with -X importtime and parse the report
+
+    target is a module name, or a script path such as app.py whose
+    top-level imports are timed. Returns the wall time, the total import
+    time and a list of (module, self_us, cumulative_us, depth) rows.
+    """
+    code = script_imports(target) if target.endswith(".py") else f"import {target}"
+    cwd = os.path.dirname(os.path.abspath(target)) if target.endswith(".py") else None
+    started = time.perf_counter()
+    completed = subprocess.run([python, "-X", "importtime", "-c", code], capture_output=True, text=True, cwd=cwd)
+    wall = time.perf_counter() - started
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    if completed.returncode:
+        raise RuntimeError(f"{target} failed to import:\n{completed.stderr[-2000:]}")
+    total = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+    return {"target": target, "wall_seconds": wall, "import_us": total, "modules": rows}
+
+def cost_by_package(modules):
+    """Self time summed per top-level package, heaviest first"""
+    totals = defaultdict(int)
+    for module, self_us, _, _ in modules:
+        totals[module.split(".")[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+def report(profile, top=12):
+    lines = [f"{profile['target']}: {profile['import_us'] / 1000:,.0f} ms import, "
+             f"{profile['wall_seconds'] * 1000:,.0f} ms wall including interpreter start"]
+    packages = cost_by_package(profile["modules"])
+    width = max((len(name) for name, _ in packages[:top]), default=0)
+    for name, self_us in packages[:top]:
+        lines.append(f"  {name:<{width}}  {self_us / 1000:8,.1f} ms")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report import cost per module for a cold start")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS,
+                        help="modules to import, or scripts such as app.py to run")
+    parser.add_argument("--top", type=int, default=12, help="packages listed per target")
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts per target; the fastest is shown")
+    args = parser.parse_args()
+
+    for target in args.targets:
+        runs = [profile_import(target) for _ in range(max(args.repeat, 1))]
+        print(report(min(runs, key=lambda run: run["import_us"]), args.top))
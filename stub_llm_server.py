@@ -0,0 +1,78 @@
+"""Local OpenAI-compatible chat completions stub for testing the assistant offline
+
+    python stub_llm_server.py --port 8765 --latency 0.2 --fail-rate 0.1
+    UXXCA_LLM_URL=http://127.0.0.1:8765/chat/completions streamlit run app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse connections
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        config = self.server.stub_config
+        if config["latency"]:
+            time.sleep(config["latency"])
+        if random.random() < config["fail_rate"]:
+            self._send(503, {"error": {"message": "stub failure"}})
+            return
+        try:
+            messages = json.loads(body)["messages"]
+        except (ValueError, KeyError):
+            self._send(400, {"error": {"message": "invalid request"}})
+            return
+        question = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        with self.server.stub_lock:
+            self.server.stub_requests += 1
+        self._send(200, {
+            "id": f"stub-{self.server.stub_requests}",
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"[stub] You asked: {question[:200]}"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": sum(len(m.get("content", "")) // 4 for m in messages),
+                      "completion_tokens": 16},
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port=0, latency=0.0, fail_rate=0.0):
+    """Start the stub in a daemon thread and return (server, chat completions URL)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.stub_config = {"latency": latency, "fail_rate": fail_rate}
+    server.stub_lock = threading.Lock()
+    server.stub_requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+    server, url = start_stub_server(args.port, args.latency, args.fail_rate)
+    print(f"Stub model backend listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
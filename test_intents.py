@@ -0,0 +1,13 @@
+from intents import answer_locally, parse_question
+
+FINANCIALS = {"revenue": 15000, "expenses": 12000, "cash_balance": 50000}
+
+def test_unparsed_hire_goes_to_the_model():
+    question = "what if I hire 2 people at $5,000 each, what is my runway"
+    assert parse_question(question) is None
+    assert answer_locally(question, FINANCIALS) is None
+
+def test_parsed_questions_are_answered_locally():
+    assert parse_question("what is my runway")["intent"] == "runway"
+    assert parse_question("cut payroll by $2k and marketing by 10%")["intent"] == "scenario"
+    assert parse_question("Suggest ways to optimize my $12,000 in monthly expenses")["intent"] == "optimize"
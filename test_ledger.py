@@ -0,0 +1,48 @@
+import io
+
+import pandas as pd
+
+from ledger import ingest_transactions, iter_transaction_batches, transaction_count
+
+def _export(rows):
+    return io.StringIO(pd.DataFrame(rows, columns=["Date", "Description", "Amount"]).to_csv(index=False))
+
+def _stored(company_name):
+    batches = list(iter_transaction_batches(company_name, columns=["date", "amount", "description"]))
+    return pd.concat([batch.to_pandas() for batch in batches], ignore_index=True)
+
+CHECKING = [
+    ("2024-01-05", "Rent", -2000.0),
+    ("2024-02-05", "Rent", -2000.0),
+    ("2024-02-14", "Stripe payout", 5000.0),
+    ("2024-03-05", "Rent", -2000.0),
+]
+CARD = [
+    ("2024-02-10", "AWS", -300.0),
+    ("2024-02-20", "Figma", -45.0),
+    ("2024-03-10", "AWS", -310.0),
+    ("2024-04-10", "AWS", -320.0),
+]
+
+def test_second_account_over_the_same_months_is_kept():
+    ingest_transactions(_export(CHECKING), "Two Accounts", "checking.csv")
+    stats = ingest_transactions(_export(CARD), "Two Accounts", "card.csv")
+    assert stats["rows_appended"] == len(CARD)
+    assert transaction_count("Two Accounts") == len(CHECKING) + len(CARD)
+    assert sorted(_stored("Two Accounts")["description"]) == sorted(d for _, d, _ in CHECKING + CARD)
+
+def test_reuploading_an_overlapping_export_appends_only_new_rows():
+    ingest_transactions(_export(CHECKING), "Reupload", "checking.csv")
+    ingest_transactions(_export(CARD), "Reupload", "card.csv")
+    later = CHECKING[1:] + [("2024-04-05", "Rent", -2000.0)]
+    stats = ingest_transactions(_export(later), "Reupload", "checking.csv")
+    assert stats["rows_read"] == len(later)
+    assert stats["rows_appended"] == 1
+    assert transaction_count("Reupload") == len(CHECKING) + len(CARD) + 1
+
+def test_repeated_transactions_on_one_day_are_counted():
+    coffee = [("2024-05-02", "Coffee", -4.5), ("2024-05-02", "Coffee", -4.5), ("2024-05-03", "Coffee", -4.5)]
+    ingest_transactions(_export(coffee[:2]), "Coffee", "card.csv")
+    stats = ingest_transactions(_export(coffee), "Coffee", "card.csv")
+    assert stats["rows_appended"] == 1
+    assert transaction_count("Coffee") == 3
@@ -0,0 +1,74 @@
+import pytest
+import requests
+
+from llm_client import CircuitBreaker, CircuitOpenError, LLMClient, LLMError
+
+class FakeResponse:
+    def __init__(self, status_code=200, content="ok"):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.text = content
+
+    def json(self):
+        return {"choices": [{"message": {"content": self.text}}]}
+
+def _client(outcomes, **options):
+    """A client whose backend plays back outcomes: a FakeResponse to return or an exception to raise"""
+    client = LLMClient(url="http://127.0.0.1:9/chat", backoff_base=0, **options)
+    outcomes = list(outcomes)
+
+    def post(url, json, timeout):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    client.session.post = post
+    return client
+
+def test_breaker_opens_after_threshold_and_half_opens_after_cooldown():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    breaker.opened_at -= 60
+    assert breaker.state == "half-open"
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+    breaker.failures, breaker.opened_at = 5, 0.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+def test_retryable_failures_are_retried():
+    client = _client([requests.ConnectionError("reset"), FakeResponse(503), FakeResponse(content="hello")])
+    assert client.chat([{"role": "user", "content": "hi"}]) == "hello"
+    assert client.stats() == {"calls": 1, "failures": 0, "retries": 2, "breaker": "closed"}
+
+def test_open_breaker_short_circuits():
+    client = _client([FakeResponse(500)] * 3, max_retries=2, breaker=CircuitBreaker(failure_threshold=1))
+    with pytest.raises(LLMError):
+        client.chat([])
+    with pytest.raises(CircuitOpenError):
+        client.chat([])
+    assert client.stats()["calls"] == 1
+
+@pytest.mark.parametrize("error", [requests.TooManyRedirects("loop"), RuntimeError("bug")])
+def test_any_failure_releases_the_half_open_trial(error):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    client = _client([error, FakeResponse(content="back")], breaker=breaker)
+    with pytest.raises(LLMError):
+        client.chat([])
+    assert client.chat([]) == "back"
+    assert breaker.state == "closed"
@@ -0,0 +1,32 @@
+import math
+
+from metrics import MetricsModel, format_runway, metrics_snapshot
+
+def test_update_recomputes_only_dependents():
+    model = MetricsModel(revenue=15000, expenses=12000, cash_balance=50000)
+    model.snapshot()
+    computed = model.recomputes
+    model.update(cash_balance=60000)
+    assert model["runway_months"] == 5.0
+    assert model["monthly_profit"] == 3000
+    assert model.recomputes == computed + 1
+
+def test_company_model_is_updated_in_place():
+    data = {"company_name": "Incremental", "revenue": 15000, "expenses": 12000, "cash_balance": 50000}
+    assert metrics_snapshot(data)["runway_months"] == 50000 / 12000
+    snapshot = metrics_snapshot({**data, "cash_balance": 24000})
+    assert snapshot["runway_months"] == 2.0
+    assert snapshot["category_spend"]["Salaries"] == 4800
+
+def test_editing_a_breakdown_in_place_is_seen():
+    breakdown = {"Rent": 2000, "Payroll": 8000}
+    data = {"company_name": "In Place", "revenue": 0, "expenses": 10000, "cash_balance": 0,
+            "expense_breakdown": breakdown}
+    assert metrics_snapshot(data)["largest_expense"] == "Payroll"
+    breakdown["Rent"] = 9000
+    assert metrics_snapshot(data)["largest_expense"] == "Rent"
+
+def test_runway_without_expenses():
+    snapshot = metrics_snapshot({"company_name": "No Burn", "revenue": 100, "expenses": 0, "cash_balance": 10})
+    assert math.isinf(snapshot["runway_months"])
+    assert format_runway(snapshot["runway_months"]) == "No burn"
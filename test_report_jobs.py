@@ -0,0 +1,63 @@
+import threading
+import uuid
+
+from report_jobs import CANCELLED, DONE, ReportJobQueue
+
+def _blocking_build(release, started=None):
+    def build(path, progress):
+        if started is not None:
+            started.set()
+        while not release.wait(0.01):
+            progress(0.5, "Building")
+        with open(path, "w") as f:
+            f.write("report")
+    return build
+
+def _wait(job):
+    job._future.result(timeout=10)
+
+def test_identical_requests_share_one_job():
+    queue, release = ReportJobQueue(workers=1), threading.Event()
+    key = uuid.uuid4().hex
+    first = queue.submit(key, _blocking_build(release), "session-a")
+    assert queue.submit(key, _blocking_build(release), "session-b") is first
+    release.set()
+    _wait(first)
+    assert first.status == DONE and first.progress == 1.0
+    assert queue.stats()["deduplicated"] == 1
+    assert queue.submit(key, _blocking_build(release), "session-c").status == DONE
+
+def test_repeat_clicks_do_not_keep_a_job_alive():
+    queue, release, started = ReportJobQueue(workers=1), threading.Event(), threading.Event()
+    job = queue.submit(uuid.uuid4().hex, _blocking_build(release, started), "session-a")
+    queue.submit(job.key, _blocking_build(release), "session-a")
+    queue.submit(job.key, _blocking_build(release), "session-a")
+    started.wait(10)
+    assert queue.stats()["deduplicated"] == 0
+    assert queue.cancel(job.id, "session-a")
+    _wait(job)
+    assert job.status == CANCELLED
+
+def test_job_runs_until_every_waiter_cancels():
+    queue, release, started = ReportJobQueue(workers=1), threading.Event(), threading.Event()
+    job = queue.submit(uuid.uuid4().hex, _blocking_build(release, started), "session-a")
+    queue.submit(job.key, _blocking_build(release), "session-b")
+    started.wait(10)
+    queue.cancel(job.id, "session-a")
+    queue.cancel(job.id, "session-a")
+    assert job.active and job.waiters == {"session-b"}
+    queue.cancel(job.id, "session-b")
+    _wait(job)
+    assert job.status == CANCELLED
+    assert queue.submit(job.key, _blocking_build(release), "session-a") is not job
+    release.set()
+
+def test_queued_job_is_cancelled_before_it_starts():
+    queue, release = ReportJobQueue(workers=1), threading.Event()
+    running = queue.submit(uuid.uuid4().hex, _blocking_build(release), "session-a")
+    queued = queue.submit(uuid.uuid4().hex, _blocking_build(release), "session-b")
+    assert queue.cancel(queued.id, "session-b")
+    assert queued.status == CANCELLED
+    release.set()
+    _wait(running)
+    assert running.status == DONE
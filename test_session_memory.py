@@ -0,0 +1,17 @@
+from session_memory import MIN_KEPT, deep_size, enforce_session_budget
+
+def test_oldest_entries_are_trimmed_most_expendable_first():
+    state = {"perf_history": [{"rerun": i, "spans": ["x" * 100]} for i in range(200)],
+             "calendar_events": [{"name": f"Invoice {i}"} for i in range(20)],
+             "context_tokens": {"total": 1200}}
+    budget = deep_size(state["calendar_events"]) + deep_size(state["context_tokens"]) + 10_000
+    sizes = enforce_session_budget(state, ("perf_history", "calendar_events"), ("context_tokens",), budget)
+    assert sum(sizes.values()) <= budget
+    assert MIN_KEPT <= len(state["perf_history"]) < 200
+    assert state["perf_history"][-1]["rerun"] == 199
+    assert len(state["calendar_events"]) == 20
+
+def test_lists_keep_their_newest_entries_past_the_budget():
+    state = {"calendar_events": [{"name": f"Invoice {i}"} for i in range(100)]}
+    enforce_session_budget(state, ("calendar_events",), budget=0)
+    assert [event["name"] for event in state["calendar_events"]] == [f"Invoice {i}" for i in range(95, 100)]
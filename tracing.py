@@ -0,0 +1,168 @@
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+import numpy as np
+
+from config import DATA_DIR
+
+TRACE_DIR = os.path.join(DATA_DIR, "traces")
+# Fraction of reruns traced for every session; sessions with the panel open are always traced
+TRACE_SAMPLE_RATE = float(os.environ.get("UXXCA_TRACE_SAMPLE_RATE", "0"))
+
+# Active reruns by thread id; Streamlit runs each session's script on its own thread.
+# While nothing is traced the dict is empty and a span costs one truthiness check.
+_active = {}
+_write_lock = threading.Lock()
+
+# ========== SPANS ==========
+class Rerun:
+    """Timing spans recorded during one script run"""
+
+    def __init__(self, session_id, rerun):
+        self.session_id = session_id
+        self.rerun = rerun
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.depth = 0
+
+    def record(self, aborted=False):
+        """The rerun as a plain dict; an aborted rerun ends with its last finished span"""
+        spans = [s for s in self.spans if s is not None]
+        if aborted:
+            total_ms = max((s["start_ms"] + s["ms"] for s in spans), default=0.0)
+        else:
+            total_ms = (time.perf_counter() - self.origin) * 1000
+        record = {
+            "session_id": self.session_id,
+            "rerun": self.rerun,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="milliseconds"),
+            "total_ms": total_ms,
+            "spans": spans,
+        }
+        if aborted:
+            record["aborted"] = True
+        return record
+
+class _Span:
+    __slots__ = ("rerun", "name", "start", "index")
+
+    def __init__(self, rerun, name):
+        self.rerun = rerun
+        self.name = name
+
+    def __enter__(self):
+        rerun = self.rerun
+        self.index = len(rerun.spans)
+        rerun.spans.append(None)  # placeholder keeps spans in start order
+        rerun.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        rerun = self.rerun
+        rerun.depth -= 1
+        rerun.spans[self.index] = {
+            "name": self.name,
+            "start_ms": round((self.start - rerun.origin) * 1000, 3),
+            "ms": round((end - self.start) * 1000, 3),
+            "depth": rerun.depth,
+        }
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name):
+    """Context manager timing a block; a shared no-op when this rerun is not traced"""
+    if not _active:
+        return _NULL_SPAN
+    rerun = _active.get(threading.get_ident())
+    if rerun is None:
+        return _NULL_SPAN
+    return _Span(rerun, name)
+
+def traced(name=None):
+    """Decorator timing every call of a function as a span"""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            rerun = _active.get(threading.get_ident()) if _active else None
+            if rerun is None:
+                return fn(*args, **kwargs)
+            with _Span(rerun, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# ========== RERUNS ==========
+def _export(record):
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    line = json.dumps(record) + "\n"
+    with _write_lock, open(os.path.join(TRACE_DIR, f"{datetime.now():%Y-%m-%d}.jsonl"), "a",
+                           encoding="utf-8") as f:
+        f.write(line)
+
+def _drop_unfinished(thread_id):
+    """Export, as aborted, reruns that never reached finish_rerun: this thread's last one and dead threads'
+
+    An uncaught exception ends a script without finishing its trace; left in
+    _active, the rerun would leak and keep every span off the no-op path.
+    """
+    alive = {thread.ident for thread in threading.enumerate()}
+    for ident in [ident for ident in list(_active) if ident == thread_id or ident not in alive]:
+        rerun = _active.pop(ident, None)
+        if rerun is not None:
+            _export(rerun.record(aborted=True))
+
+def start_rerun(session_id, rerun, force=False):
+    """Begin tracing this thread's rerun if forced or sampled; returns whether it is traced"""
+    thread_id = threading.get_ident()
+    if _active:
+        _drop_unfinished(thread_id)
+    traced_run = force or (TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE)
+    if traced_run:
+        _active[thread_id] = Rerun(session_id, rerun)
+    return traced_run
+
+def finish_rerun(export=True):
+    """Stop tracing, append the rerun to today's JSONL file and return its record (None if untraced)"""
+    rerun = _active.pop(threading.get_ident(), None)
+    if rerun is None:
+        return None
+    record = rerun.record()
+    if export:
+        _export(record)
+    return record
+
+def span_percentiles(records):
+    """p50/p95 and call count per span name across rerun records, slowest p95 first"""
+    durations = {}
+    for record in records:
+        totals = {}
+        for s in record["spans"]:
+            totals[s["name"]] = totals.get(s["name"], 0.0) + s["ms"]
+        totals["(rerun total)"] = record["total_ms"]
+        for name, ms in totals.items():
+            durations.setdefault(name, []).append(ms)
+    rows = []
+    for name, values in durations.items():
+        p50, p95 = np.percentile(values, [50, 95])
+        rows.append({"span": name, "reruns": len(values), "p50_ms": p50, "p95_ms": p95})
+    return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)